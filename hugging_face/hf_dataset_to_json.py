@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: Apache-2.0
 import argparse
+import hashlib
 import io
 import json
 import logging
@@ -7,6 +8,7 @@ import os
 from datetime import datetime
 from typing import Any, Dict
 
+import imagehash
 from datasets import load_dataset
 from PIL import Image
 
@@ -33,12 +35,28 @@ def load_hugging_face_image(item, column: str) -> Image.Image:
         raise ValueError(f"Unknown image format: {type(image)}")
 
 
+def hugging_face_image_sha256(item, column: str):
+    # hash the encoded file as stored in the dataset, decoded images have no stable bytes
+    image = item[column]
+    digest = hashlib.sha256()
+    if isinstance(image, dict) and image.get('bytes'):
+        digest.update(image['bytes'])
+    elif isinstance(image, str):
+        with open(image, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    else:
+        return None
+    return digest.hexdigest()
+
+
 def create_json_entry(dataset, dataset_name: str, item, id: int, mapping: Dict[str, str], uploaded_by: str, content_id: str) -> Dict[str, Any]:
     entry = {
         "id": content_id,
         "type": "image",
         "hash": "tbd",
         "phash": "tbd",
+        "dhash": "tbd",
         "urls": [""],
         "status": "available",
         "flags": 0,
@@ -96,6 +114,10 @@ def create_json_entry(dataset, dataset_name: str, item, id: int, mapping: Dict[s
                 entry['width'] = image.width
                 entry['height'] = image.height
                 entry['format'] = image.format.lower() if image.format else 'unknown'
+                # same 64 bit hashes as odr_core.perceptual_hash, as 16 hex digits
+                entry['phash'] = str(imagehash.phash(image))
+                entry['hash'] = hugging_face_image_sha256(item, source_field) or entry['hash']
+                entry['dhash'] = str(imagehash.dhash(image))
             elif target_field == 'contentAuthor':
                 entry['contentAuthor'] = [{
                     "id": f"{item[source_field]}-author",
@@ -9,6 +9,7 @@ features = Features({
     'type': Value('string'),
     'hash': Value('string'),
     'phash': Value('string'),
+    'dhash': Value('string'),
     'urls': Sequence(Value('string')),
     'status': Value('string'),
     'flags': Value('int64'),
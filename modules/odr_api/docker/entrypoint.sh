@@ -0,0 +1,16 @@
+#!/bin/sh
+# SPDX-License-Identifier: Apache-2.0
+# Runs uvicorn with the given arguments. With EMBEDDING_SERVER_SOCKET configured it first
+# starts the shared embedding server and waits until it listens, the workers embed in
+# process while it is not reachable.
+set -e
+
+# odr_core.config prints the detected environment first, the socket is the last line
+socket=$(python -c "from odr_core.config import settings; print(settings.EMBEDDING_SERVER_SOCKET or '')" | tail -n 1)
+# a server run as a separate service already listens on the socket
+if [ -n "$socket" ] && ! python -m odr_core.embedding_server --socket "$socket" --wait 0 2>/dev/null; then
+    python -m odr_core.embedding_server --socket "$socket" &
+    python -m odr_core.embedding_server --socket "$socket" --wait || true
+fi
+
+exec uvicorn "$@"
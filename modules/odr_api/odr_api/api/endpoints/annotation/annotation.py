@@ -1,7 +1,8 @@
 # SPDX-License-Identifier: Apache-2.0
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from odr_core.crud.annotation import (
     create_annotation,
@@ -9,10 +10,11 @@ from odr_core.crud.annotation import (
     get_annotations,
     update_annotation,
     delete_annotation,
-    get_annotations_by_content,
+    get_annotations_by_content_async,
 )
+from odr_core.crud.pagination import set_next_cursor_header
 from odr_core.schemas.annotation import AnnotationCreate, AnnotationUpdate, Annotation
-from odr_core.database import get_db
+from odr_core.database import get_async_read_db, get_db, get_read_db
 
 
 router = APIRouter(tags=["annotation"])
@@ -27,7 +29,7 @@ def create_annotation_endpoint(
 
 
 @router.get("/annotations/{annotation_id}", response_model=Annotation)
-def read_annotation_endpoint(annotation_id: int, db: Session = Depends(get_db)):
+def read_annotation_endpoint(annotation_id: int, db: Session = Depends(get_read_db)):
     db_annotation = get_annotation(db, annotation_id=annotation_id)
     if db_annotation is None:
         raise HTTPException(status_code=404, detail="Annotation not found")
@@ -36,9 +38,17 @@ def read_annotation_endpoint(annotation_id: int, db: Session = Depends(get_db)):
 
 @router.get("/annotations/", response_model=List[Annotation])
 def read_annotations_endpoint(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
 ):
-    annotations = get_annotations(db, skip=skip, limit=limit)
+    try:
+        annotations = get_annotations(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, annotations, limit)
     return annotations
 
 
@@ -72,10 +82,19 @@ def delete_annotation_endpoint(
 
 
 @router.get("/contents/{content_id}/annotations/", response_model=List[Annotation])
-def read_annotations_by_content_endpoint(
-    content_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+async def read_annotations_by_content_endpoint(
+    content_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    annotations = get_annotations_by_content(
-        db, content_id=content_id, skip=skip, limit=limit
-    )
+    try:
+        annotations = await get_annotations_by_content_async(
+            db, content_id=content_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, annotations, limit)
     return annotations
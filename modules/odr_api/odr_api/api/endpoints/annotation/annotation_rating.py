@@ -15,7 +15,7 @@ from odr_core.schemas.annotation import (
     AnnotationRatingUpdate,
     AnnotationRating,
 )
-from odr_core.database import get_db
+from odr_core.database import get_db, get_read_db
 
 
 router = APIRouter(tags=["annotation_rating"])
@@ -32,7 +32,7 @@ def create_annotation_rating_endpoint(
 
 
 @router.get("/annotation_ratings/{rating_id}", response_model=AnnotationRating)
-def read_annotation_rating_endpoint(rating_id: int, db: Session = Depends(get_db)):
+def read_annotation_rating_endpoint(rating_id: int, db: Session = Depends(get_read_db)):
     db_annotation_rating = get_annotation_rating(db, rating_id=rating_id)
     if db_annotation_rating is None:
         raise HTTPException(status_code=404, detail="Annotation rating not found")
@@ -43,7 +43,7 @@ def read_annotation_rating_endpoint(rating_id: int, db: Session = Depends(get_db
     "/annotations/{annotation_id}/ratings", response_model=List[AnnotationRating]
 )
 def read_annotation_ratings_by_annotation_endpoint(
-    annotation_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    annotation_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)
 ):
     annotation_ratings = get_annotation_ratings_by_annotation(
         db, annotation_id=annotation_id, skip=skip, limit=limit
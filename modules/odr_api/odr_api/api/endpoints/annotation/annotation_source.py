@@ -15,7 +15,7 @@ from odr_core.schemas.annotation import (
     AnnotationSourceUpdate,
     AnnotationSource,
 )
-from odr_core.database import get_db
+from odr_core.database import get_db, get_read_db
 
 
 router = APIRouter(tags=["annotation_source"])
@@ -35,7 +35,7 @@ def create_annotation_source_endpoint(
     "/annotation_sources/{annotation_source_id}", response_model=AnnotationSource
 )
 def read_annotation_source_endpoint(
-    annotation_source_id: int, db: Session = Depends(get_db)
+    annotation_source_id: int, db: Session = Depends(get_read_db)
 ):
     db_annotation_source = get_annotation_source(
         db, annotation_source_id=annotation_source_id
@@ -47,7 +47,7 @@ def read_annotation_source_endpoint(
 
 @router.get("/annotation_sources/", response_model=List[AnnotationSource])
 def read_annotation_sources_endpoint(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)
 ):
     annotation_sources = get_annotation_sources(db, skip=skip, limit=limit)
     return annotation_sources
@@ -1,18 +1,31 @@
 # SPDX-License-Identifier: Apache-2.0
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 from odr_core.crud import content as content_crud
+from odr_core.crud.pagination import set_next_cursor_header
+from odr_core.crud.duplicate import assign_duplicate_clusters, get_content_duplicates
+from odr_core.crud.perceptual_hash import search_perceptual_hash
 from odr_core.schemas.content import (
     Content,
+    ContentBulkCreate,
+    ContentBulkResult,
     ContentCreate,
     ContentUpdate,
     ContentSource,
     ContentSourceCreate,
     ContentSourceUpdate,
 )
-from odr_core.database import get_db
+from odr_core.schemas.duplicate import (
+    ContentDuplicates,
+    DuplicateClusterAssign,
+    DuplicateClusterAssignResult,
+    PerceptualHashSearchHit,
+)
+from odr_core.enums import PerceptualHashType
+from odr_core.database import get_async_read_db, get_db, get_read_db
 
 
 router = APIRouter(tags=["content"])
@@ -37,17 +50,39 @@ def create_content(
         raise HTTPException(status_code=500, detail="An unexpected error occurred.")
 
 
+@router.post("/content/bulk", response_model=ContentBulkResult)
+def create_contents_bulk(
+    contents: ContentBulkCreate,
+    from_user_id: int,
+    db: Session = Depends(get_db)
+):
+    try:
+        return content_crud.create_contents_bulk(db=db, contents=contents.contents, from_user_id=from_user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.get("/content/{content_id}", response_model=Content)
-def read_content(content_id: int, db: Session = Depends(get_db)):
-    db_content = content_crud.get_content(db, content_id=content_id)
+async def read_content(content_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_content = await content_crud.get_content_async(db, content_id=content_id)
     if db_content is None:
         raise HTTPException(status_code=404, detail="Content not found")
     return db_content
 
 
 @router.get("/content/", response_model=List[Content])
-def read_contents(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    contents = content_crud.get_contents(db, skip=skip, limit=limit)
+async def read_contents(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    try:
+        contents = await content_crud.get_contents_async(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, contents, limit)
     return contents
 
 
@@ -75,8 +110,8 @@ def delete_content(
 
 
 @router.get("/content/hash/{hash}", response_model=Content)
-def get_content_by_hash(hash: str, db: Session = Depends(get_db)):
-    db_content = content_crud.get_content_by_hash(db, hash=hash)
+async def get_content_by_hash(hash: str, db: AsyncSession = Depends(get_async_read_db)):
+    db_content = await content_crud.get_content_by_hash_async(db, hash=hash)
     if db_content is None:
         raise HTTPException(status_code=404, detail="Content not found")
     return db_content
@@ -84,11 +119,20 @@ def get_content_by_hash(hash: str, db: Session = Depends(get_db)):
 
 @router.get("/users/{user_id}/content", response_model=List[Content])
 def get_contents_by_user(
-    user_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    user_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
 ):
-    contents = content_crud.get_contents_by_user(
-        db, user_id=user_id, skip=skip, limit=limit
-    )
+    try:
+        contents = content_crud.get_contents_by_user(
+            db, user_id=user_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, contents, limit)
     if not contents:
         raise HTTPException(status_code=404, detail="User not found or has no content")
     return contents
@@ -96,16 +140,66 @@ def get_contents_by_user(
 
 @router.get("/teams/{team_id}/content", response_model=List[Content])
 def get_contents_by_team(
-    team_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    team_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
 ):
-    contents = content_crud.get_contents_by_team(
-        db, team_id=team_id, skip=skip, limit=limit
-    )
+    try:
+        contents = content_crud.get_contents_by_team(
+            db, team_id=team_id, skip=skip, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, contents, limit)
     if not contents:
         raise HTTPException(status_code=404, detail="Team not found or has no content")
     return contents
 
 
+# near-duplicate endpoints
+
+
+@router.post("/content/duplicates/assign", response_model=DuplicateClusterAssignResult)
+def assign_content_duplicates(
+    assign: DuplicateClusterAssign,
+    db: Session = Depends(get_db)
+):
+    try:
+        return assign_duplicate_clusters(
+            db, assign.embedding_engine_id, assign.content_ids, assign.max_contents
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/content/{content_id}/duplicates", response_model=ContentDuplicates)
+def read_content_duplicates(
+    content_id: int,
+    embedding_engine_id: int,
+    db: Session = Depends(get_read_db)
+):
+    duplicates = get_content_duplicates(db, content_id=content_id, embedding_engine_id=embedding_engine_id)
+    if duplicates is None:
+        raise HTTPException(status_code=404, detail="Content has no duplicate cluster for this engine")
+    return duplicates
+
+
+@router.get("/content/perceptual-hash/{hash}", response_model=List[PerceptualHashSearchHit])
+def search_content_by_perceptual_hash(
+    hash: str,
+    hash_type: PerceptualHashType = PerceptualHashType.PHASH,
+    max_distance: Optional[int] = Query(default=None, ge=0, le=32),
+    db: Session = Depends(get_read_db)
+):
+    try:
+        return search_perceptual_hash(db, hash, hash_type, max_distance)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # content source endpoints
 
 
@@ -124,7 +218,7 @@ def create_content_source(
 
 
 @router.get("/content/{content_id}/sources/", response_model=List[ContentSource])
-def read_content_sources(content_id: int, db: Session = Depends(get_db)):
+def read_content_sources(content_id: int, db: Session = Depends(get_read_db)):
     db_content = content_crud.get_content(db, content_id=content_id)
     if db_content is None:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -132,7 +226,7 @@ def read_content_sources(content_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/content/sources/{source_id}", response_model=ContentSource)
-def read_content_source(source_id: int, db: Session = Depends(get_db)):
+def read_content_source(source_id: int, db: Session = Depends(get_read_db)):
     db_source = content_crud.get_content_source(db, source_id=source_id)
     if db_source is None:
         raise HTTPException(status_code=404, detail="Content source not found")
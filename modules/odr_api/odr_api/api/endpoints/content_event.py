@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from odr_core.crud import content_event as content_event_crud
+from odr_core.crud.unit_of_work import unit_of_work
 from odr_core.schemas.content import ContentEvent, ContentEventCreate, ContentEventUpdate
 from odr_core.database import get_db
 from odr_core.models.content import ContentStatus
@@ -50,9 +51,11 @@ def update_content_event(
     event: ContentEventUpdate,
     db: Session = Depends(get_db)
 ):
-    db_event = content_event_crud.update_content_event(db, event_id=event_id, event=event)
-    if db_event is None or db_event.content_id != content_id:
-        raise HTTPException(status_code=404, detail="Content event not found")
+    # an event of another content is not updated, raising rolls the update back
+    with unit_of_work(db):
+        db_event = content_event_crud.update_content_event(db, event_id=event_id, event=event)
+        if db_event is None or db_event.content_id != content_id:
+            raise HTTPException(status_code=404, detail="Content event not found")
     return db_event
 
 
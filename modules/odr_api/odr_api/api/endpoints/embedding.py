@@ -1,7 +1,12 @@
 # SPDX-License-Identifier: Apache-2.0
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Set
+
+from odr_core.config import settings
+from odr_core.crud.pagination import set_next_cursor_header
 
 from odr_core.utils import pil_image_from_base64, download_image_from_url
 
@@ -20,8 +25,24 @@ from odr_core.schemas.embedding import (
     ImageEmbeddingGenerate,
     EmbeddingTextQuery,
     EmbeddingVectorQuery,
+    EmbeddingSearchQuery,
+    ContentEmbeddingSearchQuery,
+    ContentEmbeddingSearchHit,
+    ContentEmbeddingBatchSearchQuery,
+    ContentEmbeddingBatchSearchResult,
+    AnnotationEmbeddingSearchHit,
+    EmbeddingIndex,
+    EmbeddingIndexCreate,
+    EmbeddingModelCacheStats,
+    EmbeddingBatcherStats,
+    QueryEmbeddingCacheStats,
+    ContentEmbeddingBatchGenerate,
+    ContentEmbeddingBatchResult,
+    AnnotationEmbeddingBatchGenerate,
+    AnnotationEmbeddingBatchResult,
 )
 from odr_core.schemas.content import ContentType
+from odr_core.enums import DistanceMetric
 
 from odr_core.crud.embedding import (
     create_embedding_engine,
@@ -31,6 +52,10 @@ from odr_core.crud.embedding import (
     delete_embedding_engine,
     generate_image_embedding,
     generate_text_embedding,
+    generate_text_embeddings,
+    generate_content_embeddings,
+    generate_annotation_embeddings,
+    annotation_text,
     create_annotation_embedding,
     get_annotation_embedding,
     get_annotation_embeddings,
@@ -42,17 +67,51 @@ from odr_core.crud.embedding import (
     update_content_embedding,
     delete_content_embedding,
     query_annotation_embedding,
-    query_content_embedding,
+    query_content_embedding_async,
+    embedding_model_cache,
+    embedding_batcher,
+    query_embedding_cache,
+)
+from odr_core.crud.embedding_index import (
+    create_embedding_index,
+    get_embedding_indexes,
+    delete_embedding_index,
+)
+from odr_core.crud.embedding_search import (
+    batch_search_content_embeddings,
+    search_annotation_embeddings,
+    search_content_embeddings,
 )
 from odr_core.crud.content import get_content
+from odr_core.crud.duplicate import MissingCosineIndexError, assign_duplicate_clusters
 from odr_core.crud.annotation import get_annotation
 
-from odr_core.database import get_db
+from odr_core.database import get_async_read_db, get_db, get_read_db
 
 
 router = APIRouter(tags=["embedding"])
 
 
+# engines already reported as lacking the cosine index, warned about once per worker
+_engines_without_cosine_index: Set[int] = set()
+
+
+def assign_duplicates(db: Session, embedding_engine_id: int, content_ids: List[int]):
+    # clustering is best effort, a failed probe must not fail the stored embedding
+    if not settings.CONTENT_DUPLICATE_DETECTION or not content_ids:
+        return
+    try:
+        assign_duplicate_clusters(db, embedding_engine_id, content_ids, max_contents=len(content_ids))
+    except MissingCosineIndexError as e:
+        db.rollback()
+        if embedding_engine_id not in _engines_without_cosine_index:
+            _engines_without_cosine_index.add(embedding_engine_id)
+            logger.warning(f"Skipping duplicate clusters: {e}")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not assign duplicate clusters for contents {content_ids}: {e}")
+
+
 @router.post("/embedding/engines/", response_model=EmbeddingEngine)
 def create_embedding_engine_endpoint(
     embedding_engine: EmbeddingEngineCreate,
@@ -63,7 +122,7 @@ def create_embedding_engine_endpoint(
 
 @router.get("/embedding/engines/{embedding_engine_id}", response_model=EmbeddingEngine)
 def read_embedding_engine_endpoint(
-    embedding_engine_id: int, db: Session = Depends(get_db)
+    embedding_engine_id: int, db: Session = Depends(get_read_db)
 ):
     db_embedding_engine = get_embedding_engine(
         db, embedding_engine_id=embedding_engine_id
@@ -75,7 +134,7 @@ def read_embedding_engine_endpoint(
 
 @router.get("/embedding/engines/", response_model=List[EmbeddingEngine])
 def read_embedding_engines_endpoint(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)
 ):
     embedding_engines = get_embedding_engines(db, skip=skip, limit=limit)
     return embedding_engines
@@ -108,6 +167,62 @@ def delete_embedding_engine_endpoint(
     return success
 
 
+@router.post(
+    "/embedding/engines/{embedding_engine_id}/indexes", response_model=EmbeddingIndex
+)
+def create_embedding_index_endpoint(
+    embedding_engine_id: int,
+    index: EmbeddingIndexCreate,
+    db: Session = Depends(get_db)
+):
+    if get_embedding_engine(db, embedding_engine_id=embedding_engine_id) is None:
+        raise HTTPException(status_code=404, detail="Embedding Engine not found")
+    try:
+        return create_embedding_index(db, embedding_engine_id, index)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/embedding/engines/{embedding_engine_id}/indexes",
+    response_model=List[EmbeddingIndex],
+)
+def read_embedding_indexes_endpoint(
+    embedding_engine_id: int, db: Session = Depends(get_read_db)
+):
+    return get_embedding_indexes(db, embedding_engine_id=embedding_engine_id)
+
+
+@router.delete(
+    "/embedding/engines/{embedding_engine_id}/indexes/{index_name}",
+    response_model=bool,
+)
+def delete_embedding_index_endpoint(
+    embedding_engine_id: int,
+    index_name: str,
+    db: Session = Depends(get_db)
+):
+    success = delete_embedding_index(db, embedding_engine_id, index_name)
+    if not success:
+        raise HTTPException(status_code=404, detail="Embedding Index not found")
+    return success
+
+
+@router.get("/embedding/models/cache", response_model=EmbeddingModelCacheStats)
+def get_embedding_model_cache_stats_endpoint():
+    return embedding_model_cache.stats()
+
+
+@router.get("/embedding/models/batches", response_model=EmbeddingBatcherStats)
+def get_embedding_batcher_stats_endpoint():
+    return embedding_batcher.stats()
+
+
+@router.get("/embedding/models/queries", response_model=QueryEmbeddingCacheStats)
+def get_query_embedding_cache_stats_endpoint():
+    return query_embedding_cache.stats()
+
+
 @router.post("/embedding/generate/image", response_model=List[float])
 def generate_image_embedding_endpoint(
     embedding: ImageEmbeddingGenerate,
@@ -132,6 +247,24 @@ def generate_text_embedding_endpoint(
     )
 
 
+# declared before /embedding/generate/annotation/{annotation_id} so "batch" is not taken as an id
+@router.post(
+    "/embedding/generate/annotation/batch", response_model=AnnotationEmbeddingBatchResult
+)
+def generate_embeddings_for_annotations_endpoint(
+    batch: AnnotationEmbeddingBatchGenerate,
+    db: Session = Depends(get_db)
+):
+    engine = get_embedding_engine(db, embedding_engine_id=batch.embedding_engine_id)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Embedding Engine not found")
+
+    try:
+        return generate_annotation_embeddings(db=db, batch=batch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post(
     "/embedding/generate/annotation/{annotation_id}", response_model=AnnotationEmbedding
 )
@@ -147,9 +280,9 @@ def generate_embedding_for_annotation_endpoint(
         raise HTTPException(status_code=404, detail="Annotation not found")
 
     try:
-        annotation_embedding = generate_text_embedding(
-            db, annotation.annotation, engine_id
-        )
+        annotation_embedding = generate_text_embeddings(
+            db, [annotation_text(annotation.annotation)], engine_id
+        )[0]
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -161,7 +294,33 @@ def generate_embedding_for_annotation_endpoint(
         from_team_id=team_id,
     )
 
-    return create_annotation_embedding(db=db, annotation_embedding=annotation)
+    try:
+        return create_annotation_embedding(db=db, annotation_embedding=annotation)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# declared before /embedding/generate/content/{content_id} so "batch" is not taken as an id
+@router.post(
+    "/embedding/generate/content/batch", response_model=ContentEmbeddingBatchResult
+)
+def generate_embeddings_for_contents_endpoint(
+    batch: ContentEmbeddingBatchGenerate,
+    db: Session = Depends(get_db)
+):
+    engine = get_embedding_engine(db, embedding_engine_id=batch.embedding_engine_id)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Embedding Engine not found")
+
+    try:
+        result = generate_content_embeddings(db=db, batch=batch)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    assign_duplicates(
+        db, batch.embedding_engine_id, [item.content_id for item in result.items if item.content_embedding_id]
+    )
+    return result
 
 
 @router.post(
@@ -210,7 +369,13 @@ def generate_embedding_for_content_endpoint(
         from_team_id=team_id,
     )
 
-    return create_content_embedding(db=db, content_embedding=content_embedding)
+    try:
+        db_content_embedding = create_content_embedding(db=db, content_embedding=content_embedding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    assign_duplicates(db, content_embedding.embedding_engine_id, [content_embedding.content_id])
+    return db_content_embedding
 
 
 @router.post("/embedding/annotation/", response_model=AnnotationEmbedding)
@@ -218,7 +383,10 @@ def create_annotation_embedding_endpoint(
     annotation_embedding: AnnotationEmbeddingCreate,
     db: Session = Depends(get_db)
 ):
-    return create_annotation_embedding(db=db, annotation_embedding=annotation_embedding)
+    try:
+        return create_annotation_embedding(db=db, annotation_embedding=annotation_embedding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get(
@@ -226,7 +394,7 @@ def create_annotation_embedding_endpoint(
     response_model=AnnotationEmbedding,
 )
 def read_annotation_embedding_endpoint(
-    annotation_embedding_id: int, db: Session = Depends(get_db)
+    annotation_embedding_id: int, db: Session = Depends(get_read_db)
 ):
     db_annotation_embedding = get_annotation_embedding(
         db, annotation_embedding_id=annotation_embedding_id
@@ -238,9 +406,18 @@ def read_annotation_embedding_endpoint(
 
 @router.get("/embedding/annotation/", response_model=List[AnnotationEmbedding])
 def read_annotation_embeddings_endpoint(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
 ):
-    return get_annotation_embeddings(db, skip=skip, limit=limit)
+    try:
+        embeddings = get_annotation_embeddings(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, embeddings, limit)
+    return embeddings
 
 
 # query for annotations embeddings by vector
@@ -249,7 +426,7 @@ def read_annotation_embeddings_endpoint(
 )
 def query_annotation_embedding_endpoint(
     query: EmbeddingVectorQuery,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
 ):
@@ -263,9 +440,12 @@ def query_annotation_embedding_endpoint(
 def query_annotation_embedding_text_endpoint(
     engine_id: int,
     text: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    metric: DistanceMetric = DistanceMetric.L2,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
 ):
     engine = get_embedding_engine(db, embedding_engine_id=engine_id)
     if engine is None:
@@ -285,7 +465,13 @@ def query_annotation_embedding_text_endpoint(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    query = EmbeddingVectorQuery(embedding=embedding, embedding_engine_id=engine_id)
+    query = EmbeddingVectorQuery(
+        embedding=embedding,
+        embedding_engine_id=engine_id,
+        metric=metric,
+        ef_search=ef_search,
+        probes=probes,
+    )
 
     try:
         return query_annotation_embedding(db, query, skip, limit)
@@ -293,6 +479,54 @@ def query_annotation_embedding_text_endpoint(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post(
+    "/embedding/annotation/search", response_model=List[AnnotationEmbeddingSearchHit]
+)
+def search_annotation_embeddings_endpoint(
+    query: EmbeddingSearchQuery,
+    db: Session = Depends(get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+):
+    try:
+        return search_annotation_embeddings(db, query, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get(
+    "/embedding/annotation/search/text", response_model=List[AnnotationEmbeddingSearchHit]
+)
+def search_annotation_embeddings_text_endpoint(
+    engine_id: int,
+    text: str,
+    db: Session = Depends(get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    metric: DistanceMetric = DistanceMetric.L2,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    include_embedding: bool = False,
+    include_fields: bool = False,
+):
+    if get_embedding_engine(db, embedding_engine_id=engine_id) is None:
+        raise HTTPException(status_code=404, detail="Embedding Engine not found")
+
+    try:
+        query = EmbeddingSearchQuery(
+            embedding=generate_text_embedding(db, text, engine_id),
+            embedding_engine_id=engine_id,
+            metric=metric,
+            ef_search=ef_search,
+            probes=probes,
+            include_embedding=include_embedding,
+            include_fields=include_fields,
+        )
+        return search_annotation_embeddings(db, query, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.put(
     "/embedding/annotation/{annotation_embedding_id}",
     response_model=AnnotationEmbedding,
@@ -330,14 +564,20 @@ def create_content_embedding_endpoint(
     content_embedding: ContentEmbeddingCreate,
     db: Session = Depends(get_db)
 ):
-    return create_content_embedding(db=db, content_embedding=content_embedding)
+    try:
+        db_content_embedding = create_content_embedding(db=db, content_embedding=content_embedding)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    assign_duplicates(db, content_embedding.embedding_engine_id, [content_embedding.content_id])
+    return db_content_embedding
 
 
 @router.get(
     "/embedding/content/{content_embedding_id}", response_model=ContentEmbedding
 )
 def read_content_embedding_endpoint(
-    content_embedding_id: int, db: Session = Depends(get_db)
+    content_embedding_id: int, db: Session = Depends(get_read_db)
 ):
     db_content_embedding = get_content_embedding(
         db, content_embedding_id=content_embedding_id
@@ -349,22 +589,59 @@ def read_content_embedding_endpoint(
 
 @router.get("/embedding/content/", response_model=List[ContentEmbedding])
 def read_content_embeddings_endpoint(
-    skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
 ):
-    return get_content_embeddings(db, skip=skip, limit=limit)
+    try:
+        embeddings = get_content_embeddings(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor_header(response.headers, embeddings, limit)
+    return embeddings
 
 
 # query for content embeddings by vector
 @router.post(
     "/embedding/content/query/embedding", response_model=List[ContentEmbedding]
 )
-def query_content_embedding_endpoint(
+async def query_content_embedding_endpoint(
     query: EmbeddingVectorQuery,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 100,
+):
+    return await query_content_embedding_async(db, query, skip, limit)
+
+
+@router.post(
+    "/embedding/content/search", response_model=List[ContentEmbeddingSearchHit]
+)
+def search_content_embeddings_endpoint(
+    query: ContentEmbeddingSearchQuery,
+    db: Session = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
 ):
-    return query_content_embedding(db, query, skip, limit)
+    try:
+        return search_content_embeddings(db, query, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/embedding/content/search/batch",
+    response_model=List[ContentEmbeddingBatchSearchResult],
+)
+def batch_search_content_embeddings_endpoint(
+    query: ContentEmbeddingBatchSearchQuery, db: Session = Depends(get_read_db)
+):
+    try:
+        return batch_search_content_embeddings(db, query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.put(
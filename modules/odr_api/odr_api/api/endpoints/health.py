@@ -1,21 +1,86 @@
 # SPDX-License-Identifier: Apache-2.0
-from fastapi import APIRouter, status
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Response, status
 from pydantic import BaseModel
 
+from odr_api.warmup import WarmupState, model_warmup
+from odr_core.database import async_engine, async_read_engines, engine, pool_stats, read_engines
+from odr_core.schemas.embedding import HistogramSnapshot
+
 
 router = APIRouter(tags=["health"])
 
 
+class ModelWarmupStatus(BaseModel):
+    state: WarmupState
+    loaded: List[str] = []
+    failed: Dict[str, str] = {}
+
+
+class DatabasePoolStats(BaseModel):
+    pooled: bool
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    saturation: Optional[float] = None
+    timeouts: Optional[int] = None
+    checkout_wait_ms: Optional[HistogramSnapshot] = None
+
+
+class DatabasePools(BaseModel):
+    sync: DatabasePoolStats
+    asynchronous: DatabasePoolStats
+    replicas: List[DatabasePoolStats] = []
+    async_replicas: List[DatabasePoolStats] = []
+
+
 class HealthCheck(BaseModel):
     status: str = "OK"
+    models: ModelWarmupStatus
 
 
 @router.get("/health", response_model=HealthCheck, status_code=status.HTTP_200_OK)
-def get_health():
+def get_health(response: Response):
     """
     Perform a health check on the API.
 
+    The API reports 503 until the embedding models have been warmed up, so a
+    load balancer only routes traffic to workers with a warm model cache. A
+    warmup that loaded none of the models stays 503, one where only some of
+    them failed reports DEGRADED.
+
     Returns:
-        HealthCheck: A model containing the status of the API.
+        HealthCheck: A model containing the status of the API and the model warmup.
+    """
+    models = ModelWarmupStatus(
+        state=model_warmup.state,
+        loaded=list(model_warmup.loaded),
+        failed=dict(model_warmup.failed),
+    )
+    if model_warmup.warming:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthCheck(status="WARMING", models=models)
+    if not model_warmup.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return HealthCheck(status="FAILED", models=models)
+    if model_warmup.state == WarmupState.DEGRADED:
+        return HealthCheck(status="DEGRADED", models=models)
+    return HealthCheck(status="OK", models=models)
+
+
+@router.get("/health/database", response_model=DatabasePools)
+def get_database_pool_stats():
+    """
+    Connection pools of this worker, for sync and async endpoints and every
+    read replica: connections in use, saturation (connections in use over pool
+    size plus overflow), checkout timeouts and how long checkouts waited for a
+    connection.
     """
-    return HealthCheck(status="OK")
+    return DatabasePools(
+        sync=pool_stats(engine.pool),
+        asynchronous=pool_stats(async_engine.pool),
+        replicas=[pool_stats(read_engine.pool) for read_engine in read_engines],
+        async_replicas=[pool_stats(read_engine.pool) for read_engine in async_read_engines],
+    )
@@ -4,7 +4,8 @@ import numpy as np
 import torchvision.transforms as transforms
 import rawpy
 from exif import Image as ExifImage
-from fastapi import APIRouter, File, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict
 from io import BytesIO
 from PIL import Image, UnidentifiedImageError
@@ -18,9 +19,46 @@ import json
 import subprocess
 import tempfile
 import os
+import hashlib
+from odr_core.crud.content import get_content_by_hash_async
+from odr_core.database import get_async_db
+from odr_core.perceptual_hash import dhash, hash_to_hex, phash
+from odr_core.schemas.duplicate import PerceptualHashes
 
 router = APIRouter(tags=["image"])
 
+CONTENT_HASH_HEADER = "X-Content-SHA256"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+async def sha256_upload(file: UploadFile) -> str:
+    # hash the spooled upload chunk by chunk and rewind it, so the handler
+    # reads it once and the whole file is never held twice
+    digest = hashlib.sha256()
+    while chunk := await file.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+async def check_duplicate_upload(file: UploadFile, response: Response, db: AsyncSession) -> str:
+    """
+    SHA-256 of the upload, returned in the X-Content-SHA256 header. Uploads of
+    stored content are answered with 409 and the existing content id before
+    any exiftool or rawpy processing. Looked up on the primary, a replica may
+    not have the content of an upload made moments before yet.
+    """
+    content_hash = await sha256_upload(file)
+    existing = await get_content_by_hash_async(db, content_hash)
+    if existing is not None:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Content already exists", "content_id": existing.id, "hash": content_hash},
+            headers={CONTENT_HASH_HEADER: content_hash},
+        )
+    response.headers[CONTENT_HASH_HEADER] = content_hash
+    return content_hash
+
 
 # Helper functions for HDR stats
 def calculate_kurtosis(tensor: torch.Tensor):
@@ -125,6 +163,17 @@ def convert_dng_to_jpg(dng_bytes: bytes) -> bytes:
         return jpg_bytes.getvalue()
 
 
+def load_image(image_bytes: bytes) -> Image.Image:
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        image.load()
+        return image
+    except UnidentifiedImageError:
+        # raw formats like DNG are developed the same way as the jpg preview
+        with rawpy.imread(BytesIO(image_bytes)) as raw:
+            return Image.fromarray(raw.postprocess())
+
+
 # Endpoint for calculating HDR stats
 @router.post("/image/hdr-stats", response_model=Dict[str, float])
 async def calculate_hdr_stats(file: UploadFile = File(...)):
@@ -157,6 +206,16 @@ async def calculate_hdr_stats(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/image/hashes", response_model=PerceptualHashes)
+async def calculate_perceptual_hashes(file: UploadFile = File(...)):
+    try:
+        contents = await file.read()
+        image = load_image(contents)
+        return PerceptualHashes(phash=hash_to_hex(phash(image)), dhash=hash_to_hex(dhash(image)))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/image/jpg-preview")
 async def create_jpg_preview(file: UploadFile = File(...)):
     try:
@@ -253,7 +312,13 @@ def remove_metadata_with_exiftool(input_bytes):
 
 
 @router.post("/image/clean-metadata")
-async def clean_image_metadata(file: UploadFile = File(...)):
+async def clean_image_metadata(
+    response: Response,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # the one duplicate check of an upload, the other endpoints are pure utilities
+    await check_duplicate_upload(file, response, db)
     try:
         contents = await file.read()
 
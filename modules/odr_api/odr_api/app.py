@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: Apache-2.0
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from odr_api.api.endpoints import (
     content_router,
@@ -9,10 +10,31 @@ from odr_api.api.endpoints import (
     image_router,
     hugging_face_router
 )
+from odr_api.warmup import model_warmup
 from odr_core.config import settings
+from odr_core.read_replicas import (
+    LAST_WRITE_COOKIE,
+    LAST_WRITE_HEADER,
+    parse_last_write,
+    request_writes,
+    reset_request_writes,
+    track_request_writes,
+)
 import uvicorn
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # every uvicorn worker warms its own model cache and /health reports when it is done,
+    # with a shared embedding server the models live in that process instead
+    if settings.EMBEDDING_PREWARM and not settings.EMBEDDING_SERVER_SOCKET:
+        model_warmup.start()
+    else:
+        model_warmup.disable()
+    yield
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 # Allow CORS
 app.add_middleware(
     CORSMiddleware,
@@ -23,6 +45,23 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # a client that wrote recently reads from the primary until the replicas caught up
+    last_write = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    token = track_request_writes(parse_last_write(last_write))
+    try:
+        response = await call_next(request)
+        writes = request_writes()
+    finally:
+        reset_request_writes(token)
+    if writes.wrote:
+        window = settings.POSTGRES_READ_YOUR_WRITES_SECONDS
+        response.headers[LAST_WRITE_HEADER] = str(writes.last_write)
+        response.set_cookie(LAST_WRITE_COOKIE, str(writes.last_write), max_age=max(int(window), 1))
+    return response
+
+
 @app.get("/")
 def read_root():
     return {"message": "Hello, World!"}
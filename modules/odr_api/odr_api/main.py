@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: Apache-2.0
 import argparse
+import subprocess
+import sys
 from loguru import logger
 
 if __name__ == "__main__":
@@ -13,7 +15,26 @@ if __name__ == "__main__":
 
     if args.dev:
         logger.info("Running in development mode with hot reloading")
-        uvicorn.run("odr_api.api.app:app", host="0.0.0.0", port=31100, reload=True)
+        uvicorn.run("odr_api.app:app", host="0.0.0.0", port=31100, reload=True)
     else:
-        logger.info("Running in production mode with 4 workers")
-        uvicorn.run("odr_api.api.app:app", host="0.0.0.0", port=31100, workers=8)
+        from odr_core.config import settings
+        from odr_core.embedding_server import wait_for_embedding_server
+
+        embedding_server = None
+        # a server run as a separate service already listens on the socket
+        if settings.EMBEDDING_SERVER_SOCKET and not wait_for_embedding_server(settings.EMBEDDING_SERVER_SOCKET, 0):
+            # one process owns the embedding models and batches requests from all workers
+            logger.info(f"Starting embedding server on {settings.EMBEDDING_SERVER_SOCKET}")
+            embedding_server = subprocess.Popen(
+                [sys.executable, "-m", "odr_core.embedding_server", "--socket", settings.EMBEDDING_SERVER_SOCKET]
+            )
+            # the workers embed in process until the server listens
+            if not wait_for_embedding_server(settings.EMBEDDING_SERVER_SOCKET):
+                logger.warning("Embedding server is not ready, starting the workers anyway")
+
+        logger.info("Running in production mode with 8 workers")
+        try:
+            uvicorn.run("odr_api.app:app", host="0.0.0.0", port=31100, workers=8)
+        finally:
+            if embedding_server is not None:
+                embedding_server.terminate()
@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: Apache-2.0
+from enum import Enum
+from threading import Thread
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from odr_core.crud.embedding import get_supported_embedding_engines, load_embedding_model
+from odr_core.database import SessionLocal
+
+
+class WarmupState(str, Enum):
+    DISABLED = "disabled"
+    PENDING = "pending"
+    WARMING = "warming"
+    READY = "ready"
+    # some models failed to load, they are loaded again on first use
+    DEGRADED = "degraded"
+    FAILED = "failed"
+
+
+class ModelWarmup:
+    """
+    Loads the models of all supported embedding engines into the model cache
+    in a background thread, so the first requests of a worker don't pay for it.
+
+    A worker is ready once the warmup has finished with at least one model, or
+    with none to load. Models that failed to load are reported and loaded again
+    lazily on the first request that needs them. A warmup that loaded no model
+    at all has failed.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.state = WarmupState.PENDING
+        self.loaded: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self._thread: Optional[Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state in (WarmupState.DISABLED, WarmupState.READY, WarmupState.DEGRADED)
+
+    @property
+    def warming(self) -> bool:
+        return self.state in (WarmupState.PENDING, WarmupState.WARMING)
+
+    def disable(self):
+        self.state = WarmupState.DISABLED
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.state = WarmupState.WARMING
+        self._thread = Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self):
+        self.state = WarmupState.WARMING
+        db = self.session_factory()
+        try:
+            engines = get_supported_embedding_engines(db)
+        except Exception as e:
+            logger.error(f"Model warmup could not read embedding engines: {e}")
+            self.state = WarmupState.FAILED
+            return
+        finally:
+            # models load without the database, so don't hold a connection meanwhile
+            db.close()
+
+        for engine in engines:
+            try:
+                load_embedding_model(engine)
+                self.loaded.append(engine.name)
+                logger.info(f"Warmed up embedding model {engine.name}")
+            except Exception as e:
+                self.failed[engine.name] = str(e)
+                logger.error(f"Failed to warm up embedding model {engine.name}: {e}")
+
+        if not self.failed:
+            self.state = WarmupState.READY
+        elif self.loaded:
+            self.state = WarmupState.DEGRADED
+        else:
+            self.state = WarmupState.FAILED
+
+
+model_warmup = ModelWarmup()
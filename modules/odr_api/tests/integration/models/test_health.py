@@ -2,33 +2,45 @@
 import requests
 import argparse
 import sys
+import time
 
 
-def test_health_check(base_url):
+def test_health_check(base_url, timeout=300, interval=2):
     """
     Test the health check endpoint of the API.
 
     This test performs the following checks:
-    1. Sends a GET request to the '/health' endpoint.
-    2. Verifies that the response status code is 200 (OK).
+    1. Sends GET requests to the '/health' endpoint while it answers 503 because the models are warming up.
+    2. Verifies that the response status code is then 200 (OK).
     3. Confirms that the response body contains the expected JSON data.
 
     Args:
         base_url (str): The base URL of the API, including protocol, host, and port.
+        timeout (float): Seconds to wait for the model warmup.
+        interval (float): Seconds between two requests while the models are warming up.
 
     Raises:
         AssertionError: If any of the assertions fail, indicating a problem with the health check endpoint.
     """
     try:
-        # Send a GET request to the health endpoint
-        response = requests.get(f"{base_url}/health")
+        deadline = time.monotonic() + timeout
+        while True:
+            # Send a GET request to the health endpoint
+            response = requests.get(f"{base_url}/health")
+            if response.status_code != 503 or time.monotonic() >= deadline:
+                break
+            # 503 is only expected while the models are warming up
+            body = response.json()
+            assert body["status"] == "WARMING", f"Expected status WARMING with 503, but got {body}"
+            time.sleep(interval)
 
         # Check if the status code is 200 (OK)
         assert response.status_code == 200, f"Expected status code 200, but got {response.status_code}"
 
         # Verify the response body contains the expected data
-        expected_response = {"status": "OK"}
-        assert response.json() == expected_response, f"Expected response {expected_response}, but got {response.json()}"
+        body = response.json()
+        assert body["status"] in ("OK", "DEGRADED"), f"Expected status OK, but got {body}"
+        assert body["models"]["state"] in ("ready", "disabled", "degraded"), f"Unexpected model warmup state {body}"
 
         # If all assertions pass, the test is successful
         print("Health check test passed successfully")
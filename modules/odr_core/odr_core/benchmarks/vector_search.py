@@ -0,0 +1,232 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Recall vs latency benchmark for the per-engine vector indexes.
+
+Samples stored embeddings of one engine as queries, computes the exact top-k
+with index scans disabled and compares it with the ANN results for every
+ef_search / probes value given on the command line. The metric must match the
+operator class of the index being measured. With --storage halfvec or bit the
+searches go through the quantized index and re-rank the candidates on the
+float32 vectors, and the size of every index of the engine is reported.
+
+    python -m odr_core.benchmarks.vector_search --engine-id 1 --target content --ef-search 40 100 200
+    python -m odr_core.benchmarks.vector_search --engine-id 1 --storage vector halfvec bit --rerank-factor 4
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from odr_core.crud.embedding_index import (
+    DISTANCE_OPERATORS,
+    EMBEDDING_TABLES,
+    HAMMING_OPERATOR,
+    apply_search_parameters,
+    get_engine_dimension,
+    get_embedding_indexes,
+    storage_expression,
+)
+from odr_core.database import SessionLocal
+from odr_core.enums import DistanceMetric, EmbeddingTarget, VectorStorage
+
+
+def sample_query_vectors(db: Session, table: str, embedding_engine_id: int, count: int) -> List[str]:
+    rows = db.execute(
+        text(
+            f"SELECT embedding::text FROM {table} "
+            "WHERE embedding_engine_id = :engine_id ORDER BY random() LIMIT :count"
+        ),
+        {"engine_id": embedding_engine_id, "count": count},
+    ).all()
+    return [row[0] for row in rows]
+
+
+def coarse_order(storage: VectorStorage, dimension: int, metric: DistanceMetric) -> str:
+    expression = storage_expression(storage, dimension)
+    if storage == VectorStorage.BINARY:
+        return f"{expression} {HAMMING_OPERATOR} binary_quantize(CAST(:vector AS vector))::bit({dimension})"
+    operator, _ = DISTANCE_OPERATORS[metric]
+    if storage == VectorStorage.HALF:
+        return f"{expression} {operator} CAST(:vector AS halfvec({dimension}))"
+    return f"{expression} {operator} CAST(:vector AS vector)"
+
+
+def search(
+    db: Session,
+    table: str,
+    embedding_engine_id: int,
+    vector: str,
+    k: int,
+    metric: DistanceMetric,
+    dimension: int,
+    storage: VectorStorage = VectorStorage.FULL,
+    candidates: int = 0,
+) -> List[int]:
+    operator, _ = DISTANCE_OPERATORS[metric]
+    where = f"FROM {table} WHERE embedding_engine_id = :engine_id"
+    if storage == VectorStorage.FULL:
+        statement = f"SELECT id {where} ORDER BY {coarse_order(storage, dimension, metric)} LIMIT :k"
+    else:
+        statement = (
+            f"SELECT id FROM (SELECT id, embedding {where} "
+            f"ORDER BY {coarse_order(storage, dimension, metric)} LIMIT :candidates) candidates "
+            f"ORDER BY embedding {operator} CAST(:vector AS vector) LIMIT :k"
+        )
+    rows = db.execute(
+        text(statement),
+        {"engine_id": embedding_engine_id, "vector": vector, "k": k, "candidates": candidates},
+    ).all()
+    return [row[0] for row in rows]
+
+
+def run_searches(
+    db: Session,
+    table: str,
+    embedding_engine_id: int,
+    vectors: List[str],
+    k: int,
+    metric: DistanceMetric,
+    dimension: int,
+    exact: bool = False,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    storage: VectorStorage = VectorStorage.FULL,
+    rerank_factor: int = 1,
+):
+    results, latencies = [], []
+    candidates = k * rerank_factor
+    # every setting is transaction local, so each run starts from a clean state
+    db.rollback()
+    if exact:
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+    else:
+        apply_search_parameters(db, ef_search=ef_search, probes=probes, limit=candidates)
+
+    for vector in vectors:
+        start = time.perf_counter()
+        results.append(search(db, table, embedding_engine_id, vector, k, metric, dimension, storage, candidates))
+        latencies.append((time.perf_counter() - start) * 1000)
+    db.rollback()
+    return results, latencies
+
+
+def recall_at_k(exact: List[List[int]], approximate: List[List[int]], k: int) -> float:
+    hits = sum(len(set(e[:k]) & set(a[:k])) for e, a in zip(exact, approximate))
+    total = sum(min(len(e), k) for e in exact)
+    return hits / total if total else 0.0
+
+
+def summarize(label: str, latencies: List[float], recall: float) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    return {
+        "run": label,
+        "recall": recall,
+        "p50_ms": statistics.median(ordered),
+        "p95_ms": p95,
+        "mean_ms": statistics.fmean(ordered),
+    }
+
+
+def benchmark(
+    db: Session,
+    embedding_engine_id: int,
+    target: EmbeddingTarget,
+    queries: int,
+    k: int,
+    metric: DistanceMetric,
+    ef_search_values: List[int],
+    probes_values: List[int],
+    storages: List[VectorStorage] = (VectorStorage.FULL,),
+    rerank_factor: int = 4,
+) -> List[Dict[str, float]]:
+    table = EMBEDDING_TABLES[target]
+    dimension = get_engine_dimension(db, embedding_engine_id, target)
+    vectors = sample_query_vectors(db, table, embedding_engine_id, queries)
+    if not vectors:
+        raise ValueError(f"No {target.value} embeddings stored for engine {embedding_engine_id}")
+
+    exact, exact_latencies = run_searches(
+        db, table, embedding_engine_id, vectors, k, metric, dimension, exact=True
+    )
+    report = [summarize("exact", exact_latencies, 1.0)]
+
+    for storage in storages:
+        prefix = "" if storage == VectorStorage.FULL else f"{storage.value} "
+        options = {
+            "storage": storage,
+            "rerank_factor": 1 if storage == VectorStorage.FULL else rerank_factor,
+        }
+        for ef_search in ef_search_values:
+            approximate, latencies = run_searches(
+                db, table, embedding_engine_id, vectors, k, metric, dimension, ef_search=ef_search, **options
+            )
+            report.append(
+                summarize(f"{prefix}ef_search={ef_search}", latencies, recall_at_k(exact, approximate, k))
+            )
+
+        for probes in probes_values:
+            approximate, latencies = run_searches(
+                db, table, embedding_engine_id, vectors, k, metric, dimension, probes=probes, **options
+            )
+            report.append(summarize(f"{prefix}probes={probes}", latencies, recall_at_k(exact, approximate, k)))
+
+    return report
+
+
+def index_sizes(db: Session, embedding_engine_id: int, target: EmbeddingTarget) -> List[Dict]:
+    return [
+        {"name": index.name, "storage": index.storage.value, "size_bytes": index.size_bytes or 0}
+        for index in get_embedding_indexes(db, embedding_engine_id)
+        if index.target == target
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector index recall vs latency benchmark")
+    parser.add_argument("--engine-id", type=int, required=True, help="Embedding engine to benchmark")
+    parser.add_argument("--target", type=EmbeddingTarget, default=EmbeddingTarget.CONTENT, help="content or annotation")
+    parser.add_argument("--metric", type=DistanceMetric, default=DistanceMetric.L2, help="l2, cosine or inner_product")
+    parser.add_argument("--queries", type=int, default=100, help="Number of sampled query vectors")
+    parser.add_argument("-k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--ef-search", type=int, nargs="*", default=[40, 100, 200], help="HNSW ef_search values")
+    parser.add_argument("--probes", type=int, nargs="*", default=[], help="IVFFlat probes values")
+    parser.add_argument(
+        "--storage", type=VectorStorage, nargs="*", default=[VectorStorage.FULL], help="vector, halfvec or bit"
+    )
+    parser.add_argument("--rerank-factor", type=int, default=4, help="Candidates per hit for halfvec and bit")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = benchmark(
+            db,
+            args.engine_id,
+            args.target,
+            args.queries,
+            args.k,
+            args.metric,
+            args.ef_search,
+            args.probes,
+            args.storage,
+            args.rerank_factor,
+        )
+        sizes = index_sizes(db, args.engine_id, args.target)
+    finally:
+        db.close()
+
+    logger.info(f"{'run':<24}{'recall@' + str(args.k):>12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for row in report:
+        logger.info(
+            f"{row['run']:<24}{row['recall']:>12.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['mean_ms']:>10.2f}"
+        )
+    for size in sizes:
+        logger.info(f"{size['name']:<56}{size['storage']:>8}{size['size_bytes'] / 1024 ** 2:>10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
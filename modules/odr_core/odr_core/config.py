@@ -1,4 +1,5 @@
 # SPDX-License-Identifier: Apache-2.0
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from dotenv import find_dotenv, load_dotenv
 import os
@@ -22,6 +23,24 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_PORT: str
+    # connection pool of every API worker, workers * (pool size + overflow) has
+    # to stay below the server's max_connections unless a pooler sits in between
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 20
+    POSTGRES_POOL_TIMEOUT: float = 30.0
+    # test connections before use so connections dropped by a failover are
+    # replaced, and close them after this many seconds (-1 keeps them)
+    POSTGRES_POOL_PRE_PING: bool = True
+    POSTGRES_POOL_RECYCLE: int = 30 * 60
+    # external connection pooler in front of postgres, "pgbouncer" for
+    # PgBouncer in transaction mode, which disables prepared statements
+    POSTGRES_POOLER: Optional[str] = None
+    # comma separated URLs of read replicas that read-only endpoints are spread
+    # over (round_robin or least_connections), a client that wrote keeps
+    # reading from the primary for the read-your-writes window (0 disables it)
+    POSTGRES_READ_REPLICA_URLS: Optional[str] = None
+    POSTGRES_READ_ROUTING: str = "round_robin"
+    POSTGRES_READ_YOUR_WRITES_SECONDS: float = 5.0
 
     # Auth - make sure to set this to False in production
     SKIP_AUTH: bool = False
@@ -43,6 +62,59 @@ class Settings(BaseSettings):
     # Embedding
     CONTENT_EMBEDDING_DIMENSION: int = 512
     ANNOTATION_EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_TEXT_BATCH_SIZE: int = 256
+    EMBEDDING_PAGE_SIZE: int = 1000
+    EMBEDDING_DOWNLOAD_WORKERS: int = 8
+    # loaded models are evicted after this many idle seconds or once their
+    # ONNX files add up to more than the byte budget
+    EMBEDDING_MODEL_CACHE_TTL: int = 60 * 30
+    EMBEDDING_MODEL_CACHE_MAX_BYTES: int = 4 * 1024 ** 3
+    # load the models of all supported engines when the API starts
+    EMBEDDING_PREWARM: bool = True
+    # concurrent single embedding requests of a worker are embedded together,
+    # waiting at most this long for a batch to fill (0 disables coalescing)
+    EMBEDDING_COALESCE_MAX_BATCH: int = 32
+    EMBEDDING_COALESCE_MAX_WAIT_MS: float = 2.0
+    # text search queries are cached in memory and, when a directory is set,
+    # in memory mapped files shared by all workers
+    QUERY_EMBEDDING_CACHE_SIZE: int = 10000
+    QUERY_EMBEDDING_CACHE_TTL: int = 60 * 60 * 24
+    QUERY_EMBEDDING_DISK_CACHE_DIR: Optional[str] = None
+    QUERY_EMBEDDING_DISK_CACHE_SLOTS: int = 65536
+    # Unix socket of the shared embedding server (python -m odr_core.embedding_server),
+    # models are loaded in every API worker when unset
+    EMBEDDING_SERVER_SOCKET: Optional[str] = None
+    EMBEDDING_SERVER_MAX_BATCH: int = 64
+    EMBEDDING_SERVER_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_SERVER_WORKERS: int = 2
+    EMBEDDING_SERVER_TIMEOUT: float = 60.0
+    # seconds the API waits at startup for the server to load its models and listen
+    EMBEDDING_SERVER_START_TIMEOUT: float = 300.0
+
+    # Vector indexes (pgvector defaults)
+    EMBEDDING_HNSW_M: int = 16
+    EMBEDDING_HNSW_EF_CONSTRUCTION: int = 64
+    EMBEDDING_HNSW_EF_SEARCH: int = 40
+    EMBEDDING_IVFFLAT_LISTS: int = 100
+    # filtered searches: iterative index scans on pgvector 0.8+ (relaxed_order,
+    # strict_order or off), otherwise fetch this many times the page from the index
+    EMBEDDING_ITERATIVE_SCAN: str = "relaxed_order"
+    EMBEDDING_FILTER_OVERFETCH: int = 10
+    # searches on a halfvec or binary quantized index take this many times the
+    # page as candidates and re-rank them on the full precision vectors
+    EMBEDDING_RERANK_FACTOR: int = 4
+
+    # Near-duplicate detection: a new content embedding within this cosine
+    # distance of an already clustered content joins that content's cluster. Off by
+    # default, the probe needs a cosine content index of the engine
+    CONTENT_DUPLICATE_DETECTION: bool = False
+    CONTENT_DUPLICATE_MAX_DISTANCE: float = 0.05
+    # perceptual hash lookups run on an in-memory BK-tree per hash type, new
+    # contents are picked up on every search and the tree is rebuilt from the
+    # database after this many seconds to drop updated and deleted contents
+    PERCEPTUAL_HASH_MAX_DISTANCE: int = 6
+    PERCEPTUAL_HASH_INDEX_REBUILD_SECONDS: int = 600
 
     # Hugging Face
     HF_TOKEN: str = None
@@ -54,11 +126,18 @@ class Settings(BaseSettings):
         extra = "ignore"
 
     def get_db_url(self):
-        print(f"{self}")
         db_name = self.TEST_POSTGRES_DB if self.TEST else self.POSTGRES_DB
 
         conn_str = f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{db_name}"
         return conn_str
 
+    def get_async_db_url(self):
+        return self.get_db_url().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    def get_read_replica_urls(self) -> List[str]:
+        if not self.POSTGRES_READ_REPLICA_URLS:
+            return []
+        return [url.strip() for url in self.POSTGRES_READ_REPLICA_URLS.split(",") if url.strip()]
+
 # Create settings instance
 settings = Settings()
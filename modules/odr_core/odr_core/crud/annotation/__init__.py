@@ -6,6 +6,7 @@ from odr_core.crud.annotation.annotation import (
     update_annotation,
     delete_annotation,
     get_annotations_by_content,
+    get_annotations_by_content_async,
     get_annotations_by_user,
     get_annotations_by_team,
 )
@@ -1,8 +1,12 @@
 # SPDX-License-Identifier: Apache-2.0
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timezone
 
+from odr_core.crud.pagination import paginate
+from odr_core.crud.unit_of_work import commit
 from odr_core.models.annotation import Annotation, AnnotationSource
 from odr_core.schemas.annotation import AnnotationCreate, AnnotationUpdate
 
@@ -28,8 +32,7 @@ def create_annotation(
         )
 
     db.add(db_annotation)
-    db.commit()
-    db.refresh(db_annotation)
+    commit(db)
     return db_annotation
 
 
@@ -37,8 +40,10 @@ def get_annotation(db: Session, annotation_id: int) -> Optional[Annotation]:
     return db.query(Annotation).filter(Annotation.id == annotation_id).first()
 
 
-def get_annotations(db: Session, skip: int = 0, limit: int = 100) -> List[Annotation]:
-    return db.query(Annotation).offset(skip).limit(limit).all()
+def get_annotations(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[Annotation]:
+    return paginate(db.query(Annotation), Annotation, skip, limit, cursor).all()
 
 
 def update_annotation(
@@ -61,8 +66,7 @@ def update_annotation(
             .all()
         )
 
-    db.commit()
-    db.refresh(db_annotation)
+    commit(db)
     return db_annotation
 
 
@@ -72,41 +76,34 @@ def delete_annotation(db: Session, annotation_id: int) -> bool:
         return False
 
     db.delete(db_annotation)
-    db.commit()
+    commit(db)
     return True
 
 
 def get_annotations_by_content(
-    db: Session, content_id: int, skip: int = 0, limit: int = 100
+    db: Session, content_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[Annotation]:
-    return (
-        db.query(Annotation)
-        .filter(Annotation.content_id == content_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query = db.query(Annotation).filter(Annotation.content_id == content_id)
+    return paginate(query, Annotation, skip, limit, cursor).all()
+
+
+async def get_annotations_by_content_async(
+    db: AsyncSession, content_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[Annotation]:
+    query = select(Annotation).filter(Annotation.content_id == content_id)
+    result = await db.execute(paginate(query, Annotation, skip, limit, cursor))
+    return list(result.scalars().all())
 
 
 def get_annotations_by_user(
-    db: Session, user_id: int, skip: int = 0, limit: int = 100
+    db: Session, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[Annotation]:
-    return (
-        db.query(Annotation)
-        .filter(Annotation.from_user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query = db.query(Annotation).filter(Annotation.from_user_id == user_id)
+    return paginate(query, Annotation, skip, limit, cursor).all()
 
 
 def get_annotations_by_team(
-    db: Session, team_id: int, skip: int = 0, limit: int = 100
+    db: Session, team_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[Annotation]:
-    return (
-        db.query(Annotation)
-        .filter(Annotation.from_team_id == team_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query = db.query(Annotation).filter(Annotation.from_team_id == team_id)
+    return paginate(query, Annotation, skip, limit, cursor).all()
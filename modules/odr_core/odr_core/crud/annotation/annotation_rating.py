@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 
 from odr_core.models.annotation import AnnotationRating
 from odr_core.schemas.annotation import AnnotationRatingCreate, AnnotationRatingUpdate
+from odr_core.crud.unit_of_work import commit
 
 
 def create_annotation_rating(
@@ -19,8 +20,7 @@ def create_annotation_rating(
         updated_at=datetime.now(timezone.utc),
     )
     db.add(db_annotation_rating)
-    db.commit()
-    db.refresh(db_annotation_rating)
+    commit(db)
     return db_annotation_rating
 
 
@@ -62,8 +62,7 @@ def update_annotation_rating(
         setattr(db_annotation_rating, key, value)
     db_annotation_rating.updated_at = datetime.now(timezone.utc)
 
-    db.commit()
-    db.refresh(db_annotation_rating)
+    commit(db)
     return db_annotation_rating
 
 
@@ -75,5 +74,5 @@ def delete_annotation_rating(db: Session, rating_id: int) -> bool:
         return False
 
     db.delete(db_annotation_rating)
-    db.commit()
+    commit(db)
     return True
@@ -2,13 +2,13 @@
 from sqlalchemy.orm import Session
 from odr_core.models.annotation import AnnotationReport
 from odr_core.schemas.annotation import AnnotationReportCreate, AnnotationReportUpdate
+from odr_core.crud.unit_of_work import commit
 
 
 def create_annotation_report(db: Session, report: AnnotationReportCreate) -> AnnotationReport:
     db_report = AnnotationReport(**report.model_dump())
     db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    commit(db)
     return db_report
 
 
@@ -26,8 +26,7 @@ def update_annotation_report(db: Session, report_id: int, report: AnnotationRepo
         update_data = report.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_report, key, value)
-        db.commit()
-        db.refresh(db_report)
+        commit(db)
     return db_report
 
 
@@ -35,6 +34,6 @@ def delete_annotation_report(db: Session, report_id: int) -> bool:
     db_report = db.query(AnnotationReport).filter(AnnotationReport.id == report_id).first()
     if db_report:
         db.delete(db_report)
-        db.commit()
+        commit(db)
         return True
     return False
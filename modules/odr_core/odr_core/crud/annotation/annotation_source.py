@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 
 from odr_core.models.annotation import AnnotationSource
 from odr_core.schemas.annotation import AnnotationSourceCreate, AnnotationSourceUpdate
+from odr_core.crud.unit_of_work import commit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,8 +25,7 @@ def create_annotation_source(
         updated_at=datetime.now(timezone.utc),
     )
     db.add(db_annotation_source)
-    db.commit()
-    db.refresh(db_annotation_source)
+    commit(db)
     return db_annotation_source
 
 
@@ -64,8 +64,7 @@ def update_annotation_source(
 
     db_annotation_source.updated_at = datetime.now(timezone.utc)
 
-    db.commit()
-    db.refresh(db_annotation_source)
+    commit(db)
     return db_annotation_source
 
 
@@ -79,5 +78,5 @@ def delete_annotation_source(db: Session, annotation_source_id: int) -> bool:
         return False
 
     db.delete(db_annotation_source)
-    db.commit()
+    commit(db)
     return True
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: Apache-2.0
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from odr_core.models.content import (
     Content,
     ContentSource,
@@ -9,6 +10,8 @@ from odr_core.models.content import (
     ContentAuthor
 )
 from odr_core.schemas.content import (
+    ContentBulkItem,
+    ContentBulkResult,
     ContentCreate,
     ContentUpdate,
     ContentSourceCreate,
@@ -17,12 +20,23 @@ from odr_core.schemas.content import (
     ContentAuthorUpdate,
     httpurl_to_str,
 )
-from typing import List, Optional
+from typing import Dict, List, Optional
 from loguru import logger
 from datetime import datetime, timezone
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 import json
+import re
+from odr_core.crud.pagination import paginate
+from odr_core.crud.unit_of_work import commit, unit_of_work
+from odr_core.perceptual_hash import parse_hash, to_signed
+
+# hashes of this shape identify the bytes of a content, anything else ("", "tbd")
+# is a placeholder that never deduplicates
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# values per IN list when looking up existing hashes and sources
+BULK_LOOKUP_CHUNK_SIZE = 1000
 
 
 def create_content_source(
@@ -40,8 +54,7 @@ def create_content_source(
         updated_at=datetime.now(timezone.utc),
     )
     db.add(db_source)
-    db.commit()
-    db.refresh(db_source)
+    commit(db)
     return db_source
 
 
@@ -62,8 +75,7 @@ def update_content_source(
         for key, value in update_data.items():
             setattr(db_source, key, value)
         db_source.updated_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(db_source)
+        commit(db)
     return db_source
 
 
@@ -71,12 +83,18 @@ def delete_content_source(db: Session, source_id: int) -> bool:
     db_source = db.query(ContentSource).filter(ContentSource.id == source_id).first()
     if db_source:
         db.delete(db_source)
-        db.commit()
+        commit(db)
         return True
     return False
 
 
 def create_content(db: Session, content: ContentCreate, from_user_id: int):
+    if content.hash and SHA256_PATTERN.match(content.hash):
+        existing = get_content_by_hash(db, content.hash)
+        if existing is not None:
+            logger.info(f"Content with hash {content.hash} already exists: {existing.id}")
+            return existing
+
     logger.info(f"Creating content: {content}")
     logger.info(f"Content type: {content.type.value}")
     logger.info(f"Content status: {content.status.value}")
@@ -86,6 +104,7 @@ def create_content(db: Session, content: ContentCreate, from_user_id: int):
         url=content.url,
         hash=content.hash,
         phash=content.phash,
+        dhash=content.dhash,
         width=content.width,
         height=content.height,
         format=content.format,
@@ -98,25 +117,182 @@ def create_content(db: Session, content: ContentCreate, from_user_id: int):
         from_user_id=from_user_id,
         updated_at=datetime.now(timezone.utc),
     )
-    db.add(db_content)
-    db.flush()  # Flush to get the content_id
+    with unit_of_work(db):
+        db.add(db_content)
+        db.flush()  # Flush to get the content_id
+
+        # Create ContentSource objects
+        for source in content.sources:
+            db_source = create_content_source(db, db_content.id, source)
+            db_content.sources.append(db_source)
+    return db_content
 
-    # Create ContentSource objects
-    for source in content.sources:
-        db_source = create_content_source(db, db_content.id, source)
-        db_content.sources.append(db_source)
 
-    db.commit()
-    db.refresh(db_content)
-    return db_content
+def _chunks(values: List[str]):
+    for start in range(0, len(values), BULK_LOOKUP_CHUNK_SIZE):
+        yield values[start:start + BULK_LOOKUP_CHUNK_SIZE]
+
+
+def _hash_bits(value: Optional[str]) -> Optional[int]:
+    # bulk inserts bypass the model validator that fills phash64 and dhash64
+    bits = parse_hash(value)
+    return None if bits is None else to_signed(bits)
+
+
+def _insert_contents(db: Session, to_insert: List[tuple], from_user_id: int):
+    now = datetime.now(timezone.utc)
+    content_ids = db.scalars(
+        insert(Content).returning(Content.id, sort_by_parameter_order=True),
+        [
+            {
+                "name": content.name,
+                "type": ContentType(content.type.value),
+                "url": [str(url) for url in content.url],
+                "hash": content.hash,
+                "phash": content.phash,
+                "dhash": content.dhash,
+                "phash64": _hash_bits(content.phash),
+                "dhash64": _hash_bits(content.dhash),
+                "width": content.width,
+                "height": content.height,
+                "format": content.format,
+                "size": content.size,
+                "status": ContentStatus(content.status.value),
+                "license": content.license,
+                "license_url": httpurl_to_str(content.license_url),
+                "flags": content.flags,
+                "meta": content.meta,
+                "from_user_id": from_user_id,
+                "updated_at": now,
+            }
+            for _, content in to_insert
+        ],
+    ).all()
+    for (item, _), content_id in zip(to_insert, content_ids):
+        item.content_id = content_id
+
+    sources = [
+        {
+            "content_id": item.content_id,
+            "type": ContentSourceType(source.type.value),
+            "value": source.value,
+            "source_metadata": json.dumps(source.source_metadata) if source.source_metadata else None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item, content in to_insert
+        for source in content.sources
+    ]
+    if sources:
+        db.execute(insert(ContentSource), sources)
+
+    authors = [
+        {
+            "content_id": item.content_id,
+            "name": author.name,
+            "url": httpurl_to_str(author.url),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item, content in to_insert
+        for author in content.content_authors or []
+    ]
+    if authors:
+        db.execute(insert(ContentAuthor), authors)
+
+
+def create_contents_bulk(
+    db: Session, contents: List[ContentCreate], from_user_id: int
+) -> ContentBulkResult:
+    """
+    Insert contents with their sources and authors in one transaction, using one
+    executemany insert per table. A content whose SHA-256 is already stored, or
+    given earlier in the request, resolves to that content. A content with a
+    source value that is taken is reported and skipped, the rest are inserted.
+    """
+    items = [ContentBulkItem(index=index) for index in range(len(contents))]
+
+    hashes = list({content.hash for content in contents if content.hash and SHA256_PATTERN.match(content.hash)})
+    content_by_hash: Dict[str, int] = {}
+    for chunk in _chunks(hashes):
+        content_by_hash.update(db.query(Content.hash, Content.id).filter(Content.hash.in_(chunk)).all())
+
+    values = list({source.value for content in contents for source in content.sources})
+    taken = set()
+    for chunk in _chunks(values):
+        taken.update(value for (value,) in db.query(ContentSource.value).filter(ContentSource.value.in_(chunk)))
+
+    to_insert = []
+    pending_hashes: Dict[str, int] = {}
+    for item, content in zip(items, contents):
+        if content.hash in content_by_hash:
+            item.content_id = content_by_hash[content.hash]
+            item.existing = True
+            continue
+        if content.hash in pending_hashes:
+            # resolved to the earlier row's id once it is inserted
+            item.existing = True
+            continue
+        row_values = [source.value for source in content.sources]
+        item.conflicting_sources = [
+            value for i, value in enumerate(row_values) if value in taken or value in row_values[:i]
+        ]
+        if item.conflicting_sources:
+            item.error = "Content source value already exists"
+            continue
+        taken.update(source.value for source in content.sources)
+        if SHA256_PATTERN.match(content.hash):
+            pending_hashes[content.hash] = item.index
+        to_insert.append((item, content))
+
+    try:
+        if to_insert:
+            _insert_contents(db, to_insert, from_user_id)
+        commit(db)
+    except IntegrityError:
+        # a source value was stored by a concurrent request after the lookup above
+        db.rollback()
+        raise ValueError("Content sources changed while inserting, retry the request")
+
+    for item, content in zip(items, contents):
+        if item.existing and item.content_id is None:
+            item.content_id = items[pending_hashes[content.hash]].content_id
+
+    return ContentBulkResult(
+        created=len(to_insert),
+        existing=sum(item.existing for item in items),
+        failed=sum(item.error is not None for item in items),
+        items=items,
+    )
+
+
+# the response schema includes authors and sources, loading them for all rows of a
+# page in one query each keeps serializing a list from lazy loading them row by row,
+# which an AsyncSession cannot do at all
+CONTENT_RESPONSE_OPTIONS = (selectinload(Content.content_authors), selectinload(Content.sources))
 
 
 def get_content(db: Session, content_id: int) -> Optional[Content]:
     return db.query(Content).filter(Content.id == content_id).first()
 
 
-def get_contents(db: Session, skip: int = 0, limit: int = 100) -> List[Content]:
-    return db.query(Content).offset(skip).limit(limit).all()
+def get_contents(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[Content]:
+    return paginate(db.query(Content).options(*CONTENT_RESPONSE_OPTIONS), Content, skip, limit, cursor).all()
+
+
+async def get_content_async(db: AsyncSession, content_id: int) -> Optional[Content]:
+    result = await db.execute(select(Content).options(*CONTENT_RESPONSE_OPTIONS).filter(Content.id == content_id))
+    return result.scalars().first()
+
+
+async def get_contents_async(
+    db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[Content]:
+    query = paginate(select(Content).options(*CONTENT_RESPONSE_OPTIONS), Content, skip, limit, cursor)
+    result = await db.execute(query)
+    return list(result.scalars().all())
 
 
 def update_content(
@@ -127,24 +303,21 @@ def update_content(
         return None
 
     try:
-        # Update main content fields
-        update_data = content.model_dump(exclude={"sources"}, exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_content, key, value)
+        with unit_of_work(db):
+            # Update main content fields
+            update_data = content.model_dump(exclude={"sources"}, exclude_unset=True)
+            for key, value in update_data.items():
+                setattr(db_content, key, value)
 
-        # Handle sources
-        if content.sources is not None:
-            update_content_sources(db, db_content, content.sources)
+            # Handle sources
+            if content.sources is not None:
+                update_content_sources(db, db_content, content.sources)
 
-        db_content.updated_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(db_content)
+            db_content.updated_at = datetime.now(timezone.utc)
         return db_content
     except IntegrityError as e:
-        db.rollback()
         raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
     except Exception as e:
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 
@@ -153,30 +326,28 @@ def update_content_sources(
 ):
     existing_sources = {source.id: source for source in db_content.sources}
 
-    for source in new_sources:
-        if source.id and source.id in existing_sources:
-            # Update existing source
-            update_content_source(db, source.id, source)
-        else:
-            # Add new source
-            create_content_source(db, db_content.id, source)
+    with unit_of_work(db):
+        for source in new_sources:
+            if source.id and source.id in existing_sources:
+                # Update existing source
+                update_content_source(db, source.id, source)
+            else:
+                # Add new source
+                create_content_source(db, db_content.id, source)
 
-    # Remove sources not in the update
-    source_ids_to_keep = {source.id for source in new_sources if source.id is not None}
-    for existing_id in existing_sources:
-        if existing_id not in source_ids_to_keep:
-            delete_content_source(db, existing_id)
+        # Remove sources not in the update
+        source_ids_to_keep = {source.id for source in new_sources if source.id is not None}
+        for existing_id in existing_sources:
+            if existing_id not in source_ids_to_keep:
+                delete_content_source(db, existing_id)
 
 
 def delete_content(db: Session, content_id: int) -> bool:
     db_content = db.query(Content).filter(Content.id == content_id).first()
     if db_content:
-        # Delete associated sources
-        for source in get_content_sources(db, content_id):
-            delete_content_source(db, source.id)
-
+        # the sources cascade, they are deleted in the same flush as the content
         db.delete(db_content)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -184,8 +355,7 @@ def delete_content(db: Session, content_id: int) -> bool:
 def create_content_author(db: Session, content_author: ContentAuthorCreate) -> ContentAuthor:
     db_content_author = ContentAuthor(**content_author.model_dump())
     db.add(db_content_author)
-    db.commit()
-    db.refresh(db_content_author)
+    commit(db)
     return db_content_author
 
 
@@ -203,8 +373,7 @@ def update_content_author(db: Session, content_author_id: int, content_author: C
         update_data = content_author.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_content_author, key, value)
-        db.commit()
-        db.refresh(db_content_author)
+        commit(db)
     return db_content_author
 
 
@@ -212,7 +381,7 @@ def delete_content_author(db: Session, content_author_id: int) -> bool:
     db_content_author = get_content_author(db, content_author_id)
     if db_content_author:
         db.delete(db_content_author)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -224,25 +393,20 @@ def get_content_by_hash(db: Session, hash: str) -> Optional[Content]:
     return db.query(Content).filter(Content.hash == hash).first()
 
 
+async def get_content_by_hash_async(db: AsyncSession, hash: str) -> Optional[Content]:
+    result = await db.execute(select(Content).options(*CONTENT_RESPONSE_OPTIONS).filter(Content.hash == hash))
+    return result.scalars().first()
+
+
 def get_contents_by_user(
-    db: Session, user_id: int, skip: int = 0, limit: int = 100
+    db: Session, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[Content]:
-    return (
-        db.query(Content)
-        .filter(Content.from_user_id == user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query = db.query(Content).options(*CONTENT_RESPONSE_OPTIONS).filter(Content.from_user_id == user_id)
+    return paginate(query, Content, skip, limit, cursor).all()
 
 
 def get_contents_by_team(
-    db: Session, team_id: int, skip: int = 0, limit: int = 100
+    db: Session, team_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[Content]:
-    return (
-        db.query(Content)
-        .filter(Content.from_team_id == team_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    query = db.query(Content).options(*CONTENT_RESPONSE_OPTIONS).filter(Content.from_team_id == team_id)
+    return paginate(query, Content, skip, limit, cursor).all()
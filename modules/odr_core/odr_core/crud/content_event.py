@@ -2,14 +2,14 @@
 from sqlalchemy.orm import Session
 from odr_core.models.content import ContentEvents, ContentStatus
 from odr_core.schemas.content import ContentEventCreate, ContentEventUpdate
+from odr_core.crud.unit_of_work import commit
 from typing import List, Optional
 
 
 def create_content_event(db: Session, event: ContentEventCreate) -> ContentEvents:
     db_event = ContentEvents(**event.model_dump())
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
+    commit(db)
     return db_event
 
 
@@ -27,8 +27,7 @@ def update_content_event(db: Session, event_id: int, event: ContentEventUpdate)
         update_data = event.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_event, key, value)
-        db.commit()
-        db.refresh(db_event)
+        commit(db)
     return db_event
 
 
@@ -36,7 +35,7 @@ def delete_content_event(db: Session, event_id: int) -> bool:
     db_event = get_content_event(db, event_id)
     if db_event:
         db.delete(db_event)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -2,14 +2,14 @@
 from sqlalchemy.orm import Session
 from odr_core.models.content import ContentReport
 from odr_core.schemas.content_report import ContentReportCreate, ContentReportUpdate
+from odr_core.crud.unit_of_work import commit
 from typing import List, Optional
 
 
 def create_content_report(db: Session, report: ContentReportCreate) -> ContentReport:
     db_report = ContentReport(**report.model_dump())
     db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    commit(db)
     return db_report
 
 
@@ -27,8 +27,7 @@ def update_content_report(db: Session, report_id: int, report: ContentReportUpda
         update_data = report.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_report, key, value)
-        db.commit()
-        db.refresh(db_report)
+        commit(db)
     return db_report
 
 
@@ -36,6 +35,6 @@ def delete_content_report(db: Session, report_id: int) -> bool:
     db_report = db.query(ContentReport).filter(ContentReport.id == report_id).first()
     if db_report:
         db.delete(db_report)
-        db.commit()
+        commit(db)
         return True
     return False
@@ -1,5 +1,8 @@
 # SPDX-License-Identifier: Apache-2.0
 from sqlalchemy.orm import Session
+from odr_core.crud.content import CONTENT_RESPONSE_OPTIONS
+from odr_core.crud.pagination import paginate
+from odr_core.crud.unit_of_work import commit, in_unit_of_work
 from odr_core.models.content import ContentSet, ContentSetItem, Content
 from odr_core.schemas.content_set import ContentSetCreate, ContentSetUpdate
 from typing import List, Optional
@@ -8,8 +11,7 @@ from typing import List, Optional
 def create_content_set(db: Session, content_set: ContentSetCreate) -> ContentSet:
     db_content_set = ContentSet(**content_set.model_dump())
     db.add(db_content_set)
-    db.commit()
-    db.refresh(db_content_set)
+    commit(db)
     return db_content_set
 
 
@@ -17,8 +19,10 @@ def get_content_set(db: Session, content_set_id: int) -> Optional[ContentSet]:
     return db.query(ContentSet).filter(ContentSet.id == content_set_id).first()
 
 
-def get_content_sets(db: Session, skip: int = 0, limit: int = 100) -> List[ContentSet]:
-    return db.query(ContentSet).offset(skip).limit(limit).all()
+def get_content_sets(
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[ContentSet]:
+    return paginate(db.query(ContentSet), ContentSet, skip, limit, cursor).all()
 
 
 def update_content_set(db: Session, content_set_id: int, content_set: ContentSetUpdate) -> Optional[ContentSet]:
@@ -27,8 +31,7 @@ def update_content_set(db: Session, content_set_id: int, content_set: ContentSet
         update_data = content_set.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_content_set, key, value)
-        db.commit()
-        db.refresh(db_content_set)
+        commit(db)
     return db_content_set
 
 
@@ -36,7 +39,7 @@ def delete_content_set(db: Session, content_set_id: int) -> bool:
     db_content_set = db.query(ContentSet).filter(ContentSet.id == content_set_id).first()
     if db_content_set:
         db.delete(db_content_set)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -45,9 +48,12 @@ def add_content_to_set(db: Session, content_set_id: int, content_id: int) -> boo
     db_content_set_item = ContentSetItem(content_set_id=content_set_id, content_id=content_id)
     db.add(db_content_set_item)
     try:
-        db.commit()
+        commit(db)
         return True
     except: # noqa
+        if in_unit_of_work(db):
+            # a rollback here would drop the rest of the unit of work
+            raise
         db.rollback()
         return False
 
@@ -59,12 +65,18 @@ def remove_content_from_set(db: Session, content_set_id: int, content_id: int) -
     ).first()
     if db_content_set_item:
         db.delete(db_content_set_item)
-        db.commit()
+        commit(db)
         return True
     return False
 
 
-def get_contents_in_set(db: Session, content_set_id: int, skip: int = 0, limit: int = 100) -> List[Content]:
-    return db.query(Content).join(ContentSetItem).filter(
-        ContentSetItem.content_set_id == content_set_id
-    ).offset(skip).limit(limit).all()
+def get_contents_in_set(
+    db: Session, content_set_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[Content]:
+    query = (
+        db.query(Content)
+        .options(*CONTENT_RESPONSE_OPTIONS)
+        .join(ContentSetItem)
+        .filter(ContentSetItem.content_set_id == content_set_id)
+    )
+    return paginate(query, Content, skip, limit, cursor).all()
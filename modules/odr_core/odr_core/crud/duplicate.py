@@ -0,0 +1,163 @@
+# SPDX-License-Identifier: Apache-2.0
+# Near-duplicate clusters are assigned incrementally: every new content embedding
+# costs one nearest neighbour probe on the engine's cosine index against the contents
+# that already have a cluster, instead of re-clustering the whole engine. Without a
+# cosine index the probe is a sequential scan, so engines without one are refused.
+from typing import List, Optional
+
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.crud.embedding_index import (
+    apply_search_parameters,
+    embedding_distance,
+    engine_dimension,
+    engine_embedding,
+    get_embedding_indexes,
+)
+from odr_core.crud.unit_of_work import commit
+from odr_core.enums import DistanceMetric, EmbeddingTarget, VectorStorage
+from odr_core.models.duplicate import ContentCluster
+from odr_core.models.embedding import ContentEmbedding, EmbeddingEngine
+from odr_core.schemas.duplicate import ContentClusterMember, ContentDuplicates, DuplicateClusterAssignResult
+
+
+class MissingCosineIndexError(ValueError):
+    pass
+
+
+def _clustered(embedding_engine_id: int):
+    return exists().where(
+        ContentCluster.content_id == ContentEmbedding.content_id,
+        ContentCluster.embedding_engine_id == embedding_engine_id,
+    )
+
+
+def has_cosine_index(db: Session, embedding_engine_id: int) -> bool:
+    """
+    Whether the engine has the full precision cosine content index the probe scans,
+    other databases than postgres have no vector indexes to check.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return any(
+        index.target == EmbeddingTarget.CONTENT
+        and index.metric == DistanceMetric.COSINE
+        and index.storage == VectorStorage.FULL
+        for index in get_embedding_indexes(db, embedding_engine_id)
+    )
+
+
+def nearest_clustered_content(
+    db: Session, embedding_engine_id: int, dimension: int, content_id: int, embedding
+):
+    """
+    Closest content with a cluster by cosine distance, as (content_id, distance) or None.
+    """
+    distance = embedding_distance(
+        engine_embedding(ContentEmbedding.embedding, dimension), DistanceMetric.COSINE, embedding
+    ).label("distance")
+    return db.execute(
+        select(ContentEmbedding.content_id, distance)
+        .where(
+            ContentEmbedding.embedding_engine_id == embedding_engine_id,
+            ContentEmbedding.content_id != content_id,
+            _clustered(embedding_engine_id),
+        )
+        .order_by(distance)
+        .limit(1)
+    ).first()
+
+
+def assign_duplicate_clusters(
+    db: Session,
+    embedding_engine_id: int,
+    content_ids: Optional[List[int]] = None,
+    max_contents: int = 1000,
+) -> DuplicateClusterAssignResult:
+    """
+    Put the given contents, or the next unclustered contents of the engine, into
+    the cluster of their nearest clustered content when it is close enough, or
+    into a new cluster of their own. Contents are assigned one after another so
+    duplicates within the same call end up together.
+    """
+    engine = db.query(EmbeddingEngine).filter(EmbeddingEngine.id == embedding_engine_id).first()
+    if engine is None:
+        raise ValueError("Invalid embedding engine id")
+    if not has_cosine_index(db, embedding_engine_id):
+        raise MissingCosineIndexError(
+            f"Embedding engine {embedding_engine_id} has no cosine content index, create one before assigning duplicates"
+        )
+    dimension = engine_dimension(engine, EmbeddingTarget.CONTENT)
+
+    query = db.query(ContentEmbedding.content_id, ContentEmbedding.embedding).filter(
+        ContentEmbedding.embedding_engine_id == embedding_engine_id,
+        ~_clustered(embedding_engine_id),
+    )
+    if content_ids is not None:
+        query = query.filter(ContentEmbedding.content_id.in_(content_ids))
+    pending = query.order_by(ContentEmbedding.content_id).limit(max_contents).all()
+
+    result = DuplicateClusterAssignResult(embedding_engine_id=embedding_engine_id, assigned=0, new_clusters=0)
+    if not pending:
+        return result
+
+    # the probe only considers clustered contents, a filter applied after the index scan
+    apply_search_parameters(db, limit=1, filtered=True)
+    for content_id, embedding in pending:
+        nearest = nearest_clustered_content(
+            db, embedding_engine_id, dimension, content_id, [float(value) for value in embedding]
+        )
+        if nearest is not None and nearest.distance <= settings.CONTENT_DUPLICATE_MAX_DISTANCE:
+            cluster_id = db.query(ContentCluster.cluster_id).filter(
+                ContentCluster.content_id == nearest.content_id,
+                ContentCluster.embedding_engine_id == embedding_engine_id,
+            ).scalar()
+            cluster = ContentCluster(
+                content_id=content_id,
+                embedding_engine_id=embedding_engine_id,
+                cluster_id=cluster_id,
+                matched_content_id=nearest.content_id,
+                distance=nearest.distance,
+            )
+        else:
+            cluster = ContentCluster(
+                content_id=content_id, embedding_engine_id=embedding_engine_id, cluster_id=content_id
+            )
+            result.new_clusters += 1
+        db.add(cluster)
+        # the next probe has to see this assignment
+        db.flush()
+        result.assigned += 1
+
+    commit(db)
+    return result
+
+
+def get_content_duplicates(
+    db: Session, content_id: int, embedding_engine_id: int
+) -> Optional[ContentDuplicates]:
+    cluster = db.query(ContentCluster).filter(
+        ContentCluster.content_id == content_id,
+        ContentCluster.embedding_engine_id == embedding_engine_id,
+    ).first()
+    if cluster is None:
+        return None
+
+    members = (
+        db.query(ContentCluster)
+        .filter(
+            ContentCluster.embedding_engine_id == embedding_engine_id,
+            ContentCluster.cluster_id == cluster.cluster_id,
+            ContentCluster.content_id != content_id,
+        )
+        .order_by(ContentCluster.content_id)
+        .all()
+    )
+    return ContentDuplicates(
+        content_id=content_id,
+        embedding_engine_id=embedding_engine_id,
+        cluster_id=cluster.cluster_id,
+        duplicates=[ContentClusterMember.model_validate(member, from_attributes=True) for member in members],
+    )
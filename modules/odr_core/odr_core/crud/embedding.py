@@ -1,7 +1,18 @@
 # SPDX-License-Identifier: Apache-2.0
-from typing import Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Iterable, List, Optional, Tuple
+import json
 from numpy import ndarray
+from sqlalchemy import exists, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from urllib3.exceptions import HTTPError
+from odr_core.enums import ContentType, EmbeddingTarget
+from odr_core.models.annotation import Annotation
+from odr_core.models.content import Content, ContentSetItem
 from odr_core.models.embedding import (
     EmbeddingEngine,
     AnnotationEmbedding,
@@ -9,6 +20,8 @@ from odr_core.models.embedding import (
     EmbeddingEngineType,
 )
 from odr_core.schemas.embedding import (
+    AnnotationEmbeddingBase,
+    ContentEmbeddingBase,
     EmbeddingEngineCreate,
     EmbeddingEngineUpdate,
     ContentEmbeddingCreate,
@@ -16,45 +29,49 @@ from odr_core.schemas.embedding import (
     AnnotationEmbeddingUpdate,
     ContentEmbeddingUpdate,
     EmbeddingVectorQuery,
+    ContentEmbeddingBatchGenerate,
+    ContentEmbeddingBatchItem,
+    ContentEmbeddingBatchResult,
+    AnnotationEmbeddingBatchGenerate,
+    AnnotationEmbeddingBatchResult,
 )
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from fastembed import TextEmbedding, ImageEmbedding
 from odr_core.config import settings
+from odr_core.crud.pagination import paginate
+from odr_core.crud.unit_of_work import commit
+from odr_core.crud.embedding_index import (
+    apply_search_parameters,
+    embedding_distance,
+    engine_dimension,
+    engine_embedding,
+    get_engine_dimension,
+    validate_embedding_dimension,
+)
+from odr_core.embedding_batcher import EmbeddingBatcher
+from odr_core.embedding_server import EmbeddingKind, EmbeddingServerUnavailable, get_embedding_server_client
+from odr_core.model_cache import ModelCache, onnx_model_size
+from odr_core.query_embedding_cache import QueryEmbeddingCache
+from odr_core.utils import download_bytes_from_url
 
-from PIL import Image
-
-
-class ModelCache:
-    def __init__(self, ttl: float):
-        self.ttl = ttl
-        self.cache = {}
-        self.expiry = {}
-        self.ttl = timedelta(seconds=ttl)
-
-    def expire(self):
-        now = datetime.now(timezone.utc)
-        for key, value in self.expiry.items():
-            if now > value:
-                del self.cache[key]
-                del self.expiry[key]
+from PIL import Image, UnidentifiedImageError
 
-    def __getitem__(self, key):
-        item = self.cache.get(key)
-        if item is None:
-            self.expire()
-            return None
-        else:
-            self.expiry[key] = datetime.now(timezone.utc) + self.ttl
-            self.expire()
-            return self.cache[key]
 
-    def __setitem__(self, key, value):
-        self.cache[key] = value
-        self.expiry[key] = datetime.now(timezone.utc) + self.ttl
-        self.expire()
+embedding_model_cache = ModelCache(
+    settings.EMBEDDING_MODEL_CACHE_TTL,
+    max_bytes=settings.EMBEDDING_MODEL_CACHE_MAX_BYTES,
+    sizeof=lambda name, model: onnx_model_size(settings.MODEL_CACHE_DIR, name, model.list_supported_models()),
+)
 
+query_embedding_cache = QueryEmbeddingCache(
+    settings.QUERY_EMBEDDING_CACHE_SIZE,
+    settings.QUERY_EMBEDDING_CACHE_TTL,
+    disk_dir=settings.QUERY_EMBEDDING_DISK_CACHE_DIR,
+    disk_slots=settings.QUERY_EMBEDDING_DISK_CACHE_SLOTS,
+)
 
-embedding_model_cache = ModelCache(60 * 30)
+# annotation fields holding plain text, anything else is embedded as its JSON
+ANNOTATION_TEXT_KEYS = ("text", "caption", "description")
 
 
 # list of available embedding engines - https://qdrant.github.io/fastembed/examples/Supported_Models/
@@ -68,12 +85,12 @@ def create_embedding_engine(
         version=embedding_engine.version,
         type=EmbeddingEngineType(embedding_engine.type),
         supported=embedding_engine.supported,
+        dimension=embedding_engine.dimension,
         created_at=datetime.now(timezone.utc),
         updated_at=datetime.now(timezone.utc),
     )
     db.add(db_embedding)
-    db.commit()
-    db.refresh(db_embedding)
+    commit(db)
     return db_embedding
 
 
@@ -87,8 +104,7 @@ def update_embedding_engine(
         for key, value in embedding_engine.model_dump(exclude_unset=True).items():
             setattr(db_embedding, key, value)
         db_embedding.updated_at = datetime.now(timezone.utc)
-        db.commit()
-        db.refresh(db_embedding)
+        commit(db)
     return db_embedding
 
 
@@ -100,7 +116,7 @@ def delete_embedding_engine(db: Session, embedding_engine_id: int) -> bool:
     )
     if db_embedding:
         db.delete(db_embedding)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -121,9 +137,18 @@ def get_embedding_engines(
     return db.query(EmbeddingEngine).offset(skip).limit(limit).all()
 
 
-def generate_text_embedding(
-    db: Session, text: str, embedding_engine_id: int
-) -> Optional[List[float]]:
+def get_supported_embedding_engines(db: Session) -> List[EmbeddingEngine]:
+    return (
+        db.query(EmbeddingEngine)
+        .filter(EmbeddingEngine.supported.is_(True))
+        .order_by(EmbeddingEngine.id)
+        .all()
+    )
+
+
+def get_embedding_engine_of_type(
+    db: Session, embedding_engine_id: int, engine_type: EmbeddingEngineType
+) -> EmbeddingEngine:
     embedding_engine: Optional[EmbeddingEngine] = get_embedding_engine(
         db, embedding_engine_id
     )
@@ -134,52 +159,332 @@ def generate_text_embedding(
     if not embedding_engine.supported:
         raise ValueError("Unsupported embedding engine")
 
-    if embedding_engine.type != EmbeddingEngineType.TEXT:
+    if embedding_engine.type != engine_type:
         raise ValueError(
-            f"Invalid embedding engine, expected {EmbeddingEngineType.TEXT} got {embedding_engine.type}"
+            f"Invalid embedding engine type, expected {engine_type} got {embedding_engine.type}"
+        )
+
+    return embedding_engine
+
+
+def _load_model(model_class: type, model_name: str) -> TextEmbedding | ImageEmbedding:
+    return embedding_model_cache.get_or_load(
+        model_name, lambda: model_class(model_name, cache_dir=settings.MODEL_CACHE_DIR)
+    )
+
+
+def load_embedding_model(embedding_engine: EmbeddingEngine) -> TextEmbedding | ImageEmbedding:
+    model_class = TextEmbedding if embedding_engine.type == EmbeddingEngineType.TEXT else ImageEmbedding
+    return _load_model(model_class, embedding_engine.name)
+
+
+def embed_in_process(
+    kind: EmbeddingKind, model_name: str, inputs: List[str | bytes], batch_size: Optional[int] = None
+) -> List[List[float]]:
+    model = _load_model(ImageEmbedding if kind == EmbeddingKind.IMAGE else TextEmbedding, model_name)
+    if kind == EmbeddingKind.IMAGE:
+        embeddings: Iterable[ndarray] = model.embed(
+            [BytesIO(data) for data in inputs], batch_size=batch_size or settings.EMBEDDING_BATCH_SIZE
         )
+    elif kind == EmbeddingKind.QUERY:
+        embeddings = model.query_embed(inputs)
+    else:
+        embeddings = model.passage_embed(inputs, batch_size=batch_size or settings.EMBEDDING_TEXT_BATCH_SIZE)
+    return [embedding.tolist() for embedding in embeddings]
 
-    model: TextEmbedding | None = embedding_model_cache[embedding_engine.name]
-    if model is None:
-        model = TextEmbedding(embedding_engine.name, cache_dir=settings.MODEL_CACHE_DIR)
-        embedding_model_cache[embedding_engine.name] = model
 
-    embedding: Iterable[ndarray] = list(model.query_embed(text))
-    return embedding[0].tolist()
+embedding_batcher = EmbeddingBatcher(
+    embed_in_process,
+    max_batch=settings.EMBEDDING_COALESCE_MAX_BATCH,
+    max_wait_ms=settings.EMBEDDING_COALESCE_MAX_WAIT_MS,
+)
+
+
+def embed_inputs(
+    kind: EmbeddingKind,
+    model_name: str,
+    inputs: List[str | bytes],
+    batch_size: Optional[int] = None,
+    coalesce: bool = False,
+) -> List[List[float]]:
+    """
+    Embed texts or encoded images with the shared embedding server when one is
+    configured and reachable, otherwise in this worker. Single request callers set
+    coalesce so concurrent requests of the worker are embedded together.
+    """
+    client = get_embedding_server_client()
+    if client is not None:
+        try:
+            return client.embed(
+                kind, model_name, [data.encode() if isinstance(data, str) else data for data in inputs]
+            )
+        except EmbeddingServerUnavailable:
+            # the client logs the outage, the worker loads the model itself meanwhile
+            pass
+    if coalesce and settings.EMBEDDING_COALESCE_MAX_WAIT_MS > 0:
+        return embedding_batcher.submit(kind, model_name, inputs)
+    return embed_in_process(kind, model_name, inputs, batch_size)
+
+
+def generate_text_embedding(
+    db: Session, text: str, embedding_engine_id: int
+) -> Optional[List[float]]:
+    embedding_engine = get_embedding_engine_of_type(db, embedding_engine_id, EmbeddingEngineType.TEXT)
+    return query_embedding_cache.get_or_compute(
+        embedding_engine.id,
+        embedding_engine.name,
+        engine_dimension(embedding_engine, EmbeddingTarget.ANNOTATION),
+        text,
+        lambda query: embed_inputs(EmbeddingKind.QUERY, embedding_engine.name, [query], coalesce=True)[0],
+    )
+
+
+def generate_text_embeddings(
+    db: Session,
+    texts: List[str],
+    embedding_engine_id: int,
+    batch_size: Optional[int] = None,
+) -> List[List[float]]:
+    """
+    Embed stored documents, which use the passage side of asymmetric models unlike search queries.
+    """
+    embedding_engine = get_embedding_engine_of_type(db, embedding_engine_id, EmbeddingEngineType.TEXT)
+    return embed_inputs(EmbeddingKind.PASSAGE, embedding_engine.name, texts, batch_size)
+
+
+def annotation_text(annotation: Any) -> str:
+    if isinstance(annotation, str):
+        return annotation
+    if isinstance(annotation, dict):
+        for key in ANNOTATION_TEXT_KEYS:
+            if isinstance(annotation.get(key), str):
+                return annotation[key]
+    return json.dumps(annotation, sort_keys=True, ensure_ascii=False)
+
+
+def image_model_input(image: Image.Image | bytes) -> BytesIO:
+    # fastembed opens every input itself, so hand it encoded bytes rather than a PIL image
+    if isinstance(image, bytes):
+        return BytesIO(image)
+    buffer = BytesIO()
+    image.save(buffer, format=image.format or "PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def generate_image_embeddings(
+    db: Session,
+    images: List[Image.Image | bytes],
+    embedding_engine_id: int,
+    batch_size: Optional[int] = None,
+) -> List[List[float]]:
+    embedding_engine = get_embedding_engine_of_type(db, embedding_engine_id, EmbeddingEngineType.IMAGE)
+    inputs = [image_model_input(image).getvalue() for image in images]
+    return embed_inputs(EmbeddingKind.IMAGE, embedding_engine.name, inputs, batch_size)
 
 
 def generate_image_embedding(
     db: Session, image: Image.Image, embedding_engine_id: int
 ) -> List[float]:
-    embedding_engine: Optional[EmbeddingEngine] = get_embedding_engine(
-        db, embedding_engine_id
-    )
+    embedding_engine = get_embedding_engine_of_type(db, embedding_engine_id, EmbeddingEngineType.IMAGE)
+    inputs = [image_model_input(image).getvalue()]
+    return embed_inputs(EmbeddingKind.IMAGE, embedding_engine.name, inputs, coalesce=True)[0]
 
+
+def _download_content_image(url: str) -> Tuple[Optional[bytes], Optional[str]]:
+    try:
+        data = download_bytes_from_url(url)
+        Image.open(BytesIO(data))
+        return data, None
+    except (ValueError, UnidentifiedImageError, HTTPError) as e:
+        return None, str(e) or "Invalid image data"
+
+
+def generate_content_embeddings(
+    db: Session, batch: ContentEmbeddingBatchGenerate
+) -> ContentEmbeddingBatchResult:
+    embedding_engine = get_embedding_engine(db, batch.embedding_engine_id)
     if embedding_engine is None:
         raise ValueError("Invalid embedding engine id")
 
-    if not embedding_engine.supported:
-        raise ValueError("Unsupported embedding engine")
-
-    if embedding_engine.type != EmbeddingEngineType.IMAGE:
-        raise ValueError(
-            f"Invalid embedding engine type, expected {EmbeddingEngineType.IMAGE} got {embedding_engine.type}"
+    content_ids = list(dict.fromkeys(batch.content_ids))
+    if batch.content_set_id is not None:
+        set_items = db.query(ContentSetItem.content_id).filter(
+            ContentSetItem.content_set_id == batch.content_set_id
+        )
+        requested = set(content_ids)
+        content_ids.extend(
+            content_id for (content_id,) in set_items if content_id not in requested
+        )
+    if not content_ids:
+        raise ValueError("No content ids given")
+
+    items = {content_id: ContentEmbeddingBatchItem(content_id=content_id) for content_id in content_ids}
+    contents = {
+        content.id: content
+        for content in db.query(Content).filter(Content.id.in_(content_ids))
+    }
+    embedded = {
+        content_id
+        for (content_id,) in db.query(ContentEmbedding.content_id).filter(
+            ContentEmbedding.embedding_engine_id == embedding_engine.id,
+            ContentEmbedding.content_id.in_(content_ids),
         )
+    }
+
+    pending = []
+    for content_id in content_ids:
+        content = contents.get(content_id)
+        if content is None:
+            items[content_id].error = "Content not found"
+        elif content.type.value != embedding_engine.type.value:
+            items[content_id].error = (
+                f"Invalid content type for embedding engine. Expected {embedding_engine.type.value}, "
+                f"got {content.type.value}"
+            )
+        elif content.type.value != ContentType.IMAGE.value:
+            items[content_id].error = "Unsupported content type"
+        elif content_id in embedded:
+            items[content_id].error = "Content embedding already exists"
+        elif not content.url:
+            items[content_id].error = "Content has no url"
+        else:
+            pending.append((content_id, content.url[0]))
+
+    with ThreadPoolExecutor(max_workers=settings.EMBEDDING_DOWNLOAD_WORKERS) as executor:
+        downloads = list(executor.map(_download_content_image, [url for _, url in pending]))
 
-    model: ImageEmbedding | None = embedding_model_cache[embedding_engine.name]
-    if model is None:
-        model = ImageEmbedding(
-            embedding_engine.name, cache_dir=settings.MODEL_CACHE_DIR
+    images = []
+    for (content_id, _), (data, error) in zip(pending, downloads):
+        if error is not None:
+            items[content_id].error = error
+        else:
+            images.append((content_id, data))
+
+    embeddings = []
+    batch_size = settings.EMBEDDING_BATCH_SIZE
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        try:
+            vectors = generate_image_embeddings(
+                db, [data for _, data in chunk], embedding_engine.id, batch_size
+            )
+            embeddings.extend(zip([content_id for content_id, _ in chunk], vectors))
+        except Exception:
+            # one bad image fails the whole model call, retry the chunk item by item
+            for content_id, data in chunk:
+                try:
+                    vector = generate_image_embeddings(db, [data], embedding_engine.id)[0]
+                    embeddings.append((content_id, vector))
+                except Exception as e:
+                    items[content_id].error = str(e)
+
+    embedding_ids = create_content_embeddings(
+        db,
+        [
+            ContentEmbeddingCreate(
+                content_id=content_id,
+                embedding=vector,
+                embedding_engine_id=embedding_engine.id,
+                from_user_id=batch.from_user_id,
+                from_team_id=batch.from_team_id,
+            )
+            for content_id, vector in embeddings
+        ],
+    )
+    for (content_id, _), embedding_id in zip(embeddings, embedding_ids):
+        items[content_id].content_embedding_id = embedding_id
+
+    return ContentEmbeddingBatchResult(
+        embedding_engine_id=embedding_engine.id,
+        created=len(embedding_ids),
+        failed=len(content_ids) - len(embedding_ids),
+        items=list(items.values()),
+    )
+
+
+def generate_annotation_embeddings(
+    db: Session, batch: AnnotationEmbeddingBatchGenerate
+) -> AnnotationEmbeddingBatchResult:
+    embedding_engine = get_embedding_engine(db, batch.embedding_engine_id)
+    if embedding_engine is None:
+        raise ValueError("Invalid embedding engine id")
+
+    result = AnnotationEmbeddingBatchResult(
+        embedding_engine_id=embedding_engine.id, processed=0, upserted=0
+    )
+    last_annotation_id = batch.after_annotation_id
+
+    while batch.max_annotations is None or result.processed < batch.max_annotations:
+        page_size = settings.EMBEDDING_PAGE_SIZE
+        if batch.max_annotations is not None:
+            page_size = min(page_size, batch.max_annotations - result.processed)
+
+        # keyset pagination keeps every page an index range scan on annotations.id
+        query = db.query(Annotation.id, Annotation.annotation).filter(Annotation.id > last_annotation_id)
+        if batch.only_missing:
+            query = query.filter(
+                ~exists().where(
+                    AnnotationEmbedding.annotation_id == Annotation.id,
+                    AnnotationEmbedding.embedding_engine_id == embedding_engine.id,
+                )
+            )
+        page = query.order_by(Annotation.id).limit(page_size).all()
+        if not page:
+            break
+
+        texts = [(annotation_id, annotation_text(annotation)) for annotation_id, annotation in page]
+        embeddings = []
+        try:
+            vectors = generate_text_embeddings(db, [text for _, text in texts], embedding_engine.id)
+            embeddings = list(zip([annotation_id for annotation_id, _ in texts], vectors))
+        except Exception:
+            for annotation_id, text in texts:
+                try:
+                    embeddings.append(
+                        (annotation_id, generate_text_embeddings(db, [text], embedding_engine.id)[0])
+                    )
+                except Exception:
+                    result.failed_annotation_ids.append(annotation_id)
+
+        result.upserted += upsert_annotation_embeddings(
+            db,
+            [
+                AnnotationEmbeddingCreate(
+                    annotation_id=annotation_id,
+                    embedding=vector,
+                    embedding_engine_id=embedding_engine.id,
+                    from_user_id=batch.from_user_id,
+                    from_team_id=batch.from_team_id,
+                )
+                for annotation_id, vector in embeddings
+            ],
         )
-        embedding_model_cache[embedding_engine.name] = model
+        result.processed += len(page)
+        last_annotation_id = page[-1].id
+        result.last_annotation_id = last_annotation_id
 
-    embedding: Iterable[ndarray] = list(model.embed(image))
-    return embedding[0].tolist()
+    return result
+
+
+def _validate_embedding_dimensions(
+    db: Session,
+    embeddings: List[ContentEmbeddingBase | AnnotationEmbeddingBase],
+    target: EmbeddingTarget,
+):
+    # the column takes vectors of any length, so the engine's dimension is checked here
+    dimensions = {}
+    for embedding in embeddings:
+        engine_id = embedding.embedding_engine_id
+        if engine_id not in dimensions:
+            dimensions[engine_id] = get_engine_dimension(db, engine_id, target)
+        validate_embedding_dimension(embedding.embedding, dimensions[engine_id])
 
 
 def create_content_embedding(
     db: Session, content_embedding: ContentEmbeddingCreate
 ) -> ContentEmbedding:
+    _validate_embedding_dimensions(db, [content_embedding], EmbeddingTarget.CONTENT)
     db_content_embedding = ContentEmbedding(
         content_id=content_embedding.content_id,
         embedding=content_embedding.embedding,
@@ -189,11 +494,39 @@ def create_content_embedding(
         created_at=datetime.now(timezone.utc),
     )
     db.add(db_content_embedding)
-    db.commit()
-    db.refresh(db_content_embedding)
+    commit(db)
     return db_content_embedding
 
 
+def create_content_embeddings(
+    db: Session, content_embeddings: List[ContentEmbeddingCreate]
+) -> List[int]:
+    """
+    Insert all embeddings in one statement and one transaction, returning the new ids in input order.
+    """
+    if not content_embeddings:
+        return []
+    _validate_embedding_dimensions(db, content_embeddings, EmbeddingTarget.CONTENT)
+
+    now = datetime.now(timezone.utc)
+    embedding_ids = db.scalars(
+        insert(ContentEmbedding).returning(ContentEmbedding.id, sort_by_parameter_order=True),
+        [
+            {
+                "content_id": content_embedding.content_id,
+                "embedding": content_embedding.embedding,
+                "embedding_engine_id": content_embedding.embedding_engine_id,
+                "from_user_id": content_embedding.from_user_id,
+                "from_team_id": content_embedding.from_team_id,
+                "created_at": now,
+            }
+            for content_embedding in content_embeddings
+        ],
+    ).all()
+    commit(db)
+    return list(embedding_ids)
+
+
 def update_content_embedding(
     db: Session, content_embedding_id: int, content_embedding: ContentEmbeddingUpdate
 ) -> ContentEmbedding:
@@ -203,10 +536,10 @@ def update_content_embedding(
         .first()
     )
     if db_content_embedding:
+        _validate_embedding_dimensions(db, [content_embedding], EmbeddingTarget.CONTENT)
         for key, value in content_embedding.model_dump(exclude_unset=True).items():
             setattr(db_content_embedding, key, value)
-        db.commit()
-        db.refresh(db_content_embedding)
+        commit(db)
     return db_content_embedding
 
 
@@ -218,7 +551,7 @@ def delete_content_embedding(db: Session, content_embedding_id: int) -> bool:
     )
     if db_content_embedding:
         db.delete(db_content_embedding)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -226,24 +559,35 @@ def delete_content_embedding(db: Session, content_embedding_id: int) -> bool:
 def query_content_embedding(
     db: Session, query: EmbeddingVectorQuery, skip: int = 0, limit: int = 100
 ) -> List[ContentEmbedding]:
-    if len(query.embedding) != settings.CONTENT_EMBEDDING_DIMENSION:
-        raise ValueError(
-            f"Invalid embedding length, expected {settings.CONTENT_EMBEDDING_DIMENSION} got {len(query.embedding)}"
-        )
+    dimension = get_engine_dimension(db, query.embedding_engine_id, EmbeddingTarget.CONTENT)
+    validate_embedding_dimension(query.embedding, dimension)
+
+    apply_search_parameters(db, query.ef_search, query.probes, limit=skip + limit)
 
     return (
         db.query(ContentEmbedding)
         .filter(ContentEmbedding.embedding_engine_id == query.embedding_engine_id)
-        .order_by(ContentEmbedding.embedding.l2_distance(query.embedding))
+        .order_by(
+            embedding_distance(engine_embedding(ContentEmbedding.embedding, dimension), query.metric, query.embedding)
+        )
         .offset(skip)
         .limit(limit)
         .all()
     )
 
 
+async def query_content_embedding_async(
+    db: AsyncSession, query: EmbeddingVectorQuery, skip: int = 0, limit: int = 100
+) -> List[ContentEmbedding]:
+    # runs the sync query in the session's transaction, so the transaction local
+    # search parameters apply to it as they do for sync callers
+    return await db.run_sync(query_content_embedding, query, skip, limit)
+
+
 def create_annotation_embedding(
     db: Session, annotation_embedding: AnnotationEmbeddingCreate
 ) -> AnnotationEmbedding:
+    _validate_embedding_dimensions(db, [annotation_embedding], EmbeddingTarget.ANNOTATION)
     db_annotation_embedding = AnnotationEmbedding(
         annotation_id=annotation_embedding.annotation_id,
         embedding=annotation_embedding.embedding,
@@ -253,11 +597,54 @@ def create_annotation_embedding(
         created_at=datetime.now(timezone.utc),
     )
     db.add(db_annotation_embedding)
-    db.commit()
-    db.refresh(db_annotation_embedding)
+    commit(db)
     return db_annotation_embedding
 
 
+def upsert_annotation_embeddings(
+    db: Session, annotation_embeddings: List[AnnotationEmbeddingCreate]
+) -> int:
+    """
+    Insert or replace the embeddings of (annotation, engine) pairs in one statement.
+    """
+    if not annotation_embeddings:
+        return 0
+    _validate_embedding_dimensions(db, annotation_embeddings, EmbeddingTarget.ANNOTATION)
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "annotation_id": annotation_embedding.annotation_id,
+            "embedding": annotation_embedding.embedding,
+            "embedding_engine_id": annotation_embedding.embedding_engine_id,
+            "from_user_id": annotation_embedding.from_user_id,
+            "from_team_id": annotation_embedding.from_team_id,
+            "created_at": now,
+        }
+        for annotation_embedding in annotation_embeddings
+    ]
+
+    if db.get_bind().dialect.name == "postgresql":
+        statement = postgresql_insert(AnnotationEmbedding)
+        conflict_target = {"constraint": "ic_annotation_embedding_engine"}
+    else:
+        statement = sqlite_insert(AnnotationEmbedding)
+        conflict_target = {"index_elements": ["annotation_id", "embedding_engine_id"]}
+
+    statement = statement.on_conflict_do_update(
+        **conflict_target,
+        set_={
+            "embedding": statement.excluded.embedding,
+            "from_user_id": statement.excluded.from_user_id,
+            "from_team_id": statement.excluded.from_team_id,
+            "created_at": statement.excluded.created_at,
+        },
+    )
+    db.execute(statement, rows)
+    commit(db)
+    return len(rows)
+
+
 def update_annotation_embedding(
     db: Session,
     annotation_embedding_id: int,
@@ -269,10 +656,10 @@ def update_annotation_embedding(
         .first()
     )
     if db_annotation_embedding:
+        _validate_embedding_dimensions(db, [annotation_embedding], EmbeddingTarget.ANNOTATION)
         for key, value in annotation_embedding.model_dump(exclude_unset=True).items():
             setattr(db_annotation_embedding, key, value)
-        db.commit()
-        db.refresh(db_annotation_embedding)
+        commit(db)
     return db_annotation_embedding
 
 
@@ -284,7 +671,7 @@ def delete_annotation_embedding(db: Session, annotation_embedding_id: int) -> bo
     )
     if db_annotation_embedding:
         db.delete(db_annotation_embedding)
-        db.commit()
+        commit(db)
         return True
     return False
 
@@ -292,15 +679,19 @@ def delete_annotation_embedding(db: Session, annotation_embedding_id: int) -> bo
 def query_annotation_embedding(
     db: Session, query: EmbeddingVectorQuery, skip: int = 0, limit: int = 100
 ) -> List[AnnotationEmbedding]:
-    if len(query.embedding) != settings.ANNOTATION_EMBEDDING_DIMENSION:
-        raise ValueError(
-            f"Invalid embedding length, expected {settings.ANNOTATION_EMBEDDING_DIMENSION} got {len(query.embedding)}"
-        )
+    dimension = get_engine_dimension(db, query.embedding_engine_id, EmbeddingTarget.ANNOTATION)
+    validate_embedding_dimension(query.embedding, dimension)
+
+    apply_search_parameters(db, query.ef_search, query.probes, limit=skip + limit)
 
     return (
         db.query(AnnotationEmbedding)
         .filter(AnnotationEmbedding.embedding_engine_id == query.embedding_engine_id)
-        .order_by(AnnotationEmbedding.embedding.l2_distance(query.embedding))
+        .order_by(
+            embedding_distance(
+                engine_embedding(AnnotationEmbedding.embedding, dimension), query.metric, query.embedding
+            )
+        )
         .offset(skip)
         .limit(limit)
         .all()
@@ -318,9 +709,9 @@ def get_content_embedding(
 
 
 def get_content_embeddings(
-    db: Session, skip: int = 0, limit: int = 100
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[ContentEmbedding]:
-    return db.query(ContentEmbedding).offset(skip).limit(limit).all()
+    return paginate(db.query(ContentEmbedding), ContentEmbedding, skip, limit, cursor).all()
 
 
 def get_annotation_embedding(
@@ -334,6 +725,6 @@ def get_annotation_embedding(
 
 
 def get_annotation_embeddings(
-    db: Session, skip: int = 0, limit: int = 100
+    db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
 ) -> List[AnnotationEmbedding]:
-    return db.query(AnnotationEmbedding).offset(skip).limit(limit).all()
+    return paginate(db.query(AnnotationEmbedding), AnnotationEmbedding, skip, limit, cursor).all()
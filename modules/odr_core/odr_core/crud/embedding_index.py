@@ -0,0 +1,308 @@
+# SPDX-License-Identifier: Apache-2.0
+# Searches always filter on embedding_engine_id, so every engine gets its own
+# partial ANN index instead of one global index that would post-filter results.
+# The embedding columns have no fixed dimension, each index is built over the
+# column cast to the dimension of its engine and searches use the same cast.
+# Indexes can also be built over a halfvec or binary quantized expression of the
+# float32 column, which stays the source for re-ranking the candidates they return.
+import re
+from typing import Dict, List, Optional, Tuple
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import Float, cast, func, text
+from sqlalchemy.dialects.postgresql import BIT
+from sqlalchemy.orm import Session
+from sqlalchemy.types import UserDefinedType
+
+from odr_core.config import settings
+from odr_core.enums import DistanceMetric, EmbeddingTarget, VectorIndexMethod, VectorStorage
+from odr_core.models.embedding import AnnotationEmbedding, ContentEmbedding, EmbeddingEngine
+from odr_core.schemas.embedding import EmbeddingIndex, EmbeddingIndexCreate
+
+
+EMBEDDING_TABLES = {
+    EmbeddingTarget.CONTENT: ContentEmbedding.__tablename__,
+    EmbeddingTarget.ANNOTATION: AnnotationEmbedding.__tablename__,
+}
+
+# dimension of engines that don't record their own
+DEFAULT_DIMENSIONS = {
+    EmbeddingTarget.CONTENT: settings.CONTENT_EMBEDDING_DIMENSION,
+    EmbeddingTarget.ANNOTATION: settings.ANNOTATION_EMBEDDING_DIMENSION,
+}
+
+# pgvector operator and the operator class an index needs to serve it
+DISTANCE_OPERATORS = {
+    DistanceMetric.L2: ("<->", "vector_l2_ops"),
+    DistanceMetric.COSINE: ("<=>", "vector_cosine_ops"),
+    DistanceMetric.INNER_PRODUCT: ("<#>", "vector_ip_ops"),
+}
+
+HALFVEC_OPERATOR_CLASSES = {
+    DistanceMetric.L2: "halfvec_l2_ops",
+    DistanceMetric.COSINE: "halfvec_cosine_ops",
+    DistanceMetric.INNER_PRODUCT: "halfvec_ip_ops",
+}
+
+# binary quantized vectors are always compared by hamming distance, the metric
+# of a bit index is the one its candidates are re-ranked with
+HAMMING_OPERATOR = "<~>"
+
+# halfvec and bit indexes need pgvector 0.7
+QUANTIZED_STORAGE_VERSION = (0, 7)
+
+# largest dimension pgvector can index for each storage
+MAX_INDEX_DIMENSIONS = {
+    VectorStorage.FULL: 2000,
+    VectorStorage.HALF: 4000,
+    VectorStorage.BINARY: 64000,
+}
+
+INDEX_NAME_PATTERN = re.compile(
+    r"^ix_(?P<table>\w+_embeddings)_(?P<method>hnsw|ivfflat)(?:_(?P<storage>halfvec|bit))?"
+    r"_(?P<metric>l2|cosine|inner_product)_engine_(?P<engine_id>\d+)$"
+)
+
+
+class HalfVector(UserDefinedType):
+    cache_ok = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_col_spec(self, **kw):
+        return f"HALFVEC({self.dim})"
+
+
+def engine_dimension(engine: EmbeddingEngine, target: EmbeddingTarget) -> int:
+    return engine.dimension or DEFAULT_DIMENSIONS[target]
+
+
+def get_engine_dimension(db: Session, embedding_engine_id: int, target: EmbeddingTarget) -> int:
+    engine = db.query(EmbeddingEngine).filter(EmbeddingEngine.id == embedding_engine_id).first()
+    if engine is None:
+        raise ValueError("Invalid embedding engine id")
+    return engine_dimension(engine, target)
+
+
+def validate_embedding_dimension(embedding: List[float], dimension: int):
+    if len(embedding) != dimension:
+        raise ValueError(f"Invalid embedding length, expected {dimension} got {len(embedding)}")
+
+
+def engine_embedding(column, dimension: int):
+    """
+    The embedding column cast to an engine's dimension, the expression its indexes are built on.
+    """
+    return cast(column, Vector(dimension))
+
+
+def embedding_distance(column, metric: DistanceMetric, embedding):
+    """
+    Distance expression ordering nearest first; inner product is negated by pgvector.
+    """
+    operator, _ = DISTANCE_OPERATORS[metric]
+    return column.op(operator, return_type=Float)(embedding)
+
+
+def quantized_distance(column, metric: DistanceMetric, embedding, storage: VectorStorage, dimension: int):
+    """
+    Distance expression matching the index expression of the given storage, so
+    the coarse pass of a re-ranked search can be served by that index.
+    """
+    if storage == VectorStorage.FULL:
+        return embedding_distance(engine_embedding(column, dimension), metric, embedding)
+    query = cast(embedding, Vector(dimension))
+    if storage == VectorStorage.HALF:
+        return embedding_distance(cast(column, HalfVector(dimension)), metric, cast(query, HalfVector(dimension)))
+    return cast(func.binary_quantize(column), BIT(dimension)).op(HAMMING_OPERATOR, return_type=Float)(
+        cast(func.binary_quantize(query), BIT(dimension))
+    )
+
+
+def storage_expression(storage: VectorStorage, dimension: int) -> str:
+    if storage == VectorStorage.HALF:
+        return f"(embedding::halfvec({int(dimension)}))"
+    if storage == VectorStorage.BINARY:
+        return f"(binary_quantize(embedding)::bit({int(dimension)}))"
+    return f"(embedding::vector({int(dimension)}))"
+
+
+def embedding_index_name(
+    target: EmbeddingTarget,
+    method: VectorIndexMethod,
+    embedding_engine_id: int,
+    metric: DistanceMetric = DistanceMetric.L2,
+    storage: VectorStorage = VectorStorage.FULL,
+) -> str:
+    storage_part = "" if storage == VectorStorage.FULL else f"_{storage.value}"
+    return (
+        f"ix_{EMBEDDING_TABLES[target]}_{method.value}{storage_part}_{metric.value}"
+        f"_engine_{int(embedding_engine_id)}"
+    )
+
+
+def build_embedding_index_ddl(
+    embedding_engine_id: int, index: EmbeddingIndexCreate, dimension: Optional[int] = None
+) -> str:
+    table = EMBEDDING_TABLES[index.target]
+    dimension = dimension or DEFAULT_DIMENSIONS[index.target]
+    if dimension > MAX_INDEX_DIMENSIONS[index.storage]:
+        raise ValueError(
+            f"{index.storage.value} indexes support up to {MAX_INDEX_DIMENSIONS[index.storage]} dimensions, "
+            f"the engine has {dimension}"
+        )
+    name = embedding_index_name(index.target, index.method, embedding_engine_id, index.metric, index.storage)
+    if index.storage == VectorStorage.HALF:
+        operator_class = HALFVEC_OPERATOR_CLASSES[index.metric]
+    elif index.storage == VectorStorage.BINARY:
+        operator_class = "bit_hamming_ops"
+    else:
+        _, operator_class = DISTANCE_OPERATORS[index.metric]
+    expression = storage_expression(index.storage, dimension)
+
+    if index.method == VectorIndexMethod.HNSW:
+        m = index.m or settings.EMBEDDING_HNSW_M
+        ef_construction = index.ef_construction or settings.EMBEDDING_HNSW_EF_CONSTRUCTION
+        if ef_construction < 2 * m:
+            raise ValueError(
+                f"ef_construction must be at least 2 * m, got m={m} ef_construction={ef_construction}"
+            )
+        parameters = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+    else:
+        lists = index.lists or settings.EMBEDDING_IVFFLAT_LISTS
+        parameters = f"lists = {int(lists)}"
+
+    concurrently = "CONCURRENTLY " if index.concurrently else ""
+    return (
+        f'CREATE INDEX {concurrently}IF NOT EXISTS "{name}" ON "{table}" '
+        f"USING {index.method.value} ({expression} {operator_class}) WITH ({parameters}) "
+        f"WHERE embedding_engine_id = {int(embedding_engine_id)}"
+    )
+
+
+def get_embedding_indexes(
+    db: Session, embedding_engine_id: Optional[int] = None
+) -> List[EmbeddingIndex]:
+    rows = db.execute(
+        text(
+            "SELECT tablename, indexname, indexdef, "
+            "pg_relation_size(format('%I.%I', schemaname, indexname)::regclass) AS size_bytes "
+            "FROM pg_indexes WHERE tablename = ANY(:tables) ORDER BY indexname"
+        ),
+        {"tables": list(EMBEDDING_TABLES.values())},
+    ).all()
+
+    targets = {table: target for target, table in EMBEDDING_TABLES.items()}
+    indexes = []
+    for row in rows:
+        match = INDEX_NAME_PATTERN.match(row.indexname)
+        if match is None:
+            continue
+        engine_id = int(match.group("engine_id"))
+        if embedding_engine_id is not None and engine_id != embedding_engine_id:
+            continue
+        indexes.append(
+            EmbeddingIndex(
+                name=row.indexname,
+                target=targets[row.tablename],
+                method=VectorIndexMethod(match.group("method")),
+                metric=DistanceMetric(match.group("metric")),
+                storage=VectorStorage(match.group("storage") or VectorStorage.FULL),
+                embedding_engine_id=engine_id,
+                definition=row.indexdef,
+                size_bytes=row.size_bytes,
+            )
+        )
+    return indexes
+
+
+def create_embedding_index(
+    db: Session, embedding_engine_id: int, index: EmbeddingIndexCreate
+) -> EmbeddingIndex:
+    engine = db.query(EmbeddingEngine).filter(EmbeddingEngine.id == embedding_engine_id).first()
+    if engine is None:
+        raise ValueError("Invalid embedding engine id")
+    if index.storage != VectorStorage.FULL and pgvector_version(db) < QUANTIZED_STORAGE_VERSION:
+        raise ValueError(f"{index.storage.value} indexes need pgvector 0.7 or later")
+
+    ddl = build_embedding_index_ddl(embedding_engine_id, index, engine_dimension(engine, index.target))
+    if index.concurrently:
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        with db.get_bind().connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            connection.execute(text(ddl))
+    else:
+        db.execute(text(ddl))
+        db.commit()
+
+    name = embedding_index_name(index.target, index.method, embedding_engine_id, index.metric, index.storage)
+    return next(i for i in get_embedding_indexes(db, embedding_engine_id) if i.name == name)
+
+
+def delete_embedding_index(db: Session, embedding_engine_id: int, index_name: str) -> bool:
+    match = INDEX_NAME_PATTERN.match(index_name)
+    if match is None or int(match.group("engine_id")) != embedding_engine_id:
+        return False
+    if not any(i.name == index_name for i in get_embedding_indexes(db, embedding_engine_id)):
+        return False
+
+    db.execute(text(f'DROP INDEX IF EXISTS "{index_name}"'))
+    db.commit()
+    return True
+
+
+_pgvector_versions: Dict[str, Tuple[int, ...]] = {}
+
+
+def pgvector_version(db: Session) -> Tuple[int, ...]:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _pgvector_versions:
+        version = db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'")).scalar()
+        _pgvector_versions[key] = tuple(int(part) for part in re.findall(r"\d+", version or "0"))
+    return _pgvector_versions[key]
+
+
+def apply_search_parameters(
+    db: Session,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    limit: int = 0,
+    filtered: bool = False,
+):
+    """
+    Set the pgvector ANN search knobs for the current transaction.
+
+    HNSW returns at most ef_search rows, so ef_search is raised to cover the
+    requested page when the caller did not set it explicitly. Filters are
+    applied after the index scan, so filtered searches let pgvector 0.8+ keep
+    scanning the index until the page is full, and over-fetch on older versions.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+
+    if filtered and settings.EMBEDDING_ITERATIVE_SCAN != "off" and pgvector_version(db) >= (0, 8):
+        # IVFFlat only supports relaxed ordering, the search re-sorts its hits anyway
+        scans = {"hnsw.iterative_scan": settings.EMBEDDING_ITERATIVE_SCAN, "ivfflat.iterative_scan": "relaxed_order"}
+        for parameter, value in scans.items():
+            db.execute(
+                text("SELECT set_config(:parameter, :value, true)"),
+                {"parameter": parameter, "value": value},
+            )
+    elif filtered:
+        limit *= settings.EMBEDDING_FILTER_OVERFETCH
+
+    if ef_search is None and limit > settings.EMBEDDING_HNSW_EF_SEARCH:
+        ef_search = min(limit, 1000)
+    if ef_search is not None:
+        db.execute(
+            text("SELECT set_config('hnsw.ef_search', :value, true)"),
+            {"value": str(int(ef_search))},
+        )
+    if probes is not None:
+        db.execute(
+            text("SELECT set_config('ivfflat.probes', :value, true)"),
+            {"value": str(int(probes))},
+        )
@@ -0,0 +1,284 @@
+# SPDX-License-Identifier: Apache-2.0
+# Lean similarity search, hits carry ids and distances and only the columns
+# asked for, so responses are not dominated by serializing stored vectors.
+import base64
+from typing import List
+
+import numpy as np
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import ColumnElement, Integer, column, exists, select, true, values
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.crud.embedding_index import (
+    apply_search_parameters,
+    embedding_distance,
+    engine_embedding,
+    get_engine_dimension,
+    quantized_distance,
+    validate_embedding_dimension,
+)
+from odr_core.enums import EmbeddingTarget, VectorStorage
+from odr_core.models.annotation import Annotation
+from odr_core.models.content import Content, ContentSetItem
+from odr_core.models.embedding import AnnotationEmbedding, ContentEmbedding
+from odr_core.schemas.embedding import (
+    AnnotationEmbeddingSearchHit,
+    AnnotationSearchFields,
+    ContentEmbeddingBatchSearchQuery,
+    ContentEmbeddingBatchSearchResult,
+    ContentEmbeddingSearchHit,
+    ContentEmbeddingSearchQuery,
+    ContentSearchFields,
+    ContentSearchFilter,
+    EmbeddingSearchQuery,
+)
+
+CONTENT_SEARCH_COLUMNS = [getattr(Content, name) for name in ContentSearchFields.model_fields]
+ANNOTATION_SEARCH_COLUMNS = [getattr(Annotation, name) for name in AnnotationSearchFields.model_fields]
+
+
+def encode_embedding(embedding) -> str:
+    return base64.b64encode(np.asarray(embedding, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_embedding(encoded: str) -> List[float]:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<f4").tolist()
+
+
+def _candidate_count(query: EmbeddingSearchQuery, skip: int, limit: int) -> int:
+    if query.storage == VectorStorage.FULL:
+        return skip + limit
+    return (skip + limit) * (query.rerank_factor or settings.EMBEDDING_RERANK_FACTOR)
+
+
+def _ranked(
+    model, target_column, query: EmbeddingSearchQuery, dimension: int, skip: int, limit: int, filters=()
+):
+    # the ANN scan runs alone in a subquery so joining the hit fields can't change its plan
+    distance = embedding_distance(
+        engine_embedding(model.embedding, dimension), query.metric, query.embedding
+    ).label("distance")
+    columns = [model.id, target_column, distance]
+    if query.include_embedding:
+        columns.append(model.embedding)
+    conditions = [model.embedding_engine_id == query.embedding_engine_id, *filters]
+    if query.storage != VectorStorage.FULL:
+        # coarse pass on the quantized index, the page is re-ranked on the float32 vectors
+        candidates = (
+            select(model.id)
+            .where(*conditions)
+            .order_by(quantized_distance(model.embedding, query.metric, query.embedding, query.storage, dimension))
+            .limit(_candidate_count(query, skip, limit))
+        )
+        conditions = [model.id.in_(candidates)]
+    return (
+        select(*columns)
+        .where(*conditions)
+        .order_by(distance)
+        .offset(skip)
+        .limit(limit)
+        .subquery("ranked")
+    )
+
+
+def content_search_filters(query: ContentSearchFilter) -> List[ColumnElement[bool]]:
+    content = []
+    if query.status:
+        content.append(Content.status.in_(query.status))
+    if query.license:
+        content.append(Content.license.in_(query.license))
+    if query.from_team_id is not None:
+        content.append(Content.from_team_id == query.from_team_id)
+
+    filters = []
+    if content:
+        filters.append(
+            exists().where(Content.id == ContentEmbedding.content_id, *content)
+        )
+    if query.content_set_id is not None:
+        filters.append(
+            exists().where(
+                ContentSetItem.content_set_id == query.content_set_id,
+                ContentSetItem.content_id == ContentEmbedding.content_id,
+            )
+        )
+    return filters
+
+
+def search_content_embeddings(
+    db: Session, query: ContentEmbeddingSearchQuery, skip: int = 0, limit: int = 100
+) -> List[ContentEmbeddingSearchHit]:
+    dimension = get_engine_dimension(db, query.embedding_engine_id, EmbeddingTarget.CONTENT)
+    validate_embedding_dimension(query.embedding, dimension)
+    filters = content_search_filters(query)
+    apply_search_parameters(
+        db, query.ef_search, query.probes, limit=_candidate_count(query, skip, limit), filtered=bool(filters)
+    )
+
+    ranked = _ranked(ContentEmbedding, ContentEmbedding.content_id, query, dimension, skip, limit, filters)
+    statement = select(ranked).order_by(ranked.c.distance)
+    if query.include_fields:
+        statement = statement.add_columns(*CONTENT_SEARCH_COLUMNS).join(
+            Content, Content.id == ranked.c.content_id
+        )
+
+    hits = []
+    for row in db.execute(statement).mappings():
+        hits.append(
+            ContentEmbeddingSearchHit(
+                id=row["id"],
+                content_id=row["content_id"],
+                distance=row["distance"],
+                embedding=encode_embedding(row["embedding"]) if query.include_embedding else None,
+                content=ContentSearchFields(
+                    **{column.key: row[column.key] for column in CONTENT_SEARCH_COLUMNS}
+                ) if query.include_fields else None,
+            )
+        )
+    return hits
+
+
+def _neighbours(
+    query: ContentEmbeddingBatchSearchQuery,
+    dimension: int,
+    filters: List[ColumnElement[bool]],
+    embedding,
+    exclude_content_id=None,
+):
+    distance = embedding_distance(
+        engine_embedding(ContentEmbedding.embedding, dimension), query.metric, embedding
+    ).label("distance")
+    conditions = [ContentEmbedding.embedding_engine_id == query.embedding_engine_id, *filters]
+    if exclude_content_id is not None:
+        conditions.append(ContentEmbedding.content_id != exclude_content_id)
+    return (
+        select(ContentEmbedding.id, ContentEmbedding.content_id, distance)
+        .where(*conditions)
+        .order_by(distance)
+        .limit(query.k)
+    )
+
+
+def _lateral_neighbours(
+    query: ContentEmbeddingBatchSearchQuery,
+    dimension: int,
+    filters: List[ColumnElement[bool]],
+    query_rows: List[tuple],
+    exclude_self: bool,
+):
+    queries = values(
+        column("query_index", Integer),
+        column("content_id", Integer),
+        column("embedding", Vector(dimension)),
+        name="queries",
+    ).data([(index, content_id, list(embedding)) for index, content_id, embedding in query_rows])
+    # the VALUES parameters arrive untyped and postgres reads them as text, the
+    # distance operators need the query vectors cast back to vector(n)
+    neighbours = _neighbours(
+        query,
+        dimension,
+        filters,
+        engine_embedding(queries.c.embedding, dimension),
+        queries.c.content_id if exclude_self else None,
+    ).lateral("neighbours")
+    return (
+        select(queries.c.query_index, neighbours)
+        .select_from(queries)
+        .join(neighbours, true())
+        .order_by(queries.c.query_index, neighbours.c.distance)
+    )
+
+
+def batch_search_content_embeddings(
+    db: Session, query: ContentEmbeddingBatchSearchQuery
+) -> List[ContentEmbeddingBatchSearchResult]:
+    """
+    Top k neighbours for many query vectors in a single statement. On postgres
+    every query drives its own index scan through a LATERAL join, other
+    databases run the searches one after another in the same session.
+    """
+    if bool(query.embeddings) == bool(query.content_ids):
+        raise ValueError("Give either embeddings or content_ids")
+    dimension = get_engine_dimension(db, query.embedding_engine_id, EmbeddingTarget.CONTENT)
+    for embedding in query.embeddings:
+        validate_embedding_dimension(embedding, dimension)
+
+    filters = content_search_filters(query)
+    apply_search_parameters(db, query.ef_search, query.probes, limit=query.k, filtered=bool(filters))
+
+    by_content = bool(query.content_ids)
+    if by_content:
+        stored = dict(
+            db.query(ContentEmbedding.content_id, ContentEmbedding.embedding).filter(
+                ContentEmbedding.embedding_engine_id == query.embedding_engine_id,
+                ContentEmbedding.content_id.in_(query.content_ids),
+            )
+        )
+        query_rows = [
+            (index, content_id, stored[content_id])
+            for index, content_id in enumerate(query.content_ids)
+            if content_id in stored
+        ]
+    else:
+        query_rows = [(index, None, embedding) for index, embedding in enumerate(query.embeddings)]
+
+    if by_content:
+        results = [
+            ContentEmbeddingBatchSearchResult(
+                query_index=index,
+                content_id=content_id,
+                error=None if content_id in stored else "No embedding stored for content",
+            )
+            for index, content_id in enumerate(query.content_ids)
+        ]
+    else:
+        results = [ContentEmbeddingBatchSearchResult(query_index=index) for index in range(len(query.embeddings))]
+
+    exclude_self = by_content and query.exclude_self
+    if db.get_bind().dialect.name == "postgresql" and query_rows:
+        statement = _lateral_neighbours(query, dimension, filters, query_rows, exclude_self)
+        rows = [(row.query_index, row) for row in db.execute(statement)]
+    else:
+        rows = []
+        for index, content_id, embedding in query_rows:
+            statement = _neighbours(
+                query, dimension, filters, list(embedding), content_id if exclude_self else None
+            )
+            rows.extend((index, row) for row in db.execute(statement))
+
+    for index, row in rows:
+        results[index].hits.append(
+            ContentEmbeddingSearchHit(id=row.id, content_id=row.content_id, distance=row.distance)
+        )
+    return results
+
+
+def search_annotation_embeddings(
+    db: Session, query: EmbeddingSearchQuery, skip: int = 0, limit: int = 100
+) -> List[AnnotationEmbeddingSearchHit]:
+    dimension = get_engine_dimension(db, query.embedding_engine_id, EmbeddingTarget.ANNOTATION)
+    validate_embedding_dimension(query.embedding, dimension)
+    apply_search_parameters(db, query.ef_search, query.probes, limit=_candidate_count(query, skip, limit))
+
+    ranked = _ranked(AnnotationEmbedding, AnnotationEmbedding.annotation_id, query, dimension, skip, limit)
+    statement = select(ranked).order_by(ranked.c.distance)
+    if query.include_fields:
+        statement = statement.add_columns(*ANNOTATION_SEARCH_COLUMNS).join(
+            Annotation, Annotation.id == ranked.c.annotation_id
+        )
+
+    hits = []
+    for row in db.execute(statement).mappings():
+        hits.append(
+            AnnotationEmbeddingSearchHit(
+                id=row["id"],
+                annotation_id=row["annotation_id"],
+                distance=row["distance"],
+                embedding=encode_embedding(row["embedding"]) if query.include_embedding else None,
+                annotation=AnnotationSearchFields(
+                    **{column.key: row[column.key] for column in ANNOTATION_SEARCH_COLUMNS}
+                ) if query.include_fields else None,
+            )
+        )
+    return hits
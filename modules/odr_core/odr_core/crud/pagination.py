@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: Apache-2.0
+# Keyset pagination on (created_at, id). A cursor is the position of the last row
+# of a page, the next page starts strictly after it, so the database seeks into a
+# (..., created_at, id) index instead of reading and discarding the skipped rows.
+import base64
+import json
+from datetime import datetime
+from typing import MutableMapping, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import Query
+
+# response header the list endpoints return the cursor of the next page in
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def paginate(
+    query: Union[Query, Select], model, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> Union[Query, Select]:
+    """
+    Order by (created_at, id) and page by cursor, or by skip when no cursor is given.
+    """
+    query = query.order_by(model.created_at, model.id)
+    if cursor is not None:
+        created_at, row_id = decode_cursor(cursor)
+        return query.filter(tuple_(model.created_at, model.id) > tuple_(created_at, row_id)).limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+def next_cursor(rows: Sequence, limit: int) -> Optional[str]:
+    # a short page is the last one
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def set_next_cursor_header(headers: MutableMapping[str, str], rows: Sequence, limit: int):
+    cursor = next_cursor(rows, limit)
+    if cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = cursor
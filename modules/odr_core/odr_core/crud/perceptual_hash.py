@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: Apache-2.0
+# Hamming radius search over content perceptual hashes. A b-tree on the hash
+# column only answers exact matches, so every process keeps a BK-tree per hash
+# type that is filled from the database, extended with new contents on every
+# search and rebuilt in the background every PERCEPTUAL_HASH_INDEX_REBUILD_SECONDS.
+import threading
+import time
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.enums import PerceptualHashType
+from odr_core.models.content import Content
+from odr_core.perceptual_hash import BKTree, parse_hash
+from odr_core.schemas.duplicate import PerceptualHashSearchHit
+
+
+class PerceptualHashIndex:
+    """
+    Searches and the per search query for new contents hold the lock only to read
+    and extend the tree. Full builds load every hash outside of it and swap the new
+    tree in, the periodic rebuild in a background thread while searches keep using
+    the current tree.
+    """
+
+    def __init__(self, column, clock: Callable[[], float] = time.monotonic, background: bool = True):
+        self.column = column
+        self._clock = clock
+        self._background = background
+        self._lock = Lock()
+        self._build_lock = Lock()
+        self._tree: Optional[BKTree] = None
+        self._last_content_id = 0
+        self._built_at: Optional[float] = None
+        # bumped by reset so a rebuild that started before it is not swapped in
+        self._generation = 0
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    @property
+    def size(self) -> int:
+        return self._tree.size if self._tree is not None else 0
+
+    def _load(self, db: Session, after_content_id: int) -> List[Tuple[int, int]]:
+        # contents committed out of id order are only seen after the next rebuild
+        return (
+            db.query(Content.id, self.column)
+            .filter(Content.id > after_content_id, self.column.isnot(None))
+            .order_by(Content.id)
+            .all()
+        )
+
+    def _build(self, db: Session, generation: int):
+        # a full build drops contents that were deleted or had their hash changed
+        built_at = self._clock()
+        rows = self._load(db, 0)
+        tree = BKTree((bits, content_id) for content_id, bits in rows)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._tree = tree
+            self._last_content_id = rows[-1][0] if rows else 0
+            self._built_at = built_at
+
+    def _rebuild(self, bind, generation: int):
+        try:
+            with Session(bind=bind) as db:
+                self._build(db, generation)
+        except Exception as e:
+            logger.warning(f"Could not rebuild the perceptual hash index of {self.column.key}: {e}")
+        finally:
+            with self._lock:
+                self._rebuild_thread = None
+
+    def wait_for_rebuild(self, timeout: Optional[float] = None):
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _refresh(self, db: Session):
+        if self._tree is None:
+            # nothing to search yet, one request builds the tree and the others wait for it
+            with self._build_lock:
+                if self._tree is None:
+                    self._build(db, self._generation)
+        rebuild = None
+        with self._lock:
+            if self._tree is None:
+                return
+            stale = self._clock() - self._built_at >= settings.PERCEPTUAL_HASH_INDEX_REBUILD_SECONDS
+            if stale and self._rebuild_thread is None:
+                rebuild = self._rebuild_thread = threading.Thread(
+                    target=self._rebuild,
+                    args=(db.get_bind(), self._generation),
+                    name="perceptual-hash-index",
+                    daemon=True,
+                )
+            last_content_id = self._last_content_id
+        if rebuild is not None:
+            if self._background:
+                rebuild.start()
+            else:
+                rebuild.run()
+        rows = self._load(db, last_content_id)
+        if not rows:
+            return
+        with self._lock:
+            if self._tree is None:
+                return
+            # another search or a rebuild may have added some of the rows meanwhile
+            for content_id, bits in rows:
+                if content_id > self._last_content_id:
+                    self._tree.add(bits, content_id)
+            self._last_content_id = max(self._last_content_id, rows[-1][0])
+
+    def search(self, db: Session, value: int, max_distance: int) -> List[PerceptualHashSearchHit]:
+        self._refresh(db)
+        with self._lock:
+            matches = self._tree.search(value, max_distance) if self._tree is not None else []
+        return [PerceptualHashSearchHit(content_id=content_id, distance=distance) for content_id, distance in matches]
+
+    def reset(self):
+        with self._lock:
+            self._tree = None
+            self._last_content_id = 0
+            self._built_at = None
+            self._generation += 1
+
+
+content_hash_indexes: Dict[PerceptualHashType, PerceptualHashIndex] = {
+    PerceptualHashType.PHASH: PerceptualHashIndex(Content.phash64),
+    PerceptualHashType.DHASH: PerceptualHashIndex(Content.dhash64),
+}
+
+
+def search_perceptual_hash(
+    db: Session,
+    value: str,
+    hash_type: PerceptualHashType = PerceptualHashType.PHASH,
+    max_distance: Optional[int] = None,
+) -> List[PerceptualHashSearchHit]:
+    """
+    Contents whose hash is within max_distance bits of value, nearest first.
+    """
+    bits = parse_hash(value)
+    if bits is None:
+        raise ValueError("Perceptual hash must be 16 hex digits")
+    if max_distance is None:
+        max_distance = settings.PERCEPTUAL_HASH_MAX_DISTANCE
+    return content_hash_indexes[hash_type].search(db, bits, max_distance)
@@ -0,0 +1,50 @@
+# SPDX-License-Identifier: Apache-2.0
+# CRUD functions end their writes with commit(db). Inside a unit_of_work(db) block
+# that only flushes, so CRUD calls composed in the block share one transaction,
+# committed once when the block exits and rolled back as a whole when it raises.
+#
+# Flushing assigns primary keys, and server defaults such as created_at come back
+# with the INSERT (RETURNING), so the written rows need no refresh. Columns set by
+# the database on UPDATE are expired instead and only loaded when they are read.
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy.orm import Session
+
+_UNIT_OF_WORK = "odr_unit_of_work"
+
+
+def in_unit_of_work(db: Session) -> bool:
+    return db.info.get(_UNIT_OF_WORK, False)
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Run the CRUD calls of the block in one transaction. A unit of work opened
+    inside another one joins it, the outer block commits.
+    """
+    if in_unit_of_work(db):
+        yield db
+        return
+
+    db.info[_UNIT_OF_WORK] = True
+    try:
+        yield db
+        db.info.pop(_UNIT_OF_WORK)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        db.info.pop(_UNIT_OF_WORK, None)
+
+
+def commit(db: Session):
+    """
+    Commit the changes of a CRUD call, inside a unit of work only flush them.
+    """
+    if in_unit_of_work(db):
+        db.flush()
+    else:
+        db.commit()
@@ -1,16 +1,154 @@
 # SPDX-License-Identifier: Apache-2.0
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from odr_core.config import settings
+import time
+from threading import Lock
+from typing import Any, AsyncIterator, Dict
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from odr_core.config import Settings, settings
+from odr_core.metrics import Histogram
+from odr_core.read_replicas import ReplicaRouter, pinned_to_primary, record_write
+
+POOL_CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 30000)
+POOLERS = ("pgbouncer",)
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+# connect arguments that turn off server side prepared statements, which do not
+# survive PgBouncer handing the next transaction to another server connection,
+# psycopg2 never prepares statements and asyncpg always does, so its statements
+# get names that cannot collide with another client's on the same server connection
+PREPARED_STATEMENT_CONNECT_ARGS = {
+    "psycopg": {"prepare_threshold": None},
+    "asyncpg": {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": _unique_statement_name,
+    },
+}
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkout_wait_ms = Histogram(POOL_CHECKOUT_WAIT_BUCKETS_MS)
+        self.timeouts = 0
+        self._lock = Lock()
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long every checkout waited for a connection,
+    including the time to open a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.checkout_wait_ms.observe((time.perf_counter() - start) * 1000)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(config: Settings, url: str) -> Dict[str, Any]:
+    if config.POSTGRES_POOLER is not None and config.POSTGRES_POOLER not in POOLERS:
+        raise ValueError(f"Unknown POSTGRES_POOLER {config.POSTGRES_POOLER!r}, expected one of {POOLERS}")
+
+    dialect_url = make_url(url)
+    options: Dict[str, Any] = {"pool_pre_ping": config.POSTGRES_POOL_PRE_PING}
+    if config.POSTGRES_POOL_SIZE > 0:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if dialect_url.get_dialect().is_async else InstrumentedQueuePool,
+            pool_size=config.POSTGRES_POOL_SIZE,
+            max_overflow=config.POSTGRES_MAX_OVERFLOW,
+            pool_timeout=config.POSTGRES_POOL_TIMEOUT,
+            pool_recycle=config.POSTGRES_POOL_RECYCLE,
+        )
+    else:
+        # a pool size of 0 leaves all pooling to the external pooler
+        options["poolclass"] = NullPool
+
+    if config.POSTGRES_POOLER == "pgbouncer":
+        driver = dialect_url.get_driver_name()
+        options["connect_args"] = dict(PREPARED_STATEMENT_CONNECT_ARGS.get(driver, {}))
+    return options
+
+
+def asyncpg_url(url: str) -> str:
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def pool_stats(pool: Pool) -> Dict:
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pooled": False}
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "pooled": True,
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": checked_out / capacity if capacity > 0 else 0.0,
+        "timeouts": pool.metrics.timeouts,
+        "checkout_wait_ms": pool.metrics.checkout_wait_ms.snapshot(),
+    }
+
 
 # Create SQLAlchemy engine
 url = settings.get_db_url()
 
-engine = create_engine(settings.get_db_url())
+engine = create_engine(url, **engine_options(settings, url))
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncpg engine for async endpoints, it has a pool of its own
+async_url = settings.get_async_db_url()
+
+async_engine = create_async_engine(async_url, **engine_options(settings, async_url))
+
+# loaded attributes stay readable after commit, an AsyncSession cannot lazy load them
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# read replicas, every replica gets a sync and an async engine with pools of their own
+read_urls = settings.get_read_replica_urls()
+read_engines = [create_engine(url, **engine_options(settings, url)) for url in read_urls]
+async_read_engines = [
+    create_async_engine(asyncpg_url(url), **engine_options(settings, asyncpg_url(url))) for url in read_urls
+]
+read_router = ReplicaRouter(read_engines, settings.POSTGRES_READ_ROUTING)
+async_read_router = ReplicaRouter(async_read_engines, settings.POSTGRES_READ_ROUTING)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_commit(session):
+    record_write()
+
 
 # Dependency to get DB session
 def get_db():
@@ -19,3 +157,34 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_engine(router: ReplicaRouter):
+    """
+    Replica engine for a read-only session, None for the primary when no replica
+    is configured or the client is inside its read-your-writes window.
+    """
+    if pinned_to_primary(settings.POSTGRES_READ_YOUR_WRITES_SECONDS):
+        return None
+    return router.choose()
+
+
+# Dependency to get a read-only DB session
+def get_read_db():
+    engine = read_engine(read_router)
+    db = SessionLocal() if engine is None else SessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    engine = read_engine(async_read_router)
+    async with (AsyncSessionLocal() if engine is None else AsyncSessionLocal(bind=engine)) as db:
+        yield db
@@ -0,0 +1,108 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Coalesces concurrent embedding requests of one API worker into batches.
+
+FastAPI runs the sync endpoints in a threadpool, so concurrent requests for
+the same engine end up in separate single input model calls. Each request is
+queued per (kind, model) instead and a dispatcher thread embeds the queue in
+one call once max_batch inputs are waiting or the oldest request has waited
+max_wait_ms, then hands every caller its own rows.
+"""
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from queue import Empty, Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List, Tuple
+
+from odr_core.embedding_server import EmbeddingKind
+from odr_core.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+@dataclass
+class _QueuedRequest:
+    inputs: List[Any]
+    queued_at: float
+    future: Future = field(default_factory=Future, repr=False)
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed: Callable[[EmbeddingKind, str, List[Any]], List[List[float]]],
+        max_batch: int,
+        max_wait_ms: float,
+    ):
+        self.embed = embed
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self._queues: Dict[Tuple[EmbeddingKind, str], Queue] = {}
+        self._lock = Lock()
+
+    def _queue(self, key: Tuple[EmbeddingKind, str]) -> Queue:
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = Queue()
+                Thread(target=self._dispatch, args=(key, queue), name=f"embedding-batcher-{key[1]}", daemon=True).start()
+            return queue
+
+    def _dispatch(self, key: Tuple[EmbeddingKind, str], queue: Queue):
+        while True:
+            batch = [queue.get()]
+            count = len(batch[0].inputs)
+            deadline = batch[0].queued_at + self.max_wait
+            while count < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = queue.get(timeout=timeout)
+                except Empty:
+                    break
+                batch.append(request)
+                count += len(request.inputs)
+            self._run(key, batch)
+
+    def _run(self, key: Tuple[EmbeddingKind, str], batch: List[_QueuedRequest]):
+        started = time.monotonic()
+        for request in batch:
+            self.queue_wait_ms.observe((started - request.queued_at) * 1000)
+        self.batch_size.observe(sum(len(request.inputs) for request in batch))
+        self._embed_batch(key, batch)
+
+    def _embed_batch(self, key: Tuple[EmbeddingKind, str], batch: List[_QueuedRequest]):
+        inputs = [data for request in batch for data in request.inputs]
+        try:
+            embeddings = self.embed(*key, inputs)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].future.set_exception(e)
+                return
+            # one bad input must not fail the requests it was batched with
+            for request in batch:
+                self._embed_batch(key, [request])
+            return
+
+        offset = 0
+        for request in batch:
+            request.future.set_result(embeddings[offset:offset + len(request.inputs)])
+            offset += len(request.inputs)
+
+    def submit(self, kind: EmbeddingKind, model_name: str, inputs: List[Any]) -> List[List[float]]:
+        if not inputs:
+            return []
+        request = _QueuedRequest(inputs, time.monotonic())
+        self._queue((kind, model_name)).put(request)
+        return request.future.result()
+
+    def stats(self) -> Dict:
+        return {
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
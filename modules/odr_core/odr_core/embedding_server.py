@@ -0,0 +1,351 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Local embedding server shared by all API workers.
+
+One process owns the fastembed models and serves embedding requests over a
+Unix socket, so each model is loaded once instead of once per uvicorn worker.
+Concurrent requests for the same model and kind are coalesced into micro
+batches, flushed when EMBEDDING_SERVER_MAX_BATCH inputs are queued or after
+EMBEDDING_SERVER_MAX_WAIT_MS, whichever comes first.
+
+    python -m odr_core.embedding_server --socket /tmp/odr-embedding.sock
+
+Clients that cannot connect to the socket raise EmbeddingServerUnavailable, and
+the CRUD functions then embed in their own process until the server is back.
+
+Every message is a sequence of frames, a 4 byte big endian length followed by
+the payload. A request is a JSON header {"kind", "model", "count"} followed by
+count frames holding the utf-8 text or the encoded image. The response is a
+JSON header {"error", "shape"} followed, on success, by one frame with the
+embeddings as little endian float32.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastembed import ImageEmbedding, TextEmbedding
+from loguru import logger
+
+from odr_core.config import settings
+from odr_core.enums import EmbeddingEngineType
+from odr_core.model_cache import ModelCache, onnx_model_size
+
+FRAME_HEADER = struct.Struct(">I")
+
+
+class EmbeddingKind(str, Enum):
+    QUERY = "query"
+    PASSAGE = "passage"
+    IMAGE = "image"
+
+
+class EmbeddingServerError(ValueError):
+    pass
+
+
+class EmbeddingServerUnavailable(ConnectionError):
+    pass
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return await reader.readexactly(length)
+
+
+def _recv_exactly(sock: socket.socket, length: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < length:
+        chunk = sock.recv(length - len(buffer))
+        if not chunk:
+            raise ConnectionError("Embedding server closed the connection")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket) -> bytes:
+    (length,) = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))
+    return _recv_exactly(sock, length)
+
+
+@dataclass
+class _PendingRequest:
+    inputs: List[bytes]
+    future: asyncio.Future = field(repr=False)
+
+
+class EmbeddingServer:
+    def __init__(
+        self,
+        socket_path: str,
+        max_batch: int = settings.EMBEDDING_SERVER_MAX_BATCH,
+        max_wait_ms: float = settings.EMBEDDING_SERVER_MAX_WAIT_MS,
+        workers: int = settings.EMBEDDING_SERVER_WORKERS,
+    ):
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embedding")
+        self.models = ModelCache(
+            settings.EMBEDDING_MODEL_CACHE_TTL,
+            max_bytes=settings.EMBEDDING_MODEL_CACHE_MAX_BYTES,
+            sizeof=lambda key, model: onnx_model_size(
+                settings.MODEL_CACHE_DIR, key[1], model.list_supported_models()
+            ),
+        )
+        self._queues: Dict[Tuple[EmbeddingKind, str], asyncio.Queue] = {}
+        self._batchers: List[asyncio.Task] = []
+
+    def load_model(self, kind: EmbeddingKind, model_name: str) -> TextEmbedding | ImageEmbedding:
+        model_class = ImageEmbedding if kind == EmbeddingKind.IMAGE else TextEmbedding
+        # text and image models are cached apart, a query and a passage request share one model
+        key = (model_class.__name__, model_name)
+        return self.models.get_or_load(key, lambda: model_class(model_name, cache_dir=settings.MODEL_CACHE_DIR))
+
+    def embed(self, kind: EmbeddingKind, model_name: str, inputs: List[bytes]) -> np.ndarray:
+        model = self.load_model(kind, model_name)
+        if kind == EmbeddingKind.IMAGE:
+            embeddings = model.embed([BytesIO(data) for data in inputs], batch_size=len(inputs))
+        elif kind == EmbeddingKind.QUERY:
+            embeddings = model.query_embed([data.decode() for data in inputs])
+        else:
+            embeddings = model.passage_embed([data.decode() for data in inputs], batch_size=len(inputs))
+        return np.asarray(list(embeddings), dtype=np.float32)
+
+    async def _embed_batch(self, key: Tuple[EmbeddingKind, str], batch: List[_PendingRequest]):
+        loop = asyncio.get_running_loop()
+        inputs = [data for request in batch for data in request.inputs]
+        try:
+            embeddings = await loop.run_in_executor(self.executor, self.embed, *key, inputs)
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(e)
+                return
+            # one bad input must not fail the requests it was batched with
+            for request in batch:
+                await self._embed_batch(key, [request])
+            return
+
+        offset = 0
+        for request in batch:
+            # the future is cancelled when its client disconnected while waiting
+            if not request.future.done():
+                request.future.set_result(embeddings[offset:offset + len(request.inputs)])
+            offset += len(request.inputs)
+
+    async def _batch_loop(self, key: Tuple[EmbeddingKind, str], queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            count = len(batch[0].inputs)
+            deadline = loop.time() + self.max_wait
+            while count < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                count += len(request.inputs)
+            await self._embed_batch(key, batch)
+
+    async def submit(self, kind: EmbeddingKind, model_name: str, inputs: List[bytes]) -> np.ndarray:
+        key = (kind, model_name)
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = asyncio.Queue()
+            self._batchers.append(asyncio.get_running_loop().create_task(self._batch_loop(key, queue)))
+        future = asyncio.get_running_loop().create_future()
+        await queue.put(_PendingRequest(inputs, future))
+        return await future
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header = json.loads(await read_frame(reader))
+                except asyncio.IncompleteReadError:
+                    break
+                inputs = [await read_frame(reader) for _ in range(int(header["count"]))]
+                try:
+                    embeddings = await self.submit(EmbeddingKind(header["kind"]), header["model"], inputs)
+                except Exception as e:
+                    writer.write(encode_frame(json.dumps({"error": str(e) or type(e).__name__}).encode()))
+                else:
+                    writer.write(encode_frame(json.dumps({"error": None, "shape": embeddings.shape}).encode()))
+                    writer.write(encode_frame(embeddings.astype("<f4").tobytes()))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def prewarm(self, models: List[Tuple[EmbeddingKind, str]]):
+        for kind, model_name in models:
+            try:
+                self.load_model(kind, model_name)
+                logger.info(f"Loaded embedding model {model_name}")
+            except Exception as e:
+                logger.error(f"Failed to load embedding model {model_name}: {e}")
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self.handle_connection, path=self.socket_path)
+        logger.info(f"Embedding server listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+
+class EmbeddingServerClient:
+    """
+    Blocking client used from the sync CRUD functions, one connection per thread.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = settings.EMBEDDING_SERVER_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.available = True
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _request(self, sock: socket.socket, kind: EmbeddingKind, model_name: str, inputs: List[bytes]):
+        header = json.dumps({"kind": kind.value, "model": model_name, "count": len(inputs)}).encode()
+        sock.sendall(encode_frame(header) + b"".join(encode_frame(data) for data in inputs))
+        response = json.loads(recv_frame(sock))
+        if response["error"] is not None:
+            raise EmbeddingServerError(response["error"])
+        embeddings = np.frombuffer(recv_frame(sock), dtype="<f4")
+        return embeddings.reshape(response["shape"]).tolist()
+
+    def embed(self, kind: EmbeddingKind, model_name: str, inputs: List[bytes]) -> List[List[float]]:
+        if not inputs:
+            return []
+        sock: Optional[socket.socket] = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                return self._request(sock, kind, model_name, inputs)
+            except OSError:
+                # the server restarted since this thread last used the connection
+                sock.close()
+        try:
+            sock = self._local.sock = self._connect()
+        except OSError as e:
+            self._local.sock = None
+            if self.available:
+                self.available = False
+                logger.warning(f"Embedding server on {self.socket_path} is not reachable: {e}")
+            raise EmbeddingServerUnavailable(str(e)) from e
+        if not self.available:
+            self.available = True
+            logger.info(f"Embedding server on {self.socket_path} is reachable again")
+        try:
+            return self._request(sock, kind, model_name, inputs)
+        except OSError:
+            sock.close()
+            self._local.sock = None
+            raise
+
+
+_client: Optional[EmbeddingServerClient] = None
+
+
+def get_embedding_server_client() -> Optional[EmbeddingServerClient]:
+    """
+    Client for the configured embedding server, None when models run in process.
+    """
+    global _client
+    if not settings.EMBEDDING_SERVER_SOCKET:
+        return None
+    if _client is None or _client.socket_path != settings.EMBEDDING_SERVER_SOCKET:
+        _client = EmbeddingServerClient(settings.EMBEDDING_SERVER_SOCKET)
+    return _client
+
+
+def wait_for_embedding_server(
+    socket_path: str, timeout: float = settings.EMBEDDING_SERVER_START_TIMEOUT, interval: float = 0.5
+) -> bool:
+    """
+    Wait until the server accepts connections on the socket, False after the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+            return True
+        except OSError:
+            if time.monotonic() >= deadline:
+                return False
+        finally:
+            sock.close()
+        time.sleep(interval)
+
+
+def supported_engine_models() -> List[Tuple[EmbeddingKind, str]]:
+    from odr_core.crud.embedding import get_supported_embedding_engines
+    from odr_core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return [
+            (EmbeddingKind.IMAGE if engine.type == EmbeddingEngineType.IMAGE else EmbeddingKind.PASSAGE, engine.name)
+            for engine in get_supported_embedding_engines(db)
+        ]
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared embedding model server")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SERVER_SOCKET, help="Unix socket path")
+    parser.add_argument("--no-prewarm", action="store_true", help="Load models on first use only")
+    parser.add_argument(
+        "--wait",
+        type=float,
+        nargs="?",
+        const=settings.EMBEDDING_SERVER_START_TIMEOUT,
+        metavar="SECONDS",
+        help="Wait until a server accepts connections on the socket instead of serving",
+    )
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("--socket or EMBEDDING_SERVER_SOCKET is required")
+
+    if args.wait is not None:
+        if not wait_for_embedding_server(args.socket, args.wait):
+            logger.warning(f"No embedding server on {args.socket} after {args.wait}s")
+            sys.exit(1)
+        return
+
+    server = EmbeddingServer(args.socket)
+    if not args.no_prewarm:
+        server.prewarm(supported_engine_models())
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -48,3 +48,31 @@ class EmbeddingEngineType(str, Enum):
     VOICE = "voice"
     MUSIC = "music"
     TEXT = "text"
+
+
+class EmbeddingTarget(str, Enum):
+    CONTENT = "content"
+    ANNOTATION = "annotation"
+
+
+class VectorIndexMethod(str, Enum):
+    HNSW = "hnsw"
+    IVFFLAT = "ivfflat"
+
+
+class DistanceMetric(str, Enum):
+    L2 = "l2"
+    COSINE = "cosine"
+    INNER_PRODUCT = "inner_product"
+
+
+class VectorStorage(str, Enum):
+    # named after the pgvector type the embeddings are indexed as
+    FULL = "vector"
+    HALF = "halfvec"
+    BINARY = "bit"
+
+
+class PerceptualHashType(str, Enum):
+    PHASH = "phash"
+    DHASH = "dhash"
@@ -0,0 +1,326 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Load a JSONL content dump, as written by hugging_face/combine_json.py, into the database.
+
+The file is streamed in batches. Every batch is sent with COPY FROM STDIN into a
+temporary staging table of one jsonb document per line, and contents, sources,
+authors, annotations and content embeddings are then created with one
+INSERT ... SELECT per table. Memory use does not grow with the file, and every
+batch commits on its own.
+
+Each item gets a content source that identifies it: hugging_face
+"<dataset>/<split>/<row>" when the item has Hugging Face metadata, otherwise a
+path of the item id. Items whose source is already stored are skipped, so an
+interrupted load can simply be run again. Source values are unique across types,
+so items whose value is stored with another source type are skipped as conflicts.
+Placeholder hashes ("tbd") are stored as NULL. Embeddings are matched to embedding
+engines by the engine name, embeddings of unknown models or of the wrong
+dimension are skipped.
+
+    python -m odr_core.jsonl_loader hugging_face/datasets/<dataset>/metadata.jsonl --from-user-id 1
+"""
+import argparse
+import csv
+import io
+import json
+from dataclasses import dataclass, fields
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.database import SessionLocal
+from odr_core.enums import ContentSourceType
+
+DEFAULT_BATCH_SIZE = 5000
+# large fields that are not stored, like the base64 image some dumps carry
+DROPPED_FIELDS = ("image",)
+
+
+@dataclass
+class LoadStats:
+    lines: int = 0
+    malformed: int = 0
+    skipped: int = 0
+    conflicts: int = 0
+    contents: int = 0
+    sources: int = 0
+    authors: int = 0
+    annotations: int = 0
+    embeddings: int = 0
+    skipped_embeddings: int = 0
+
+    def add(self, other: "LoadStats"):
+        for field in fields(self):
+            setattr(self, field.name, getattr(self, field.name) + getattr(other, field.name))
+
+
+def item_source(item: dict) -> Tuple[ContentSourceType, str]:
+    meta = item.get("meta") or {}
+    if meta.get("hf-dataset-name") is not None and meta.get("hf-dataset-id") is not None:
+        split = meta.get("hf-dataset-split") or "train"
+        return ContentSourceType.HUGGING_FACE, f"{meta['hf-dataset-name']}/{split}/{meta['hf-dataset-id']}"
+    return ContentSourceType.PATH, str(item["id"])
+
+
+def staging_rows(lines: Iterable[str], stats: LoadStats) -> Iterator[List[str]]:
+    """
+    (line number, source type, source value, item json) for every valid line.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        stats.lines += 1
+        try:
+            item = json.loads(line)
+            source_type, source_value = item_source(item)
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            stats.malformed += 1
+            logger.warning(f"Skipping line {number}: {e}")
+            continue
+        for name in DROPPED_FIELDS:
+            item.pop(name, None)
+        yield [str(number), source_type.name, source_value, json.dumps(item, separators=(",", ":"))]
+
+
+class CopyStream:
+    """
+    Read only file object over CSV rows, COPY pulls it in chunks so only the
+    rows of the current chunk are held in memory.
+    """
+
+    def __init__(self, rows: Iterable[List[str]]):
+        self._rows = iter(rows)
+        self._pending = ""
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line, lineterminator="\n")
+
+    def _next_line(self) -> Optional[str]:
+        row = next(self._rows, None)
+        if row is None:
+            return None
+        self._line.seek(0)
+        self._line.truncate()
+        self._writer.writerow(row)
+        return self._line.getvalue()
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._pending) < size:
+            line = self._next_line()
+            if line is None:
+                break
+            self._pending += line
+        if size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+STAGING_TABLES = [
+    """
+    CREATE TEMP TABLE IF NOT EXISTS odr_load_items (
+        line bigint, source_type text, source_value text, item jsonb
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS odr_load_contents (
+        content_id integer, source_type text, source_value text, item jsonb
+    ) ON COMMIT DELETE ROWS
+    """,
+]
+
+
+def _json_array(expression: str) -> str:
+    return f"CASE jsonb_typeof({expression}) WHEN 'array' THEN {expression} ELSE '[]'::jsonb END"
+
+
+def _hash_bits(field: str) -> str:
+    return (
+        f"CASE WHEN item->>'{field}' ~* '^[0-9a-f]{{16}}$' "
+        f"THEN ('x' || (item->>'{field}'))::bit(64)::bigint END"
+    )
+
+
+# ids are drawn up front so the child tables can be filled without RETURNING,
+# only the first line of a source value within the batch is loaded. content_sources
+# values are unique, so a value stored with any type is not loaded again
+SELECT_NEW_CONTENTS = """
+INSERT INTO odr_load_contents (content_id, source_type, source_value, item)
+SELECT nextval(pg_get_serial_sequence('contents', 'id')), source_type, source_value, item
+FROM (
+    SELECT DISTINCT ON (source_value) line, source_type, source_value, item
+    FROM odr_load_items
+    ORDER BY source_value, line
+) items
+WHERE NOT EXISTS (SELECT 1 FROM content_sources WHERE content_sources.value = items.source_value)
+ORDER BY line
+"""
+
+# items whose source value is stored with another type, not a previous load of the item
+COUNT_CONFLICTS = """
+SELECT count(DISTINCT items.source_value)
+FROM odr_load_items items
+JOIN content_sources ON content_sources.value = items.source_value
+WHERE content_sources.type::text <> items.source_type
+"""
+
+INSERT_CONTENTS = f"""
+INSERT INTO contents (
+    id, name, type, hash, phash, dhash, phash64, dhash64, url, width, height, format, size,
+    status, license, license_url, flags, meta, from_user_id, from_team_id, created_at, updated_at
+)
+SELECT
+    content_id,
+    item->>'name',
+    upper(coalesce(item->>'type', 'image'))::contenttype,
+    nullif(item->>'hash', 'tbd'),
+    nullif(item->>'phash', 'tbd'),
+    nullif(item->>'dhash', 'tbd'),
+    {_hash_bits('phash')},
+    {_hash_bits('dhash')},
+    ARRAY(SELECT url FROM jsonb_array_elements_text({_json_array("item->'urls'")}) AS url WHERE url <> ''),
+    (item->>'width')::integer,
+    (item->>'height')::integer,
+    item->>'format',
+    (item->>'size')::integer,
+    upper(coalesce(item->>'status', 'pending'))::contentstatus,
+    item->>'license',
+    nullif(item->>'licenseUrl', ''),
+    coalesce((item->>'flags')::integer, 0),
+    (item->'meta')::json,
+    :from_user_id,
+    :from_team_id,
+    coalesce((item->>'createdAt')::timestamptz, now()),
+    coalesce((item->>'updatedAt')::timestamptz, now())
+FROM odr_load_contents
+"""
+
+INSERT_SOURCES = """
+INSERT INTO content_sources (content_id, type, value, source_metadata, created_at, updated_at)
+SELECT content_id, source_type::contentsourcetype, source_value, (item->'meta')::text, now(), now()
+FROM odr_load_contents
+"""
+
+INSERT_AUTHORS = f"""
+INSERT INTO content_authors (content_id, name, url, created_at, updated_at)
+SELECT content_id, author->>'name', nullif(author->>'url', ''), now(), now()
+FROM odr_load_contents
+CROSS JOIN LATERAL jsonb_array_elements({_json_array("item->'contentAuthor'")}) AS author
+WHERE author->>'name' IS NOT NULL
+"""
+
+INSERT_ANNOTATIONS = f"""
+INSERT INTO annotations (
+    content_id, annotation, manually_adjusted, overall_rating, from_user_id, from_team_id, created_at, updated_at
+)
+SELECT
+    content_id,
+    (annotation->'annotation')::json,
+    coalesce((annotation->>'manuallyAdjusted')::boolean, false),
+    (annotation->>'overallRating')::double precision,
+    :from_user_id,
+    :from_team_id,
+    coalesce((annotation->>'createdAt')::timestamptz, now()),
+    coalesce((annotation->>'updatedAt')::timestamptz, now())
+FROM odr_load_contents
+CROSS JOIN LATERAL jsonb_array_elements({_json_array("item->'annotations'")}) AS annotation
+"""
+
+INSERT_EMBEDDINGS = f"""
+INSERT INTO content_embeddings (content_id, embedding, embedding_engine_id, from_user_id, from_team_id, created_at)
+SELECT content_id, (embedding->'embedding')::text::vector, embedding_engines.id, :from_user_id, :from_team_id, now()
+FROM odr_load_contents
+CROSS JOIN LATERAL jsonb_array_elements({_json_array("item->'embeddings'")}) AS embedding
+JOIN embedding_engines ON embedding_engines.name = embedding->>'model'
+WHERE CASE jsonb_typeof(embedding->'embedding')
+    WHEN 'array' THEN jsonb_array_length(embedding->'embedding')
+END = coalesce(embedding_engines.dimension, :content_dimension)
+ON CONFLICT (content_id, embedding_engine_id) DO NOTHING
+"""
+
+COUNT_EMBEDDINGS = f"""
+SELECT count(*)
+FROM odr_load_contents
+CROSS JOIN LATERAL jsonb_array_elements({_json_array("item->'embeddings'")}) AS embedding
+"""
+
+
+def load_batch(db: Session, rows: Iterable[List[str]], from_user_id: int, from_team_id: Optional[int]) -> LoadStats:
+    stats = LoadStats()
+    for statement in STAGING_TABLES:
+        db.execute(text(statement))
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY odr_load_items (line, source_type, source_value, item) FROM STDIN WITH (FORMAT csv)",
+            CopyStream(rows),
+        )
+    finally:
+        cursor.close()
+    staged = db.execute(text("SELECT count(*) FROM odr_load_items")).scalar_one()
+
+    parameters = {
+        "from_user_id": from_user_id,
+        "from_team_id": from_team_id,
+        "content_dimension": settings.CONTENT_EMBEDDING_DIMENSION,
+    }
+    stats.contents = db.execute(text(SELECT_NEW_CONTENTS)).rowcount
+    stats.conflicts = db.execute(text(COUNT_CONFLICTS)).scalar_one()
+    if stats.conflicts:
+        logger.warning(f"Skipping {stats.conflicts} items whose source value is stored with another source type")
+    stats.skipped = staged - stats.contents - stats.conflicts
+    db.execute(text(INSERT_CONTENTS), parameters)
+    stats.sources = db.execute(text(INSERT_SOURCES)).rowcount
+    stats.authors = db.execute(text(INSERT_AUTHORS)).rowcount
+    stats.annotations = db.execute(text(INSERT_ANNOTATIONS), parameters).rowcount
+    stats.embeddings = db.execute(text(INSERT_EMBEDDINGS), parameters).rowcount
+    stats.skipped_embeddings = db.execute(text(COUNT_EMBEDDINGS)).scalar_one() - stats.embeddings
+    db.commit()
+    return stats
+
+
+def load_jsonl(
+    db: Session,
+    file: TextIO,
+    from_user_id: int,
+    from_team_id: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> LoadStats:
+    stats = LoadStats()
+    rows = staging_rows(file, stats)
+    while True:
+        batch = islice(rows, batch_size)
+        first = next(batch, None)
+        if first is None:
+            break
+        batch_stats = load_batch(db, chain([first], batch), from_user_id, from_team_id)
+        stats.add(batch_stats)
+        logger.info(f"Loaded {stats.contents} contents from {stats.lines} lines ({stats.skipped} already loaded)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a JSONL content dump with COPY")
+    parser.add_argument("path", help="JSONL file, one content per line")
+    parser.add_argument("--from-user-id", type=int, required=True, help="User the contents are attributed to")
+    parser.add_argument("--from-team-id", type=int, default=None, help="Team the contents are attributed to")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Lines per COPY and transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8") as file:
+            stats = load_jsonl(db, file, args.from_user_id, args.from_team_id, args.batch_size)
+    finally:
+        db.close()
+
+    for field in fields(stats):
+        logger.info(f"{field.name:<20}{getattr(stats, field.name):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# SPDX-License-Identifier: Apache-2.0
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Sequence
+
+
+class Histogram:
+    """
+    Fixed bucket histogram with cumulative counts, laid out like a Prometheus histogram.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(self.buckets, self._counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = self._count
+            return {"buckets": buckets, "count": self._count, "sum": self._sum}
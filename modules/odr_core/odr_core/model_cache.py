@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: Apache-2.0
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+import time
+
+from loguru import logger
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+class ModelCache:
+    """
+    Thread safe LRU cache for loaded embedding models.
+
+    Entries are kept in access order. Because every access also pushes the
+    expiry forward by the same ttl, the least recently used entry is always
+    the first one to expire, so expired entries are dropped lazily from the
+    front of the ordering in amortized O(1). The total estimated size of the
+    resident models is kept under max_bytes by evicting from the same end.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Hashable, Any], int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda key, value: 0)
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.loads = 0
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._loading: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+
+    def _expire(self, now: float):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            self._remove(key)
+            self.expirations += 1
+
+    def _evict(self):
+        # the most recent entry stays even if it is larger than the budget on its own
+        while self.max_bytes is not None and self.size > self.max_bytes and len(self._entries) > 1:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> _CacheEntry:
+        entry = self._entries.pop(key)
+        self.size -= entry.size
+        return entry
+
+    def _size(self, key: Hashable, value: Any) -> int:
+        # a model that could not be sized is still cached, it just doesn't count against max_bytes
+        try:
+            return self.sizeof(key, value)
+        except Exception as e:
+            logger.warning(f"Could not estimate the size of model {key}: {e}")
+            return 0
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[_CacheEntry]:
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.expires_at = now + self.ttl
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def _insert(self, key: Hashable, value: Any, size: int):
+        now = self.clock()
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(value, size, now + self.ttl)
+        self.size += size
+        self._expire(now)
+        self._evict()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._lookup(key, self.clock())
+            if entry is None:
+                self.misses += 1
+                return None
+            return entry.value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value or load it once, concurrent callers for the
+        same key wait for the in-flight load instead of loading again.
+        """
+        with self._lock:
+            entry = self._lookup(key, self.clock())
+            if entry is not None:
+                return entry.value
+            self.misses += 1
+            future = self._loading.get(key)
+            owner = future is None
+            if owner:
+                future = self._loading[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            future.set_exception(e)
+            raise
+        size = self._size(key, value)
+
+        with self._lock:
+            self._insert(key, value, size)
+            self.loads += 1
+            del self._loading[key]
+        future.set_result(value)
+        return value
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            return self._remove(key).value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        with self._lock:
+            self._expire(self.clock())
+            return {
+                "models": len(self._entries),
+                "size_bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "loads": self.loads,
+            }
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self.get(key)
+
+    def __setitem__(self, key: Hashable, value: Any):
+        size = self._size(key, value)
+        with self._lock:
+            self._insert(key, value, size)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            self._expire(self.clock())
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(self.clock())
+            return len(self._entries)
+
+
+def fastembed_model_dirs(model_name: str, descriptions: Iterable[Dict[str, Any]]) -> List[str]:
+    """
+    Cache directories fastembed downloads a model to, from its model description:
+    models--org--repo for the Hugging Face source, which often is a repackaged
+    ONNX repo under another name, and fast-name for the GCS archive.
+    """
+    dirs = []
+    for description in descriptions:
+        if description["model"].lower() != model_name.lower():
+            continue
+        sources = description.get("sources", {})
+        if sources.get("hf"):
+            dirs.append("models--" + sources["hf"].replace("/", "--"))
+        if sources.get("url"):
+            dirs.append(f"fast-{model_name.split('/')[-1]}")
+    return dirs
+
+
+def onnx_model_size(cache_dir: str, model_name: str, descriptions: Iterable[Dict[str, Any]]) -> int:
+    """
+    Estimate the resident size of a fastembed model from its ONNX files, the
+    descriptions are the list_supported_models() of the model's class.
+    """
+    dirs = {name.lower() for name in fastembed_model_dirs(model_name, descriptions)}
+    if not dirs or not Path(cache_dir).is_dir():
+        return 0
+    # only the model's own directories are searched, not every model in the cache
+    size = 0
+    for model_dir in Path(cache_dir).iterdir():
+        if model_dir.name.lower() in dirs and model_dir.is_dir():
+            size += sum(path.stat().st_size for path in model_dir.glob("**/*.onnx"))
+    return size
@@ -8,3 +8,4 @@ from odr_core.models.annotation import (
     AnnotationReport, AnnotationSource, AnnotationSourceLink
 )
 from odr_core.models.embedding import EmbeddingEngine, ContentEmbedding, AnnotationEmbedding
+from odr_core.models.duplicate import ContentCluster
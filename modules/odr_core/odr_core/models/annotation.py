@@ -8,6 +8,7 @@ from sqlalchemy import (
     JSON,
     Boolean,
     Float,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -16,6 +17,13 @@ from odr_core.models.base import Base
 
 class Annotation(Base):
     __tablename__ = "annotations"
+    # keyset pagination, see odr_core.crud.pagination
+    __table_args__ = (
+        Index("ix_annotations_created_at_id", "created_at", "id"),
+        Index("ix_annotations_content_id_created_at_id", "content_id", "created_at", "id"),
+        Index("ix_annotations_from_user_id_created_at_id", "from_user_id", "created_at", "id"),
+        Index("ix_annotations_from_team_id_created_at_id", "from_team_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content_id = Column(Integer, ForeignKey("contents.id"), nullable=False)
@@ -24,7 +32,7 @@ class Annotation(Base):
     overall_rating = Column(Float, nullable=True)
     from_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     from_team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     content = relationship("Content", back_populates="annotations")
@@ -1,23 +1,32 @@
 # SPDX-License-Identifier: Apache-2.0
 from sqlalchemy import (
     Column,
+    BigInteger,
     Integer,
     String,
     Enum,
     JSON,
     ForeignKey,
     DateTime,
+    Index,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from odr_core.models.base import Base
 from odr_core.enums import ContentType, ContentStatus, ContentSourceType, ReportStatus
+from odr_core.perceptual_hash import parse_hash, to_signed
 from sqlalchemy.ext.mutable import MutableList
 from sqlalchemy import PickleType
 
 
 class Content(Base):
     __tablename__ = "contents"
+    # keyset pagination, see odr_core.crud.pagination
+    __table_args__ = (
+        Index("ix_contents_created_at_id", "created_at", "id"),
+        Index("ix_contents_from_user_id_created_at_id", "from_user_id", "created_at", "id"),
+        Index("ix_contents_from_team_id_created_at_id", "from_team_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=True)
@@ -25,6 +34,11 @@ class Content(Base):
     type = Column(Enum(ContentType))
     hash = Column(String, index=True)
     phash = Column(String, index=True)
+    dhash = Column(String, nullable=True)
+    # the hex hashes as signed 64 bit integers for Hamming distance lookups,
+    # kept in sync by the validator below and NULL when the hash is a placeholder
+    phash64 = Column(BigInteger, nullable=True)
+    dhash64 = Column(BigInteger, nullable=True)
     url = Column(MutableList.as_mutable(PickleType), nullable=True)
     width = Column(Integer, nullable=True)
     height = Column(Integer, nullable=True)
@@ -37,7 +51,7 @@ class Content(Base):
     meta = Column(JSON, nullable=True)
     from_user_id = Column(Integer, ForeignKey("users.id"))
     from_team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
@@ -52,6 +66,12 @@ class Content(Base):
     content_authors = relationship("ContentAuthor", back_populates="content")
     content_sets = relationship("ContentSet", secondary="content_set_items", back_populates="contents")
 
+    @validates("phash", "dhash")
+    def _set_hash_bits(self, key, value):
+        bits = parse_hash(value)
+        setattr(self, f"{key}64", None if bits is None else to_signed(bits))
+        return value
+
 
 class ContentAuthor(Base):
     __tablename__ = "content_authors"
@@ -113,12 +133,13 @@ class ContentReport(Base):
 
 class ContentSet(Base):
     __tablename__ = "content_sets"
+    __table_args__ = (Index("ix_content_sets_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(String)
     created_by_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=False, server_default=func.now())
 
     created_by = relationship("User", back_populates="content_sets")
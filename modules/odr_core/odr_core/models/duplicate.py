@@ -0,0 +1,33 @@
+# SPDX-License-Identifier: Apache-2.0
+from sqlalchemy import (
+    Column,
+    Integer,
+    Float,
+    DateTime,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+)
+from sqlalchemy.sql import func
+from odr_core.models.base import Base
+
+
+class ContentCluster(Base):
+    """
+    Near-duplicate group of a content under one embedding engine. The cluster id
+    is the content id of the first member, later members record the assigned
+    content they matched and its distance.
+    """
+    __tablename__ = "content_clusters"
+    __table_args__ = (
+        UniqueConstraint("content_id", "embedding_engine_id", name="uq_content_cluster_engine"),
+        Index("ix_content_clusters_engine_cluster", "embedding_engine_id", "cluster_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_id = Column(Integer, ForeignKey("contents.id"), nullable=False)
+    embedding_engine_id = Column(Integer, ForeignKey("embedding_engines.id"), nullable=False)
+    cluster_id = Column(Integer, nullable=False)
+    matched_content_id = Column(Integer, ForeignKey("contents.id"), nullable=True)
+    distance = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
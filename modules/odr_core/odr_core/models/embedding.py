@@ -11,13 +11,13 @@ from sqlalchemy import (
     Enum,
     Boolean,
     UniqueConstraint,
+    Index,
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from odr_core.models.base import Base
 from odr_core.enums import EmbeddingEngineType
 from pgvector.sqlalchemy import Vector
-from odr_core.config import settings
 
 
 class EmbeddingEngine(Base):
@@ -32,6 +32,8 @@ class EmbeddingEngine(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     supported = Column(Boolean, default=False)
+    # length of the engine's vectors, None means the default of its target
+    dimension = Column(Integer, nullable=True)
 
     # Relationships
     content_embeddings = relationship(
@@ -51,15 +53,17 @@ class ContentEmbedding(Base):
         UniqueConstraint(
             "content_id", "embedding_engine_id", name="ic_content_embedding_engine"
         ),
+        Index("ix_content_embeddings_created_at_id", "created_at", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     content_id = Column(Integer, ForeignKey("contents.id"))
-    embedding = Column(Vector(settings.CONTENT_EMBEDDING_DIMENSION))
-    embedding_engine_id = Column(Integer, ForeignKey("embedding_engines.id"))
+    # no fixed dimension, every engine stores and indexes vectors of its own length
+    embedding = Column(Vector())
+    embedding_engine_id = Column(Integer, ForeignKey("embedding_engines.id"), index=True)
     from_user_id = Column(Integer, ForeignKey("users.id"))
     from_team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     content = relationship("Content", back_populates="embeddings")
     embedding_engine = relationship(
@@ -77,15 +81,17 @@ class AnnotationEmbedding(Base):
             "embedding_engine_id",
             name="ic_annotation_embedding_engine",
         ),
+        Index("ix_annotation_embeddings_created_at_id", "created_at", "id"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     annotation_id = Column(Integer, ForeignKey("annotations.id"))
-    embedding = Column(Vector(settings.ANNOTATION_EMBEDDING_DIMENSION))
-    embedding_engine_id = Column(Integer, ForeignKey("embedding_engines.id"))
+    # no fixed dimension, every engine stores and indexes vectors of its own length
+    embedding = Column(Vector())
+    embedding_engine_id = Column(Integer, ForeignKey("embedding_engines.id"), index=True)
     from_user_id = Column(Integer, ForeignKey("users.id"))
     from_team_id = Column(Integer, ForeignKey("teams.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     annotation = relationship("Annotation", back_populates="embeddings")
     embedding_engine = relationship(
@@ -0,0 +1,127 @@
+# SPDX-License-Identifier: Apache-2.0
+# 64 bit perceptual hashes and a BK-tree for Hamming radius lookups. The hashes
+# match the imagehash package bit for bit, so values computed by the HF scripts
+# and by the API can be compared directly.
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+PHASH_HIGHFREQ_FACTOR = 4
+HASH_BITS = HASH_SIZE * HASH_SIZE
+_SIGN_BIT = 1 << (HASH_BITS - 1)
+_MODULUS = 1 << HASH_BITS
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(size: int) -> np.ndarray:
+    # unnormalized DCT-II, the same scaling as scipy.fftpack.dct
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    return 2 * np.cos(np.pi * k * (2 * n + 1) / (2 * size))
+
+
+def _grayscale(image: Image.Image, width: int, height: int) -> np.ndarray:
+    resized = image.convert("L").resize((width, height), Image.Resampling.LANCZOS)
+    return np.asarray(resized, dtype=np.float64)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def phash(image: Image.Image) -> int:
+    size = HASH_SIZE * PHASH_HIGHFREQ_FACTOR
+    pixels = _grayscale(image, size, size)
+    dct = _dct_matrix(size)
+    low_frequencies = (dct @ pixels @ dct.T)[:HASH_SIZE, :HASH_SIZE]
+    return _bits_to_int(low_frequencies > np.median(low_frequencies))
+
+
+def dhash(image: Image.Image) -> int:
+    pixels = _grayscale(image, HASH_SIZE + 1, HASH_SIZE)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def to_signed(value: int) -> int:
+    # postgres has no unsigned 64 bit type, hashes are stored as two's complement bigint
+    return value - _MODULUS if value & _SIGN_BIT else value
+
+
+def to_unsigned(value: int) -> int:
+    return value % _MODULUS
+
+
+def hash_to_hex(value: int) -> str:
+    return f"{to_unsigned(value):016x}"
+
+
+def parse_hash(value: Optional[str]) -> Optional[int]:
+    """
+    Unsigned value of a 16 digit hex hash, None for placeholders like "" or "tbd"
+    """
+    if not value or len(value) != HASH_BITS // 4:
+        return None
+    try:
+        return int(value, 16)
+    except ValueError:
+        return None
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (to_unsigned(a) ^ to_unsigned(b)).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over Hamming distance. A radius query only descends
+    into children whose edge distance is within radius of the query's distance
+    to the node, so small radii touch a small part of the tree.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, int]] = ()):
+        # node: [hash, [ids], {distance: child}]
+        self._root = None
+        self.size = 0
+        for value, item_id in items:
+            self.add(value, item_id)
+
+    def add(self, value: int, item_id: int):
+        value = to_unsigned(value)
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item_id], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item_id], {}]
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int]]:
+        """
+        (item_id, distance) of every item within radius, nearest first
+        """
+        value = to_unsigned(value)
+        matches = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= radius:
+                matches.extend((item_id, distance) for item_id in node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return sorted(matches, key=lambda match: (match[1], match[0]))
@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: Apache-2.0
+"""
+Cache of text query embeddings, so repeated searches skip model inference.
+
+The first tier is an in-process LRU. The optional second tier is a direct
+mapped store of float32 vectors in a memory mapped file per engine, shared by
+all workers on the host and kept across restarts. Every slot records the
+digest of its key and a crc of its vector, so a slot overwritten by another
+worker while it is being read is treated as a miss.
+"""
+import hashlib
+import os
+import re
+import unicodedata
+import zlib
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from odr_core.model_cache import ModelCache
+
+DIGEST_SIZE = 16
+# digest of the key followed by the crc32 of the vector
+SLOT_KEY = np.dtype([("digest", np.uint8, DIGEST_SIZE), ("crc", "<u4")])
+
+
+def normalize_query(text: str) -> str:
+    # case is kept since cased models embed "Apple" and "apple" differently
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def query_digest(embedding_engine_id: int, model_name: str, text: str) -> bytes:
+    key = f"{embedding_engine_id}\0{model_name}\0{text}".encode()
+    return hashlib.blake2b(key, digest_size=DIGEST_SIZE).digest()
+
+
+def _open_memmap(path: Path, dtype, shape: Tuple[int, ...]) -> np.memmap:
+    size = np.dtype(dtype).itemsize * int(np.prod(shape))
+    # append mode creates the file without truncating what another worker already wrote
+    with open(path, "ab") as f:
+        if f.tell() < size:
+            f.truncate(size)
+    return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+
+class MmapVectorStore:
+    def __init__(self, path: Path, dimension: int, slots: int):
+        self.dimension = dimension
+        self.slots = slots
+        self.vectors = _open_memmap(path.with_suffix(".f32"), "<f4", (slots, dimension))
+        self.keys = _open_memmap(path.with_suffix(".keys"), SLOT_KEY, (slots,))
+
+    def _slot(self, digest: bytes) -> int:
+        return int.from_bytes(digest[:8], "little") % self.slots
+
+    def get(self, digest: bytes) -> Optional[List[float]]:
+        slot = self._slot(digest)
+        key = self.keys[slot]
+        if key["digest"].tobytes() != digest:
+            return None
+        vector = np.array(self.vectors[slot])
+        if zlib.crc32(vector.tobytes()) != int(key["crc"]):
+            return None
+        return vector.tolist()
+
+    def put(self, digest: bytes, vector: List[float]):
+        slot = self._slot(digest)
+        data = np.asarray(vector, dtype="<f4")
+        self.vectors[slot] = data
+        self.keys[slot] = (np.frombuffer(digest, dtype=np.uint8), zlib.crc32(data.tobytes()))
+
+
+class QueryEmbeddingCache:
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        disk_dir: Optional[str] = None,
+        disk_slots: int = 65536,
+    ):
+        # every entry costs one unit of the byte budget, so it bounds the entry count
+        self.memory = ModelCache(ttl, max_bytes=max_entries, sizeof=lambda key, value: 1)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_slots = disk_slots
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self._stores: Dict[Tuple[int, int], MmapVectorStore] = {}
+        self._lock = Lock()
+
+    def _store(self, embedding_engine_id: int, dimension: int) -> Optional[MmapVectorStore]:
+        if self.disk_dir is None:
+            return None
+        with self._lock:
+            store = self._stores.get((embedding_engine_id, dimension))
+            if store is None:
+                os.makedirs(self.disk_dir, exist_ok=True)
+                path = self.disk_dir / f"query_embeddings_engine_{embedding_engine_id}_{dimension}"
+                store = self._stores[(embedding_engine_id, dimension)] = MmapVectorStore(
+                    path, dimension, self.disk_slots
+                )
+            return store
+
+    def get_or_compute(
+        self,
+        embedding_engine_id: int,
+        model_name: str,
+        dimension: int,
+        text: str,
+        compute: Callable[[str], List[float]],
+    ) -> List[float]:
+        normalized = normalize_query(text)
+        digest = query_digest(embedding_engine_id, model_name, normalized)
+
+        def load() -> List[float]:
+            store = self._store(embedding_engine_id, dimension)
+            if store is not None:
+                vector = store.get(digest)
+                with self._lock:
+                    if vector is None:
+                        self.disk_misses += 1
+                    else:
+                        self.disk_hits += 1
+                if vector is not None:
+                    return vector
+            vector = compute(normalized)
+            if store is not None and len(vector) == dimension:
+                store.put(digest, vector)
+            return vector
+
+        return self.memory.get_or_load(digest, load)
+
+    def stats(self) -> Dict:
+        memory = self.memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.disk_hits
+        return {
+            "entries": memory["models"],
+            "max_entries": memory["max_bytes"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "disk_misses": self.disk_misses,
+            "misses": memory["misses"] - self.disk_hits,
+            "evictions": memory["evictions"],
+            "memory_hit_rate": memory["hits"] / lookups if lookups else 0.0,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "disk_enabled": self.disk_dir is not None,
+        }
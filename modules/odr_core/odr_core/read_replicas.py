@@ -0,0 +1,88 @@
+# SPDX-License-Identifier: Apache-2.0
+# Routing of read-only sessions to read replicas. A request that wrote gets a
+# timestamp back (header and cookie), and while a client sends one younger than
+# the read-your-writes window its reads stay on the primary, which already has
+# its writes when a replica may still be replaying them.
+import time
+from contextvars import ContextVar, Token
+from threading import Lock
+from typing import Callable, Generic, Optional, Sequence, TypeVar
+
+READ_ROUTING_STRATEGIES = ("round_robin", "least_connections")
+LAST_WRITE_HEADER = "X-Last-Write"
+LAST_WRITE_COOKIE = "odr_last_write"
+
+EngineT = TypeVar("EngineT")
+
+
+def checked_out_connections(engine) -> int:
+    # NullPool keeps no count, its engines are picked in turn
+    checkedout = getattr(engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+class ReplicaRouter(Generic[EngineT]):
+    def __init__(self, engines: Sequence[EngineT], strategy: str = "round_robin"):
+        if strategy not in READ_ROUTING_STRATEGIES:
+            raise ValueError(f"Unknown read routing {strategy!r}, expected one of {READ_ROUTING_STRATEGIES}")
+        self.engines = list(engines)
+        self.strategy = strategy
+        self._next = 0
+        self._lock = Lock()
+
+    def choose(self) -> Optional[EngineT]:
+        if not self.engines:
+            return None
+        with self._lock:
+            start = self._next % len(self.engines)
+            self._next += 1
+        if self.strategy == "round_robin":
+            return self.engines[start]
+        # rotating the start spreads ties between equally loaded replicas
+        candidates = self.engines[start:] + self.engines[:start]
+        return min(candidates, key=checked_out_connections)
+
+
+class RequestWrites:
+    def __init__(self, last_write: Optional[float] = None):
+        self.last_write = last_write
+        self.wrote = False
+
+
+_request_writes: ContextVar[Optional[RequestWrites]] = ContextVar("odr_request_writes", default=None)
+
+
+def parse_last_write(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def track_request_writes(last_write: Optional[float] = None) -> Token:
+    """
+    Start tracking the writes of a request, last_write is the timestamp the client sent back.
+    """
+    return _request_writes.set(RequestWrites(last_write))
+
+
+def request_writes() -> Optional[RequestWrites]:
+    return _request_writes.get()
+
+
+def reset_request_writes(token: Token):
+    _request_writes.reset(token)
+
+
+def record_write(clock: Callable[[], float] = time.time):
+    writes = _request_writes.get()
+    if writes is not None:
+        writes.wrote = True
+        writes.last_write = clock()
+
+
+def pinned_to_primary(window: float, clock: Callable[[], float] = time.time) -> bool:
+    writes = _request_writes.get()
+    if window <= 0 or writes is None or writes.last_write is None:
+        return False
+    return clock() - writes.last_write < window
@@ -1,5 +1,5 @@
 # SPDX-License-Identifier: Apache-2.0
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional
 from datetime import datetime
 from odr_core.enums import ContentStatus, ContentType, ContentSourceType
@@ -57,6 +57,7 @@ class ContentBase(BaseModel):
     type: ContentType
     hash: str
     phash: str
+    dhash: Optional[str] = None
     width: Optional[int] = None
     height: Optional[int] = None
     url: List[HttpUrl] = []
@@ -81,6 +82,7 @@ class ContentUpdate(BaseModel):
     type: Optional[ContentType] = None
     hash: Optional[str] = None
     phash: Optional[str] = None
+    dhash: Optional[str] = None
     width: Optional[int] = None
     height: Optional[int] = None
     format: Optional[str] = None
@@ -106,6 +108,28 @@ class Content(ContentBase):
         from_attribute = True
 
 
+class ContentBulkCreate(BaseModel):
+    contents: List[ContentCreate] = Field(max_length=10000)
+
+
+class ContentBulkItem(BaseModel):
+    # position of the content in the request
+    index: int
+    content_id: Optional[int] = None
+    # the SHA-256 was already stored, content_id is the existing content
+    existing: bool = False
+    # source values that are taken, by stored contents or earlier rows of the request
+    conflicting_sources: List[str] = []
+    error: Optional[str] = None
+
+
+class ContentBulkResult(BaseModel):
+    created: int
+    existing: int
+    failed: int
+    items: List[ContentBulkItem]
+
+
 class ContentEventBase(BaseModel):
     content_id: int
     status: ContentStatus
@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: Apache-2.0
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+
+class ContentClusterMember(BaseModel):
+    content_id: int
+    embedding_engine_id: int
+    cluster_id: int
+    # assigned content this one was matched with, None for the first member
+    matched_content_id: Optional[int] = None
+    distance: Optional[float] = None
+    created_at: datetime
+
+    class Config:
+        from_attribute = True
+
+
+class ContentDuplicates(BaseModel):
+    content_id: int
+    embedding_engine_id: int
+    cluster_id: int
+    duplicates: List[ContentClusterMember]
+
+
+class DuplicateClusterAssign(BaseModel):
+    embedding_engine_id: int
+    # only these contents, otherwise the next unassigned embeddings of the engine
+    content_ids: Optional[List[int]] = None
+    max_contents: int = Field(default=1000, gt=0, le=100000)
+
+
+class DuplicateClusterAssignResult(BaseModel):
+    embedding_engine_id: int
+    assigned: int
+    new_clusters: int
+
+
+class PerceptualHashes(BaseModel):
+    # 64 bit hashes as 16 hex digits
+    phash: str
+    dhash: str
+
+
+class PerceptualHashSearchHit(BaseModel):
+    content_id: int
+    distance: int
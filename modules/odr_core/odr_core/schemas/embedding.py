@@ -1,8 +1,16 @@
 # SPDX-License-Identifier: Apache-2.0
-from pydantic import BaseModel
-from typing import Optional, Any, List
+from pydantic import BaseModel, Field
+from typing import Optional, Any, Dict, List
 from datetime import datetime
-from odr_core.enums import EmbeddingEngineType
+from odr_core.enums import (
+    ContentStatus,
+    ContentType,
+    DistanceMetric,
+    EmbeddingEngineType,
+    EmbeddingTarget,
+    VectorIndexMethod,
+    VectorStorage,
+)
 
 
 class EmbeddingEngineBase(BaseModel):
@@ -11,6 +19,8 @@ class EmbeddingEngineBase(BaseModel):
     version: str
     supported: bool = False
     description: Optional[str] = None
+    # length of the engine's vectors, pgvector stores up to 16000 dimensions
+    dimension: Optional[int] = Field(default=None, gt=0, le=16000)
 
 
 class EmbeddingEngineCreate(EmbeddingEngineBase):
@@ -40,6 +50,27 @@ class ImageEmbeddingGenerate(BaseModel):
     embedding_engine_id: int
 
 
+class ContentEmbeddingBatchGenerate(BaseModel):
+    embedding_engine_id: int
+    content_ids: List[int] = []
+    content_set_id: Optional[int] = None
+    from_user_id: int
+    from_team_id: Optional[int] = None
+
+
+class ContentEmbeddingBatchItem(BaseModel):
+    content_id: int
+    content_embedding_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class ContentEmbeddingBatchResult(BaseModel):
+    embedding_engine_id: int
+    created: int
+    failed: int
+    items: List[ContentEmbeddingBatchItem]
+
+
 class ContentEmbeddingBase(BaseModel):
     content_id: int
     # list of floats
@@ -65,6 +96,24 @@ class ContentEmbedding(ContentEmbeddingBase):
         from_attribute = True
 
 
+class AnnotationEmbeddingBatchGenerate(BaseModel):
+    embedding_engine_id: int
+    from_user_id: int
+    from_team_id: Optional[int] = None
+    # keyset cursor, resume after the last_annotation_id of a previous run
+    after_annotation_id: int = 0
+    max_annotations: Optional[int] = Field(default=None, gt=0)
+    only_missing: bool = False
+
+
+class AnnotationEmbeddingBatchResult(BaseModel):
+    embedding_engine_id: int
+    processed: int
+    upserted: int
+    failed_annotation_ids: List[int] = []
+    last_annotation_id: Optional[int] = None
+
+
 class AnnotationEmbeddingBase(BaseModel):
     annotation_id: int
     embedding: List[float]
@@ -92,6 +141,89 @@ class AnnotationEmbedding(AnnotationEmbeddingBase):
 class EmbeddingVectorQuery(BaseModel):
     embedding: List[float]
     embedding_engine_id: int
+    metric: DistanceMetric = DistanceMetric.L2
+    # ANN search knobs, only used when a matching vector index exists
+    ef_search: Optional[int] = Field(default=None, gt=0, le=1000)
+    probes: Optional[int] = Field(default=None, gt=0)
+
+
+class EmbeddingSearchQuery(EmbeddingVectorQuery):
+    # vectors are only returned when asked for, as base64 of little endian float32
+    include_embedding: bool = False
+    # join the fields of the matched content or annotation into each hit
+    include_fields: bool = False
+    # search a halfvec or bit index first, then re-rank rerank_factor times the
+    # page of candidates on the full precision vectors
+    storage: VectorStorage = VectorStorage.FULL
+    rerank_factor: Optional[int] = Field(default=None, ge=1, le=100)
+
+
+class ContentSearchFilter(BaseModel):
+    # filters on the embedded content, applied in the same query as the ranking
+    status: Optional[List[ContentStatus]] = None
+    license: Optional[List[str]] = None
+    content_set_id: Optional[int] = None
+    from_team_id: Optional[int] = None
+
+
+class ContentEmbeddingSearchQuery(EmbeddingSearchQuery, ContentSearchFilter):
+    pass
+
+
+class ContentEmbeddingBatchSearchQuery(ContentSearchFilter):
+    embedding_engine_id: int
+    # query with the given vectors or with the stored embeddings of the given contents
+    embeddings: List[List[float]] = Field(default=[], max_length=10000)
+    content_ids: List[int] = Field(default=[], max_length=10000)
+    k: int = Field(default=10, gt=0, le=1000)
+    # leave the query content out of its own neighbours
+    exclude_self: bool = True
+    metric: DistanceMetric = DistanceMetric.L2
+    ef_search: Optional[int] = Field(default=None, gt=0, le=1000)
+    probes: Optional[int] = Field(default=None, gt=0)
+
+
+class ContentSearchFields(BaseModel):
+    name: Optional[str] = None
+    type: Optional[ContentType] = None
+    hash: Optional[str] = None
+    url: Optional[List[str]] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    format: Optional[str] = None
+    status: Optional[ContentStatus] = None
+    license: Optional[str] = None
+    license_url: Optional[str] = None
+
+
+class AnnotationSearchFields(BaseModel):
+    content_id: int
+    annotation: Any = None
+    overall_rating: Optional[float] = None
+
+
+class ContentEmbeddingSearchHit(BaseModel):
+    id: int
+    content_id: int
+    distance: float
+    embedding: Optional[str] = None
+    content: Optional[ContentSearchFields] = None
+
+
+class ContentEmbeddingBatchSearchResult(BaseModel):
+    # position of the query in embeddings or content_ids
+    query_index: int
+    content_id: Optional[int] = None
+    hits: List[ContentEmbeddingSearchHit] = []
+    error: Optional[str] = None
+
+
+class AnnotationEmbeddingSearchHit(BaseModel):
+    id: int
+    annotation_id: int
+    distance: float
+    embedding: Optional[str] = None
+    annotation: Optional[AnnotationSearchFields] = None
 
 
 class EmbeddingTextQuery(BaseModel):
@@ -102,3 +234,63 @@ class EmbeddingTextQuery(BaseModel):
 class EmbeddingImageQuery(BaseModel):
     base64_image: str
     embedding_engine_id: int
+
+
+class EmbeddingIndexCreate(BaseModel):
+    target: EmbeddingTarget
+    method: VectorIndexMethod = VectorIndexMethod.HNSW
+    metric: DistanceMetric = DistanceMetric.L2
+    # HNSW build parameters
+    m: Optional[int] = Field(default=None, ge=2, le=100)
+    ef_construction: Optional[int] = Field(default=None, ge=4, le=1000)
+    # IVFFlat build parameters
+    lists: Optional[int] = Field(default=None, ge=1, le=32768)
+    # index a halfvec or binary quantized expression instead of the float32 vectors
+    storage: VectorStorage = VectorStorage.FULL
+    concurrently: bool = False
+
+
+class EmbeddingIndex(BaseModel):
+    name: str
+    target: EmbeddingTarget
+    method: VectorIndexMethod
+    metric: DistanceMetric
+    storage: VectorStorage = VectorStorage.FULL
+    embedding_engine_id: int
+    definition: str
+    size_bytes: Optional[int] = None
+
+
+class EmbeddingModelCacheStats(BaseModel):
+    models: int
+    size_bytes: int
+    max_bytes: Optional[int] = None
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    loads: int
+
+
+class QueryEmbeddingCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    memory_hits: int
+    disk_hits: int
+    disk_misses: int
+    misses: int
+    evictions: int
+    memory_hit_rate: float
+    hit_rate: float
+    disk_enabled: bool
+
+
+class HistogramSnapshot(BaseModel):
+    buckets: Dict[str, int]
+    count: int
+    sum: float
+
+
+class EmbeddingBatcherStats(BaseModel):
+    batch_size: HistogramSnapshot
+    queue_wait_ms: HistogramSnapshot
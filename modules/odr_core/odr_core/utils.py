@@ -18,15 +18,19 @@ def pil_image_from_base64(base64_image: str) -> Image.Image:
     return image
 
 
-def download_image_from_url(url: str, max_bytes = 20 * 1024 * 1024) -> Image.Image:
-    http = urllib3.PoolManager()
+http = urllib3.PoolManager()
+
+
+def download_bytes_from_url(url: str, max_bytes = 20 * 1024 * 1024) -> bytes:
     response = http.request('GET', url, preload_content=False)
 
     if response.status != 200:
+        response.release_conn()
         raise ValueError(f"Failed to download image from {url}")
 
     content_bytes = response.headers.get('Content-Length')
     if content_bytes and int(content_bytes) > max_bytes:
+        response.release_conn()
         raise ValueError(f"Image size exceeds the maximum limit of {max_bytes} bytes")
 
     if content_bytes is not None:
@@ -36,9 +40,15 @@ def download_image_from_url(url: str, max_bytes = 20 * 1024 * 1024) -> Image.Ima
         for chunk in response.stream():
             data += chunk
             if len(data) > max_bytes:
+                response.release_conn()
                 raise ValueError(f"Image size exceeds the maximum limit of {max_bytes} bytes")
 
     response.release_conn()
+    return data
+
+
+def download_image_from_url(url: str, max_bytes = 20 * 1024 * 1024) -> Image.Image:
+    data = download_bytes_from_url(url, max_bytes)
 
     try:
         return Image.open(BytesIO(data))
@@ -1,6 +1,8 @@
 # SPDX-License-Identifier: Apache-2.0
+from contextlib import contextmanager
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from odr_core.models.base import Base
 
@@ -28,3 +30,29 @@ def db(TestingSessionLocal, engine):
     finally:
         db.close()
     Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def assert_query_count(engine):
+    """
+    Context manager asserting how many SQL statements the block runs, to catch
+    N+1 lazy loads, e.g. ``with assert_query_count(2): ...``.
+    """
+
+    @contextmanager
+    def assert_count(expected: int):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert len(statements) == expected, "expected {} queries, ran {}:\n{}".format(
+            expected, len(statements), "\n".join(statements)
+        )
+
+    return assert_count
@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: Apache-2.0
+# Runs the loader's COPY and INSERT ... SELECT statements, which only exist on postgres,
+# against the configured database with the migrations applied.
+import json
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from odr_core.database import engine
+from odr_core.enums import ContentSourceType, ContentStatus, ContentType, EmbeddingEngineType
+from odr_core.jsonl_loader import load_jsonl
+from odr_core.models.content import Content, ContentSource
+from odr_core.models.embedding import ContentEmbedding, EmbeddingEngine
+
+
+@pytest.fixture
+def db():
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"No database to load into: {e}")
+    if engine.dialect.name != "postgresql":
+        pytest.skip("The JSONL loader needs postgres")
+    with Session(bind=engine) as db:
+        yield db
+
+
+@pytest.fixture
+def prefix(db: Session):
+    # source values of the test all start with the prefix, the loaded rows are deleted by it
+    prefix = f"test-{uuid4().hex}"
+    yield prefix
+    db.rollback()
+    content_ids = list(db.execute(
+        text("SELECT content_id FROM content_sources WHERE value LIKE :prefix"), {"prefix": f"{prefix}%"}
+    ).scalars())
+    for table in ("content_embeddings", "annotations", "content_authors", "content_sources", "contents"):
+        column = "id" if table == "contents" else "content_id"
+        db.execute(text(f"DELETE FROM {table} WHERE {column} = ANY(:ids)"), {"ids": content_ids})
+    db.execute(text("DELETE FROM embedding_engines WHERE name = :name"), {"name": prefix})
+    db.commit()
+
+
+@pytest.fixture
+def user_id(db: Session):
+    user_id = db.execute(text("SELECT min(id) FROM users")).scalar()
+    if user_id is None:
+        pytest.skip("No user to attribute the contents to")
+    return user_id
+
+
+def write_jsonl(path, items):
+    path.write_text("".join(json.dumps(item) + "\n" for item in items))
+    return path
+
+
+def load(db: Session, path, user_id: int, **kwargs):
+    with open(path, encoding="utf-8") as file:
+        return load_jsonl(db, file, user_id, **kwargs)
+
+
+def test_load_jsonl(db: Session, prefix, user_id, tmp_path):
+    db.add(EmbeddingEngine(name=prefix, type=EmbeddingEngineType.IMAGE, version="1", dimension=3))
+    db.commit()
+    hf_item = {
+        "id": "hf-0",
+        "type": "image",
+        "status": "available",
+        "hash": "tbd",
+        "phash": "0000000000000001",
+        "dhash": "tbd",
+        "meta": {"hf-dataset-name": prefix, "hf-dataset-id": 0, "hf-dataset-split": "train"},
+        "contentAuthor": [{"name": "Author"}],
+        "annotations": [{"annotation": {"text": "a line\twith, \"quotes\""}}],
+        "embeddings": [
+            {"model": prefix, "embedding": [0.1, 0.2, 0.3]},
+            {"model": prefix, "embedding": [0.1, 0.2]},
+            {"model": f"{prefix}-unknown", "embedding": [0.1, 0.2, 0.3]},
+        ],
+    }
+    path = write_jsonl(tmp_path / "metadata.jsonl", [
+        hf_item,
+        {"id": f"{prefix}-upload", "hash": "a" * 64, "meta": {}},
+        # the same source again, in the next batch
+        hf_item,
+    ])
+
+    stats = load(db, path, user_id, batch_size=2)
+    assert (stats.lines, stats.contents, stats.skipped, stats.conflicts) == (3, 2, 1, 0)
+    assert (stats.sources, stats.authors, stats.annotations) == (2, 1, 1)
+    # the embedding of the wrong dimension and the one of an unknown model
+    assert (stats.embeddings, stats.skipped_embeddings) == (1, 2)
+
+    sources = {
+        source.value: source
+        for source in db.query(ContentSource).filter(ContentSource.value.like(f"{prefix}%"))
+    }
+    assert {value: source.type for value, source in sources.items()} == {
+        f"{prefix}/train/0": ContentSourceType.HUGGING_FACE,
+        f"{prefix}-upload": ContentSourceType.PATH,
+    }
+    content = db.get(Content, sources[f"{prefix}/train/0"].content_id)
+    assert (content.type, content.status) == (ContentType.IMAGE, ContentStatus.AVAILABLE)
+    # placeholders are not stored, the perceptual hash is stored with its bits
+    assert (content.hash, content.dhash, content.dhash64) == (None, None, None)
+    assert (content.phash, content.phash64) == ("0000000000000001", 1)
+    assert db.query(ContentEmbedding).filter(ContentEmbedding.content_id == content.id).count() == 1
+
+    # a second run loads nothing
+    stats = load(db, path, user_id)
+    assert (stats.contents, stats.skipped, stats.conflicts) == (0, 3, 0)
+
+    # a path source of the same value as a stored hugging_face source
+    conflicting = write_jsonl(tmp_path / "conflicting.jsonl", [{"id": f"{prefix}/train/0", "meta": {}}])
+    stats = load(db, conflicting, user_id)
+    assert (stats.contents, stats.skipped, stats.conflicts) == (0, 0, 1)
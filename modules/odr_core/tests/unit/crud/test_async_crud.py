@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from odr_core.crud.annotation import get_annotations_by_content_async
+from odr_core.crud.content import get_content_async, get_content_by_hash_async, get_contents_async
+from odr_core.crud.embedding import query_content_embedding_async
+from odr_core.crud.pagination import next_cursor
+from odr_core.enums import ContentSourceType, ContentType
+from odr_core.models.annotation import Annotation
+from odr_core.models.base import Base
+from odr_core.models.content import Content, ContentAuthor, ContentSource
+from odr_core.schemas.content import Content as ContentSchema
+from odr_core.schemas.embedding import EmbeddingVectorQuery
+
+
+@pytest.fixture
+def async_session(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        async with SessionLocal() as db:
+            for i in range(3):
+                content = Content(
+                    name=f"Content {i}",
+                    type=ContentType.IMAGE,
+                    hash=f"async_hash_{i}",
+                    phash="tbd",
+                    url=[f"http://example.com/{i}.jpg"],
+                    format="jpg",
+                    size=1024,
+                    license="CC0",
+                    from_user_id=1,
+                    created_at=datetime(2024, 1, 1, 0, 0, i),
+                )
+                content.sources = [ContentSource(type=ContentSourceType.URL, value=f"http://example.com/{i}.jpg")]
+                content.content_authors = [ContentAuthor(name=f"Author {i}", updated_at=datetime(2024, 1, 1))]
+                db.add(content)
+            await db.flush()
+            db.add_all(
+                Annotation(content_id=1, annotation={"index": i}, from_user_id=1, created_at=datetime(2024, 1, 2, 0, 0, i))
+                for i in range(3)
+            )
+            await db.commit()
+
+    asyncio.run(setup())
+    yield SessionLocal
+    asyncio.run(engine.dispose())
+
+
+def run(SessionLocal, function, *args, **kwargs):
+    async def call():
+        async with SessionLocal() as db:
+            return await function(db, *args, **kwargs)
+
+    return asyncio.run(call())
+
+
+def test_get_content_async_loads_response_relationships(async_session):
+    content = run(async_session, get_content_async, 2)
+    # serializing outside the session must not lazy load
+    response = ContentSchema.model_validate(content, from_attributes=True)
+    assert response.name == "Content 1"
+    assert [source.value for source in response.sources] == ["http://example.com/1.jpg"]
+    assert [author.name for author in response.content_authors] == ["Author 1"]
+    assert run(async_session, get_content_async, 99) is None
+
+
+def test_get_contents_async_pages_by_cursor(async_session):
+    first = run(async_session, get_contents_async, limit=2)
+    assert [content.id for content in first] == [1, 2]
+    rest = run(async_session, get_contents_async, limit=2, cursor=next_cursor(first, 2))
+    assert [content.id for content in rest] == [3]
+    assert [content.id for content in run(async_session, get_contents_async, skip=1)] == [2, 3]
+
+
+def test_get_content_by_hash_async(async_session):
+    content = run(async_session, get_content_by_hash_async, "async_hash_2")
+    assert content.id == 3
+    assert content.sources[0].value == "http://example.com/2.jpg"
+    assert run(async_session, get_content_by_hash_async, "missing") is None
+
+
+def test_get_annotations_by_content_async(async_session):
+    annotations = run(async_session, get_annotations_by_content_async, 1, limit=2)
+    assert [annotation.annotation["index"] for annotation in annotations] == [0, 1]
+    assert run(async_session, get_annotations_by_content_async, 2) == []
+
+
+def test_query_content_embedding_async_runs_sync_query(async_session):
+    query = EmbeddingVectorQuery(embedding=[0.1, 0.2], embedding_engine_id=99)
+    with pytest.raises(ValueError, match="Invalid embedding engine id"):
+        run(async_session, query_content_embedding_async, query)
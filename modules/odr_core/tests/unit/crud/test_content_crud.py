@@ -8,13 +8,16 @@ from odr_core.crud.content import (
     update_content,
     delete_content,
     get_content_by_hash,
+    create_contents_bulk,
     get_contents_by_user,
     create_content_source,
     get_content_sources,
     update_content_source,
     delete_content_source
 )
+from odr_core.models.content import ContentAuthor
 from odr_core.schemas.content import (
+    ContentAuthorCreate,
     ContentCreate,
     ContentUpdate,
     ContentSourceCreate,
@@ -23,6 +26,7 @@ from odr_core.schemas.content import (
     ContentStatus,
     ContentSourceType
 )
+from odr_core.schemas.content import Content as ContentSchema
 
 
 def test_create_content(db: Session):
@@ -249,3 +253,114 @@ def test_delete_content_source(db: Session):
 
     sources = get_content_sources(db, content.id)
     assert len(sources) == 0
+
+
+def test_create_content_returns_existing_for_same_sha256(db: Session):
+    def content_data(hash, source):
+        return ContentCreate(
+            name=f"Upload {source}",
+            type=ContentType.IMAGE,
+            hash=hash,
+            phash="",
+            format="jpg",
+            size=1024,
+            license="CC0",
+            sources=[ContentSourceCreate(type=ContentSourceType.URL, value=f"http://example.com/{source}.jpg")]
+        )
+
+    sha256 = "ab" * 32
+    first = create_content(db, content_data(sha256, "first"), from_user_id=1)
+    second = create_content(db, content_data(sha256, "second"), from_user_id=1)
+    assert second.id == first.id
+    assert second.name == "Upload first"
+
+    # placeholder hashes never deduplicate
+    create_content(db, content_data("tbd", "third"), from_user_id=1)
+    create_content(db, content_data("tbd", "fourth"), from_user_id=1)
+    assert len(get_contents(db)) == 3
+
+
+def bulk_content(name, sources, hash="tbd", phash="", **kwargs):
+    return ContentCreate(
+        name=name,
+        type=ContentType.IMAGE,
+        hash=hash,
+        phash=phash,
+        format="jpg",
+        size=1024,
+        license="CC0",
+        sources=[ContentSourceCreate(type=ContentSourceType.URL, value=value) for value in sources],
+        **kwargs,
+    )
+
+
+def test_create_contents_bulk_inserts_sources_and_authors(db: Session):
+    contents = [
+        bulk_content(
+            f"Bulk {i}",
+            [f"http://example.com/{i}.jpg", f"http://mirror.example.com/{i}.jpg"],
+            phash="8000000000000000",
+            content_authors=[ContentAuthorCreate(name=f"Author {i}")],
+        )
+        for i in range(3)
+    ]
+    result = create_contents_bulk(db, contents, from_user_id=1)
+
+    assert (result.created, result.existing, result.failed) == (3, 0, 0)
+    ids = [item.content_id for item in result.items]
+    assert [get_content(db, content_id).name for content_id in ids] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert [len(get_content_sources(db, content_id)) for content_id in ids] == [2, 2, 2]
+    assert db.query(ContentAuthor).filter(ContentAuthor.content_id == ids[1]).one().name == "Author 1"
+    assert get_content(db, ids[0]).phash64 == -(1 << 63)
+
+
+def test_create_contents_bulk_reports_source_conflicts(db: Session):
+    create_content(db, bulk_content("Stored", ["http://example.com/taken.jpg"]), from_user_id=1)
+    contents = [
+        bulk_content("Taken", ["http://example.com/new.jpg", "http://example.com/taken.jpg"]),
+        bulk_content("First", ["http://example.com/shared.jpg"]),
+        bulk_content("Second", ["http://example.com/shared.jpg"]),
+        bulk_content("Twice", ["http://example.com/twice.jpg", "http://example.com/twice.jpg"]),
+    ]
+    result = create_contents_bulk(db, contents, from_user_id=1)
+
+    assert (result.created, result.failed) == (1, 3)
+    taken, first, second, twice = result.items
+    assert taken.content_id is None
+    assert taken.conflicting_sources == ["http://example.com/taken.jpg"]
+    assert first.content_id is not None and first.error is None
+    assert second.conflicting_sources == ["http://example.com/shared.jpg"]
+    assert twice.conflicting_sources == ["http://example.com/twice.jpg"]
+    assert len(get_contents(db)) == 2
+
+
+def test_create_contents_bulk_resolves_known_hashes(db: Session):
+    stored = create_content(db, bulk_content("Stored", ["http://example.com/stored.jpg"], "aa" * 32), from_user_id=1)
+    contents = [
+        bulk_content("Same as stored", ["http://example.com/a.jpg"], "aa" * 32),
+        bulk_content("New", ["http://example.com/b.jpg"], "bb" * 32),
+        bulk_content("Same as new", ["http://example.com/c.jpg"], "bb" * 32),
+    ]
+    result = create_contents_bulk(db, contents, from_user_id=1)
+
+    assert (result.created, result.existing, result.failed) == (1, 2, 0)
+    same_as_stored, new, same_as_new = result.items
+    assert same_as_stored.content_id == stored.id
+    assert same_as_new.content_id == new.content_id
+    assert get_contents(db)[-1].name == "New"
+
+
+@pytest.mark.parametrize("list_contents", [get_contents, lambda db: get_contents_by_user(db, user_id=1)])
+def test_list_contents_loads_response_relationships(db: Session, assert_query_count, list_contents):
+    contents = [
+        bulk_content(f"Listed {i}", [f"http://example.com/{i}.jpg"], content_authors=[ContentAuthorCreate(name=f"Author {i}")])
+        for i in range(5)
+    ]
+    create_contents_bulk(db, contents, from_user_id=1)
+    db.expunge_all()
+
+    # one query for the page, one each for the authors and sources of all rows
+    with assert_query_count(3):
+        response = [ContentSchema.model_validate(content, from_attributes=True) for content in list_contents(db)]
+    assert [content.content_authors[0].name for content in response] == [f"Author {i}" for i in range(5)]
+    assert [content.sources[0].value for content in response] == [f"http://example.com/{i}.jpg" for i in range(5)]
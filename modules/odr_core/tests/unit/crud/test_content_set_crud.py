@@ -5,7 +5,8 @@ from odr_core.crud.content_set import (
     add_content_to_set, remove_content_from_set, get_contents_in_set
 )
 from odr_core.schemas.content_set import ContentSetCreate, ContentSetUpdate
-from odr_core.models.content import Content, ContentSet
+from odr_core.models.content import Content, ContentSet, ContentSource
+from odr_core.schemas.content import Content as ContentSchema
 
 
 def test_create_content_set(db):
@@ -128,3 +129,26 @@ def test_get_contents_in_set_with_pagination(db):
     assert len(second_page) == 5
 
     assert all(c.id not in [content.id for content in first_page] for c in second_page)
+
+
+def test_get_contents_in_set_loads_response_relationships(db, assert_query_count):
+    content_set = create_content_set(db, ContentSetCreate(name="Test Set", created_by_id=1))
+    contents = [
+        Content(name=f"Test Content {i}", type="IMAGE", hash=f"test_hash_{i}", phash=f"test_phash_{i}",
+                url=[f"http://example.com/{i}.jpg"], format="jpg", size=1000, license="CC0", from_user_id=1,
+                sources=[ContentSource(type="URL", value=f"http://example.com/{i}.jpg")])
+        for i in range(4)
+    ]
+    db.add_all(contents)
+    db.commit()
+    for content in contents:
+        add_content_to_set(db, content_set_id=content_set.id, content_id=content.id)
+    content_set_id = content_set.id
+    db.expunge_all()
+
+    with assert_query_count(3):
+        response = [
+            ContentSchema.model_validate(content, from_attributes=True)
+            for content in get_contents_in_set(db, content_set_id=content_set_id)
+        ]
+    assert [content.sources[0].value for content in response] == [f"http://example.com/{i}.jpg" for i in range(4)]
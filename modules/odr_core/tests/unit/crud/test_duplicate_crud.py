@@ -0,0 +1,110 @@
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.crud import duplicate
+from odr_core.enums import (
+    ContentType,
+    DistanceMetric,
+    EmbeddingEngineType,
+    EmbeddingTarget,
+    VectorIndexMethod,
+    VectorStorage,
+)
+from odr_core.models.content import Content
+from odr_core.models.duplicate import ContentCluster
+from odr_core.models.embedding import ContentEmbedding, EmbeddingEngine
+from odr_core.schemas.embedding import EmbeddingIndex
+
+
+def fake_distance(column, metric, embedding):
+    # SQLite has no pgvector operators, every vector is filled with its content id
+    # so the distance is how far apart the content ids are
+    return func.abs(column.clause.table.c.content_id - embedding[0]) * 0.01
+
+
+@pytest.fixture
+def embeddings(db: Session):
+    db.add(EmbeddingEngine(name="clip", type=EmbeddingEngineType.IMAGE, version="1", supported=True))
+    # 1, 2 and 4 are within CONTENT_DUPLICATE_MAX_DISTANCE of each other, 20 is not
+    for content_id in (1, 2, 4, 20):
+        db.add(Content(id=content_id, name=f"Image {content_id}", type=ContentType.IMAGE, hash=f"hash_{content_id}"))
+        db.add(ContentEmbedding(
+            content_id=content_id,
+            embedding=[float(content_id)] * settings.CONTENT_EMBEDDING_DIMENSION,
+            embedding_engine_id=1,
+            from_user_id=1,
+        ))
+    db.commit()
+
+
+def test_assign_groups_near_duplicates(db: Session, embeddings):
+    with patch.object(duplicate, "embedding_distance", side_effect=fake_distance):
+        result = duplicate.assign_duplicate_clusters(db, 1)
+
+    assert (result.assigned, result.new_clusters) == (4, 2)
+    clusters = {row.content_id: row for row in db.query(ContentCluster)}
+    assert {content_id: row.cluster_id for content_id, row in clusters.items()} == {1: 1, 2: 1, 4: 1, 20: 20}
+    assert clusters[4].matched_content_id == 2
+    assert clusters[4].distance == pytest.approx(0.02)
+    assert clusters[1].matched_content_id is None
+
+
+def test_assign_is_incremental(db: Session, embeddings):
+    with patch.object(duplicate, "embedding_distance", side_effect=fake_distance):
+        first = duplicate.assign_duplicate_clusters(db, 1, content_ids=[20, 4])
+        second = duplicate.assign_duplicate_clusters(db, 1, content_ids=[1, 4])
+        rest = duplicate.assign_duplicate_clusters(db, 1)
+
+    # already clustered contents are skipped, later contents join the existing clusters
+    assert (first.assigned, second.assigned, rest.assigned) == (2, 1, 1)
+    clusters = {row.content_id: row.cluster_id for row in db.query(ContentCluster)}
+    assert clusters == {1: 4, 2: 4, 4: 4, 20: 20}
+
+
+def test_get_content_duplicates(db: Session, embeddings):
+    with patch.object(duplicate, "embedding_distance", side_effect=fake_distance):
+        duplicate.assign_duplicate_clusters(db, 1)
+
+    duplicates = duplicate.get_content_duplicates(db, 2, 1)
+    assert duplicates.cluster_id == 1
+    assert [member.content_id for member in duplicates.duplicates] == [1, 4]
+    assert duplicate.get_content_duplicates(db, 20, 1).duplicates == []
+    assert duplicate.get_content_duplicates(db, 2, 99) is None
+
+
+def test_assign_unknown_engine(db: Session):
+    with pytest.raises(ValueError):
+        duplicate.assign_duplicate_clusters(db, 99)
+
+
+def engine_index(metric: DistanceMetric, storage: VectorStorage = VectorStorage.FULL, target=EmbeddingTarget.CONTENT):
+    return EmbeddingIndex(
+        name="ix", target=target, method=VectorIndexMethod.HNSW, metric=metric, storage=storage,
+        embedding_engine_id=1, definition="",
+    )
+
+
+@pytest.mark.parametrize("indexes, expected", [
+    ([], False),
+    ([engine_index(DistanceMetric.L2)], False),
+    ([engine_index(DistanceMetric.COSINE, VectorStorage.HALF)], False),
+    ([engine_index(DistanceMetric.COSINE, target=EmbeddingTarget.ANNOTATION)], False),
+    ([engine_index(DistanceMetric.L2), engine_index(DistanceMetric.COSINE)], True),
+])
+def test_has_cosine_index_on_postgres(indexes, expected):
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    with patch.object(duplicate, "get_embedding_indexes", return_value=indexes):
+        assert duplicate.has_cosine_index(db, 1) is expected
+
+
+def test_assign_without_cosine_index(db: Session, embeddings):
+    with patch.object(duplicate, "has_cosine_index", return_value=False):
+        with pytest.raises(duplicate.MissingCosineIndexError, match="no cosine content index"):
+            duplicate.assign_duplicate_clusters(db, 1)
+    assert db.query(ContentCluster).count() == 0
@@ -7,14 +7,20 @@ from odr_core.schemas.embedding import (
     EmbeddingEngineUpdate,
     ContentEmbeddingCreate,
     AnnotationEmbeddingCreate,
-    EmbeddingVectorQuery
+    EmbeddingVectorQuery,
+    ContentEmbeddingBatchGenerate,
+    AnnotationEmbeddingBatchGenerate,
 )
 from odr_core.models.embedding import EmbeddingEngine, ContentEmbedding, AnnotationEmbedding
-from odr_core.enums import EmbeddingEngineType
+from odr_core.models.content import Content
+from odr_core.models.annotation import Annotation
+from odr_core.embedding_server import EmbeddingKind
+from odr_core.enums import EmbeddingEngineType, ContentType
 from odr_core.config import settings
 import numpy as np
 from PIL import Image
 from unittest.mock import patch
+from io import BytesIO
 
 
 def create_test_image():
@@ -223,3 +229,241 @@ def test_query_annotation_embedding(db: Session):
         results = embedding_crud.query_annotation_embedding(db, query)
         assert len(results) == 5
         mock_order_by.assert_called_once()
+
+
+def create_image_contents(db: Session, count: int):
+    contents = [
+        Content(
+            name=f"Image {i}",
+            type=ContentType.IMAGE,
+            url=[f"http://example.com/image_{i}.png"],
+            hash=f"hash_{i}",
+            phash=f"phash_{i}",
+            format="png",
+            size=1024,
+            license="CC0",
+            from_user_id=1,
+        )
+        for i in range(count)
+    ]
+    db.add_all(contents)
+    db.commit()
+    return [content.id for content in contents]
+
+
+def create_image_engine(db: Session):
+    return embedding_crud.create_embedding_engine(db, EmbeddingEngineCreate(
+        name="Qdrant/clip-ViT-B-32-vision",
+        version="1.0.0",
+        type=EmbeddingEngineType.IMAGE,
+        supported=True
+    ))
+
+
+def png_bytes():
+    buffer = BytesIO()
+    create_test_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_image_model_input_encodes_pil_images():
+    model_input = embedding_crud.image_model_input(create_test_image())
+    assert Image.open(model_input).size == (100, 100)
+
+
+def test_create_content_embeddings_bulk(db: Session):
+    engine = create_image_engine(db)
+    content_ids = create_image_contents(db, 3)
+    embedding_ids = embedding_crud.create_content_embeddings(db, [
+        ContentEmbeddingCreate(
+            content_id=content_id,
+            embedding=[0.1] * settings.CONTENT_EMBEDDING_DIMENSION,
+            embedding_engine_id=engine.id,
+            from_user_id=1
+        )
+        for content_id in content_ids
+    ])
+    assert len(embedding_ids) == 3
+    stored = {e.id: e.content_id for e in db.query(ContentEmbedding).all()}
+    assert [stored[embedding_id] for embedding_id in embedding_ids] == content_ids
+
+
+def test_generate_content_embeddings_reports_item_failures(db: Session):
+    engine = create_image_engine(db)
+    content_ids = create_image_contents(db, 3)
+
+    def download(url):
+        if url.endswith("image_1.png"):
+            raise ValueError(f"Failed to download image from {url}")
+        return png_bytes()
+
+    def embed(db, images, embedding_engine_id, batch_size=None):
+        return [[0.5] * settings.CONTENT_EMBEDDING_DIMENSION for _ in images]
+
+    batch = ContentEmbeddingBatchGenerate(
+        embedding_engine_id=engine.id,
+        content_ids=content_ids + [999],
+        from_user_id=1
+    )
+    with patch.object(embedding_crud, "download_bytes_from_url", side_effect=download), \
+            patch.object(embedding_crud, "generate_image_embeddings", side_effect=embed) as mock_embed:
+        result = embedding_crud.generate_content_embeddings(db, batch)
+
+    assert mock_embed.call_count == 1
+    assert result.created == 2
+    assert result.failed == 2
+    items = {item.content_id: item for item in result.items}
+    assert items[content_ids[0]].content_embedding_id is not None
+    assert items[content_ids[1]].error.startswith("Failed to download")
+    assert items[999].error == "Content not found"
+    assert db.query(ContentEmbedding).count() == 2
+
+
+def test_generate_content_embeddings_isolates_bad_images(db: Session):
+    engine = create_image_engine(db)
+    content_ids = create_image_contents(db, 3)
+    bad = b"\x89PNG\r\n\x1a\nbroken"
+
+    def embed(db, images, embedding_engine_id, batch_size=None):
+        if bad in images:
+            raise RuntimeError("Failed to decode image")
+        return [[0.5] * settings.CONTENT_EMBEDDING_DIMENSION for _ in images]
+
+    downloads = {f"http://example.com/image_{i}.png": png_bytes() for i in range(3)}
+    downloads["http://example.com/image_2.png"] = bad
+    batch = ContentEmbeddingBatchGenerate(embedding_engine_id=engine.id, content_ids=content_ids, from_user_id=1)
+    with patch.object(embedding_crud, "_download_content_image", side_effect=lambda url: (downloads[url], None)), \
+            patch.object(embedding_crud, "generate_image_embeddings", side_effect=embed):
+        result = embedding_crud.generate_content_embeddings(db, batch)
+
+    assert result.created == 2
+    items = {item.content_id: item for item in result.items}
+    assert items[content_ids[2]].error == "Failed to decode image"
+
+
+def test_generate_content_embeddings_skips_existing(db: Session):
+    engine = create_image_engine(db)
+    content_ids = create_image_contents(db, 1)
+    embedding_crud.create_content_embedding(db, ContentEmbeddingCreate(
+        content_id=content_ids[0],
+        embedding=[0.1] * settings.CONTENT_EMBEDDING_DIMENSION,
+        embedding_engine_id=engine.id,
+        from_user_id=1
+    ))
+    batch = ContentEmbeddingBatchGenerate(embedding_engine_id=engine.id, content_ids=content_ids, from_user_id=1)
+    result = embedding_crud.generate_content_embeddings(db, batch)
+    assert result.created == 0
+    assert result.items[0].error == "Content embedding already exists"
+
+
+def create_annotations(db: Session, annotations):
+    rows = [Annotation(content_id=1, annotation=annotation, from_user_id=1) for annotation in annotations]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def create_text_engine(db: Session):
+    return embedding_crud.create_embedding_engine(db, EmbeddingEngineCreate(
+        name="BAAI/bge-small-en-v1.5",
+        version="1.0.0",
+        type=EmbeddingEngineType.TEXT,
+        supported=True
+    ))
+
+
+def fake_text_embeddings(db, texts, embedding_engine_id, batch_size=None):
+    return [[float(len(text))] * settings.ANNOTATION_EMBEDDING_DIMENSION for text in texts]
+
+
+@pytest.mark.parametrize("annotation,expected", [
+    ("a plain caption", "a plain caption"),
+    ({"caption": "a red square", "score": 1}, "a red square"),
+    ({"tags": ["red", "square"]}, '{"tags": ["red", "square"]}'),
+])
+def test_annotation_text(annotation, expected):
+    assert embedding_crud.annotation_text(annotation) == expected
+
+
+def test_upsert_annotation_embeddings_replaces_existing(db: Session):
+    engine = create_text_engine(db)
+    embedding = AnnotationEmbeddingCreate(
+        annotation_id=1,
+        embedding=[0.1] * settings.ANNOTATION_EMBEDDING_DIMENSION,
+        embedding_engine_id=engine.id,
+        from_user_id=1
+    )
+    assert embedding_crud.upsert_annotation_embeddings(db, [embedding]) == 1
+    embedding.embedding = [0.2] * settings.ANNOTATION_EMBEDDING_DIMENSION
+    assert embedding_crud.upsert_annotation_embeddings(db, [embedding]) == 1
+
+    stored = db.query(AnnotationEmbedding).all()
+    assert len(stored) == 1
+    assert stored[0].embedding[0] == pytest.approx(0.2)
+
+
+def test_generate_annotation_embeddings_pages_in_keyset_order(db: Session):
+    engine = create_text_engine(db)
+    annotation_ids = create_annotations(db, [{"caption": "x" * i} for i in range(1, 6)])
+    batch = AnnotationEmbeddingBatchGenerate(embedding_engine_id=engine.id, from_user_id=1)
+
+    with patch.object(settings, "EMBEDDING_PAGE_SIZE", 2), \
+            patch.object(embedding_crud, "generate_text_embeddings", side_effect=fake_text_embeddings) as mock_embed:
+        result = embedding_crud.generate_annotation_embeddings(db, batch)
+
+    assert mock_embed.call_count == 3
+    assert result.processed == 5
+    assert result.upserted == 5
+    assert result.last_annotation_id == annotation_ids[-1]
+    assert db.query(AnnotationEmbedding).count() == 5
+
+
+def test_generate_annotation_embeddings_resumes_and_skips_existing(db: Session):
+    engine = create_text_engine(db)
+    annotation_ids = create_annotations(db, ["one", "two", "three"])
+    first = AnnotationEmbeddingBatchGenerate(embedding_engine_id=engine.id, from_user_id=1, max_annotations=2)
+    with patch.object(embedding_crud, "generate_text_embeddings", side_effect=fake_text_embeddings):
+        result = embedding_crud.generate_annotation_embeddings(db, first)
+        assert result.last_annotation_id == annotation_ids[1]
+
+        missing = AnnotationEmbeddingBatchGenerate(embedding_engine_id=engine.id, from_user_id=1, only_missing=True)
+        result = embedding_crud.generate_annotation_embeddings(db, missing)
+
+    assert result.processed == 1
+    assert result.last_annotation_id == annotation_ids[2]
+
+
+def test_text_embeddings_use_embedding_server_when_configured(db: Session):
+    engine = create_text_engine(db)
+    with patch.object(embedding_crud, "get_embedding_server_client") as mock_client, \
+            patch.object(embedding_crud, "embed_in_process") as mock_embed:
+        mock_client.return_value.embed.return_value = [[0.5] * 4]
+        assert embedding_crud.generate_text_embedding(db, "a query", engine.id) == [0.5] * 4
+
+    mock_client.return_value.embed.assert_called_once_with(EmbeddingKind.QUERY, engine.name, [b"a query"])
+    mock_embed.assert_not_called()
+
+
+def test_create_content_embedding_uses_engine_dimension(db: Session):
+    engine_data = EmbeddingEngineCreate(
+        name="Qdrant/resnet50-onnx",
+        version="1.0.0",
+        type=EmbeddingEngineType.IMAGE,
+        supported=True,
+        dimension=2048,
+    )
+    created_engine = embedding_crud.create_embedding_engine(db, engine_data)
+    assert created_engine.dimension == 2048
+
+    def embedding_data(length):
+        return ContentEmbeddingCreate(
+            content_id=1, embedding=[0.1] * length, embedding_engine_id=created_engine.id, from_user_id=1
+        )
+
+    with pytest.raises(ValueError):
+        embedding_crud.create_content_embedding(db, embedding_data(settings.CONTENT_EMBEDDING_DIMENSION))
+    with pytest.raises(ValueError):
+        embedding_crud.create_content_embeddings(db, [embedding_data(2048), embedding_data(512)])
+
+    created_embedding = embedding_crud.create_content_embedding(db, embedding_data(2048))
+    assert len(created_embedding.embedding) == 2048
@@ -5,6 +5,7 @@ from odr_core.crud.embedding import (
     create_embedding_engine,
     get_embedding_engine,
     get_embedding_engines,
+    get_supported_embedding_engines,
     update_embedding_engine,
     delete_embedding_engine
 )
@@ -55,6 +56,17 @@ def test_get_embedding_engines(db: Session):
     assert len(engines) >= 3
 
 
+def test_get_supported_embedding_engines(db: Session):
+    supported = create_embedding_engine(db, EmbeddingEngineCreate(
+        name="Supported Engine", version="1.0.0", type=EmbeddingEngineType.TEXT, supported=True
+    ))
+    create_embedding_engine(db, EmbeddingEngineCreate(
+        name="Unsupported Engine", version="1.0.0", type=EmbeddingEngineType.TEXT, supported=False
+    ))
+    engines = get_supported_embedding_engines(db)
+    assert [engine.id for engine in engines] == [supported.id]
+
+
 def test_update_embedding_engine(db: Session):
     engine_data = EmbeddingEngineCreate(
         name="Update Test Engine",
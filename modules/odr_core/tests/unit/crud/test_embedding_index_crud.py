@@ -0,0 +1,178 @@
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from unittest.mock import MagicMock, patch
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql
+from odr_core.crud import embedding_index
+from odr_core.crud.embedding_index import (
+    build_embedding_index_ddl,
+    embedding_distance,
+    embedding_index_name,
+    create_embedding_index,
+    delete_embedding_index,
+    apply_search_parameters,
+    quantized_distance,
+    INDEX_NAME_PATTERN,
+)
+from odr_core.schemas.embedding import EmbeddingIndexCreate
+from odr_core.models.embedding import ContentEmbedding
+from odr_core.enums import EmbeddingTarget, VectorIndexMethod, DistanceMetric, VectorStorage
+from odr_core.config import settings
+
+
+def test_embedding_index_name():
+    assert embedding_index_name(EmbeddingTarget.CONTENT, VectorIndexMethod.HNSW, 3) == "ix_content_embeddings_hnsw_l2_engine_3"
+    assert embedding_index_name(
+        EmbeddingTarget.ANNOTATION, VectorIndexMethod.IVFFLAT, 7, DistanceMetric.COSINE
+    ) == "ix_annotation_embeddings_ivfflat_cosine_engine_7"
+
+
+def test_build_hnsw_index_ddl_uses_defaults():
+    ddl = build_embedding_index_ddl(1, EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT))
+    assert f'ON "content_embeddings" USING hnsw ((embedding::vector({settings.CONTENT_EMBEDDING_DIMENSION})) vector_l2_ops)' in ddl
+    assert f"m = {settings.EMBEDDING_HNSW_M}, ef_construction = {settings.EMBEDDING_HNSW_EF_CONSTRUCTION}" in ddl
+    assert ddl.endswith("WHERE embedding_engine_id = 1")
+    assert "CONCURRENTLY" not in ddl
+
+
+def test_build_ivfflat_index_ddl():
+    ddl = build_embedding_index_ddl(
+        2,
+        EmbeddingIndexCreate(
+            target=EmbeddingTarget.ANNOTATION,
+            method=VectorIndexMethod.IVFFLAT,
+            lists=250,
+            concurrently=True,
+        ),
+    )
+    assert ddl.startswith('CREATE INDEX CONCURRENTLY IF NOT EXISTS "ix_annotation_embeddings_ivfflat_l2_engine_2"')
+    assert f"USING ivfflat ((embedding::vector({settings.ANNOTATION_EMBEDDING_DIMENSION})) vector_l2_ops)" in ddl
+    assert "WITH (lists = 250)" in ddl
+    assert ddl.endswith("WHERE embedding_engine_id = 2")
+
+
+@pytest.mark.parametrize("metric,operator_class", [
+    (DistanceMetric.L2, "vector_l2_ops"),
+    (DistanceMetric.COSINE, "vector_cosine_ops"),
+    (DistanceMetric.INNER_PRODUCT, "vector_ip_ops"),
+])
+def test_build_index_ddl_uses_metric_operator_class(metric, operator_class):
+    ddl = build_embedding_index_ddl(1, EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT, metric=metric))
+    assert f"(embedding::vector({settings.CONTENT_EMBEDDING_DIMENSION})) {operator_class})" in ddl
+    assert f"ix_content_embeddings_hnsw_{metric.value}_engine_1" in ddl
+
+
+@pytest.mark.parametrize("metric,operator", [
+    (DistanceMetric.L2, "<->"),
+    (DistanceMetric.COSINE, "<=>"),
+    (DistanceMetric.INNER_PRODUCT, "<#>"),
+])
+def test_embedding_distance_operator(metric, operator):
+    expression = embedding_distance(ContentEmbedding.embedding, metric, [0.1] * settings.CONTENT_EMBEDDING_DIMENSION)
+    compiled = str(expression.compile(dialect=postgresql.dialect()))
+    assert f"content_embeddings.embedding {operator} %(embedding_1)s" == compiled
+
+
+def test_build_hnsw_index_ddl_rejects_small_ef_construction():
+    with pytest.raises(ValueError):
+        build_embedding_index_ddl(
+            1, EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT, m=32, ef_construction=32)
+        )
+
+
+def test_build_halfvec_index_ddl():
+    ddl = build_embedding_index_ddl(
+        1,
+        EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT, metric=DistanceMetric.COSINE, storage=VectorStorage.HALF),
+    )
+    assert '"ix_content_embeddings_hnsw_halfvec_cosine_engine_1"' in ddl
+    assert f"USING hnsw ((embedding::halfvec({settings.CONTENT_EMBEDDING_DIMENSION})) halfvec_cosine_ops)" in ddl
+
+
+def test_build_binary_index_ddl():
+    ddl = build_embedding_index_ddl(
+        2,
+        EmbeddingIndexCreate(
+            target=EmbeddingTarget.ANNOTATION, method=VectorIndexMethod.IVFFLAT, storage=VectorStorage.BINARY
+        ),
+    )
+    assert '"ix_annotation_embeddings_ivfflat_bit_l2_engine_2"' in ddl
+    assert (
+        f"USING ivfflat ((binary_quantize(embedding)::bit({settings.ANNOTATION_EMBEDDING_DIMENSION})) bit_hamming_ops)"
+        in ddl
+    )
+
+
+@pytest.mark.parametrize("storage", list(VectorStorage))
+def test_index_name_pattern_parses_storage(storage):
+    name = embedding_index_name(EmbeddingTarget.CONTENT, VectorIndexMethod.HNSW, 4, DistanceMetric.L2, storage)
+    match = INDEX_NAME_PATTERN.match(name)
+    assert VectorStorage(match.group("storage") or VectorStorage.FULL) == storage
+    assert match.group("metric") == "l2"
+    assert match.group("engine_id") == "4"
+
+
+@pytest.mark.parametrize("storage,expected", [
+    (VectorStorage.HALF, "CAST(content_embeddings.embedding AS HALFVEC(512)) <=> CAST(CAST("),
+    (VectorStorage.BINARY, "CAST(binary_quantize(content_embeddings.embedding) AS BIT(512)) <~> CAST(binary_quantize("),
+])
+def test_quantized_distance_matches_index_expression(storage, expected):
+    expression = quantized_distance(ContentEmbedding.embedding, DistanceMetric.COSINE, [0.1] * 512, storage, 512)
+    assert str(expression.compile(dialect=postgresql.dialect())).startswith(expected)
+
+
+def test_create_quantized_index_needs_pgvector_07(db: Session):
+    index = EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT, storage=VectorStorage.HALF)
+    with patch.object(embedding_index, "pgvector_version", return_value=(0, 6, 2)):
+        with pytest.raises(ValueError):
+            create_embedding_index(db, 1, index)
+
+
+def test_build_index_ddl_uses_engine_dimension():
+    ddl = build_embedding_index_ddl(1, EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT), dimension=1536)
+    assert "USING hnsw ((embedding::vector(1536)) vector_l2_ops)" in ddl
+
+
+@pytest.mark.parametrize("storage,dimension,allowed", [
+    (VectorStorage.FULL, 2048, False),
+    (VectorStorage.HALF, 2048, True),
+    (VectorStorage.HALF, 4096, False),
+    (VectorStorage.BINARY, 4096, True),
+])
+def test_build_index_ddl_checks_indexable_dimension(storage, dimension, allowed):
+    index = EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT, storage=storage)
+    if allowed:
+        build_embedding_index_ddl(1, index, dimension)
+    else:
+        with pytest.raises(ValueError):
+            build_embedding_index_ddl(1, index, dimension)
+
+
+def test_create_embedding_index_unknown_engine(db: Session):
+    with pytest.raises(ValueError):
+        create_embedding_index(db, 999, EmbeddingIndexCreate(target=EmbeddingTarget.CONTENT))
+
+
+def test_delete_embedding_index_rejects_foreign_names(db: Session):
+    assert delete_embedding_index(db, 1, "ix_contents_hash") is False
+    assert delete_embedding_index(db, 1, "ix_content_embeddings_hnsw_l2_engine_2") is False
+
+
+def test_apply_search_parameters_is_noop_outside_postgres(db: Session):
+    apply_search_parameters(db, ef_search=100, probes=10, limit=500)
+
+
+@pytest.mark.parametrize("version,iterative", [((0, 8, 0), True), ((0, 7, 4), False)])
+def test_apply_search_parameters_filtered(version, iterative):
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    with patch.object(embedding_index, "pgvector_version", return_value=version):
+        apply_search_parameters(db, limit=10, filtered=True)
+
+    parameters = [call.args[1] for call in db.execute.call_args_list]
+    if iterative:
+        assert {"parameter": "hnsw.iterative_scan", "value": settings.EMBEDDING_ITERATIVE_SCAN} in parameters
+        assert {"parameter": "ivfflat.iterative_scan", "value": "relaxed_order"} in parameters
+    else:
+        # older pgvector over-fetches from the index instead
+        assert parameters == [{"value": str(10 * settings.EMBEDDING_FILTER_OVERFETCH)}]
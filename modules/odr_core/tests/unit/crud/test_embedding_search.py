@@ -0,0 +1,216 @@
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.crud import embedding_search
+from odr_core.enums import ContentStatus, ContentType, EmbeddingEngineType, VectorStorage
+from odr_core.models.annotation import Annotation
+from odr_core.models.content import Content, ContentSetItem
+from odr_core.models.embedding import AnnotationEmbedding, ContentEmbedding, EmbeddingEngine
+from odr_core.schemas.embedding import (
+    ContentEmbeddingBatchSearchQuery,
+    ContentEmbeddingSearchQuery,
+    EmbeddingSearchQuery,
+)
+
+
+def fake_distance(column, metric, embedding):
+    # SQLite has no pgvector operators, rank rows by id instead. The column is
+    # cast to the engine's dimension, so take the table from the cast clause
+    return column.clause.table.c.id * 0.5
+
+
+@pytest.fixture(autouse=True)
+def embedding_engine(db: Session):
+    db.add(EmbeddingEngine(name="clip", type=EmbeddingEngineType.IMAGE, version="1", supported=True))
+    db.commit()
+
+
+@pytest.fixture
+def content_embeddings(db: Session):
+    for i in range(3):
+        db.add(Content(
+            name=f"Image {i}",
+            type=ContentType.IMAGE,
+            hash=f"hash_{i}",
+            license="CC0" if i < 2 else "CC-BY-NC",
+            status=ContentStatus.AVAILABLE if i > 0 else ContentStatus.PENDING,
+            from_user_id=1,
+            from_team_id=7 if i == 2 else None,
+        ))
+    db.flush()
+    for i in range(3):
+        db.add(ContentEmbedding(
+            content_id=i + 1,
+            embedding=[float(i)] * settings.CONTENT_EMBEDDING_DIMENSION,
+            embedding_engine_id=1,
+            from_user_id=1,
+        ))
+    db.commit()
+
+
+def content_query(embedding_engine_id=1, **kwargs):
+    return ContentEmbeddingSearchQuery(
+        embedding=[0.0] * settings.CONTENT_EMBEDDING_DIMENSION, embedding_engine_id=embedding_engine_id, **kwargs
+    )
+
+
+def test_encode_embedding_round_trip():
+    encoded = embedding_search.encode_embedding([0.5, -1.0, 2.25])
+    assert embedding_search.decode_embedding(encoded) == [0.5, -1.0, 2.25]
+
+
+def test_search_content_returns_ids_and_distances(db: Session, content_embeddings):
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        hits = embedding_search.search_content_embeddings(db, content_query(), skip=1, limit=2)
+
+    assert [(hit.id, hit.content_id, hit.distance) for hit in hits] == [(2, 2, 1.0), (3, 3, 1.5)]
+    assert all(hit.embedding is None and hit.content is None for hit in hits)
+
+
+def test_search_content_includes_embedding_and_fields(db: Session, content_embeddings):
+    query = content_query(include_embedding=True, include_fields=True)
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        hits = embedding_search.search_content_embeddings(db, query, limit=1)
+
+    assert len(hits) == 1
+    assert embedding_search.decode_embedding(hits[0].embedding) == [0.0] * settings.CONTENT_EMBEDDING_DIMENSION
+    assert hits[0].content.name == "Image 0"
+    assert hits[0].content.type == ContentType.IMAGE
+
+
+def test_search_annotation_includes_fields(db: Session):
+    db.add(Annotation(content_id=1, annotation={"caption": "red square"}, from_user_id=1))
+    db.add(AnnotationEmbedding(
+        annotation_id=1,
+        embedding=[0.1] * settings.ANNOTATION_EMBEDDING_DIMENSION,
+        embedding_engine_id=1,
+        from_user_id=1,
+    ))
+    db.commit()
+
+    query = EmbeddingSearchQuery(
+        embedding=[0.0] * settings.ANNOTATION_EMBEDDING_DIMENSION, embedding_engine_id=1, include_fields=True
+    )
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        hits = embedding_search.search_annotation_embeddings(db, query)
+
+    assert hits[0].annotation_id == 1
+    assert hits[0].annotation.annotation == {"caption": "red square"}
+
+
+@pytest.mark.parametrize("filters,expected", [
+    ({"status": [ContentStatus.AVAILABLE]}, [2, 3]),
+    ({"license": ["CC0"]}, [1, 2]),
+    ({"status": [ContentStatus.AVAILABLE], "license": ["CC0"]}, [2]),
+    ({"from_team_id": 7}, [3]),
+    ({"content_set_id": 5}, [1, 3]),
+])
+def test_search_content_filters_in_sql(db: Session, content_embeddings, filters, expected):
+    db.add_all([ContentSetItem(content_set_id=5, content_id=1), ContentSetItem(content_set_id=5, content_id=3)])
+    db.commit()
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        hits = embedding_search.search_content_embeddings(db, content_query(**filters))
+    assert [hit.content_id for hit in hits] == expected
+
+
+def test_filtered_search_page_is_filled(db: Session, content_embeddings):
+    # the limit applies after filtering, so a filtered page is never short
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        hits = embedding_search.search_content_embeddings(db, content_query(status=[ContentStatus.AVAILABLE]), limit=2)
+    assert len(hits) == 2
+
+
+def test_quantized_search_reranks_candidates(db: Session, content_embeddings):
+    # the coarse pass prefers high ids, so with a factor of 2 only contents 3 and 2
+    # are candidates, and the full precision re-rank puts 2 first
+    def fake_quantized_distance(column, metric, embedding, storage, dimension):
+        return -column.class_.id
+
+    query = content_query(storage=VectorStorage.BINARY, rerank_factor=2)
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance), \
+            patch.object(embedding_search, "quantized_distance", side_effect=fake_quantized_distance):
+        hits = embedding_search.search_content_embeddings(db, query, limit=1)
+
+    assert [(hit.content_id, hit.distance) for hit in hits] == [(2, 1.0)]
+
+
+def test_search_rejects_wrong_dimension(db: Session):
+    query = ContentEmbeddingSearchQuery(embedding=[0.0, 1.0], embedding_engine_id=1)
+    with pytest.raises(ValueError):
+        embedding_search.search_content_embeddings(db, query)
+
+
+def test_batch_search_with_vectors(db: Session, content_embeddings):
+    query = ContentEmbeddingBatchSearchQuery(
+        embedding_engine_id=1, embeddings=[[0.0] * settings.CONTENT_EMBEDDING_DIMENSION] * 2, k=2
+    )
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        results = embedding_search.batch_search_content_embeddings(db, query)
+
+    assert [result.query_index for result in results] == [0, 1]
+    assert all([hit.content_id for hit in result.hits] == [1, 2] for result in results)
+
+
+def test_batch_search_by_content_excludes_self(db: Session, content_embeddings):
+    query = ContentEmbeddingBatchSearchQuery(embedding_engine_id=1, content_ids=[1, 42], k=2)
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        found, missing = embedding_search.batch_search_content_embeddings(db, query)
+
+    assert found.content_id == 1
+    assert [hit.content_id for hit in found.hits] == [2, 3]
+    assert missing.content_id == 42
+    assert missing.hits == []
+    assert missing.error == "No embedding stored for content"
+
+
+def test_batch_search_applies_filters(db: Session, content_embeddings):
+    query = ContentEmbeddingBatchSearchQuery(
+        embedding_engine_id=1, content_ids=[2], status=[ContentStatus.AVAILABLE], exclude_self=False
+    )
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        (result,) = embedding_search.batch_search_content_embeddings(db, query)
+    assert [hit.content_id for hit in result.hits] == [2, 3]
+
+
+def test_batch_search_casts_query_vectors_on_postgres():
+    query = ContentEmbeddingBatchSearchQuery(embedding_engine_id=1, content_ids=[1], k=2)
+    statement = embedding_search._lateral_neighbours(query, 3, [], [(0, 1, [0.0, 1.0, 2.0])], exclude_self=True)
+    compiled = str(statement.compile(dialect=postgresql.dialect()))
+    assert "CAST(content_embeddings.embedding AS VECTOR(3)) <-> CAST(queries.embedding AS VECTOR(3))" in compiled
+    assert "LATERAL" in compiled
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"content_ids": [1], "embeddings": [[0.0] * settings.CONTENT_EMBEDDING_DIMENSION]},
+    {"embeddings": [[0.0, 1.0]]},
+])
+def test_batch_search_rejects_invalid_queries(db: Session, kwargs):
+    with pytest.raises(ValueError):
+        embedding_search.batch_search_content_embeddings(
+            db, ContentEmbeddingBatchSearchQuery(embedding_engine_id=1, **kwargs)
+        )
+
+
+def test_search_uses_engine_dimension(db: Session):
+    db.add(EmbeddingEngine(name="resnet50", type=EmbeddingEngineType.IMAGE, version="1", dimension=4))
+    db.add(ContentEmbedding(content_id=1, embedding=[1.0] * 4, embedding_engine_id=2, from_user_id=1))
+    db.commit()
+
+    query = ContentEmbeddingSearchQuery(embedding=[0.0] * 4, embedding_engine_id=2)
+    with patch.object(embedding_search, "embedding_distance", side_effect=fake_distance):
+        hits = embedding_search.search_content_embeddings(db, query)
+    assert [hit.content_id for hit in hits] == [1]
+
+    with pytest.raises(ValueError):
+        embedding_search.search_content_embeddings(db, content_query(embedding_engine_id=2))
+
+
+def test_search_rejects_unknown_engine(db: Session):
+    with pytest.raises(ValueError):
+        embedding_search.search_content_embeddings(db, content_query(embedding_engine_id=99))
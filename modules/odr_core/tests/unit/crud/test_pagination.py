@@ -0,0 +1,129 @@
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from odr_core.crud.annotation import get_annotations_by_content
+from odr_core.crud.content import get_contents, get_contents_by_user
+from odr_core.crud.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_cursor,
+    encode_cursor,
+    next_cursor,
+    set_next_cursor_header,
+)
+from odr_core.enums import ContentType
+from odr_core.models.annotation import Annotation
+from odr_core.models.content import Content
+
+
+def add_contents(db: Session, count: int, from_user_id: int = 1):
+    # pairs of contents share a timestamp so the id has to break the tie
+    contents = [
+        Content(
+            name=f"Content {i}",
+            type=ContentType.IMAGE,
+            hash=f"page_hash_{i}",
+            format="jpg",
+            size=1024,
+            license="CC0",
+            from_user_id=from_user_id,
+            created_at=datetime(2024, 1, 1, 0, 0, i // 2),
+        )
+        for i in range(count)
+    ]
+    db.add_all(contents)
+    db.commit()
+    return contents
+
+
+def walk(fetch, limit: int):
+    pages = []
+    cursor = None
+    while True:
+        page = fetch(limit=limit, cursor=cursor)
+        pages.append(page)
+        cursor = next_cursor(page, limit)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 12, 30, 45, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "WzEsMiwzXQ", encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_get_contents_cursor_walk_matches_offset(db: Session):
+    add_contents(db, 7)
+
+    pages = walk(lambda **kwargs: get_contents(db, **kwargs), limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    walked = [content.id for page in pages for content in page]
+    offset = [content.id for skip in (0, 3, 6) for content in get_contents(db, skip=skip, limit=3)]
+    assert walked == offset
+    assert len(set(walked)) == 7
+
+
+def test_get_contents_cursor_after_last_row(db: Session):
+    contents = add_contents(db, 2)
+    assert get_contents(db, limit=2, cursor=encode_cursor(contents[-1].created_at, contents[-1].id)) == []
+
+
+def test_get_contents_invalid_cursor(db: Session):
+    with pytest.raises(ValueError):
+        get_contents(db, cursor="not a cursor")
+
+
+def test_get_contents_by_user_cursor(db: Session):
+    add_contents(db, 4, from_user_id=1)
+    add_contents(db, 3, from_user_id=2)
+
+    pages = walk(lambda **kwargs: get_contents_by_user(db, user_id=2, **kwargs), limit=2)
+
+    assert [len(page) for page in pages] == [2, 1]
+    assert all(content.from_user_id == 2 for page in pages for content in page)
+
+
+def test_get_annotations_by_content_cursor(db: Session):
+    content = add_contents(db, 1)[0]
+    db.add_all(
+        Annotation(content_id=content.id, annotation={"index": i}, from_user_id=1, created_at=datetime(2024, 1, 2))
+        for i in range(5)
+    )
+    db.commit()
+
+    pages = walk(lambda **kwargs: get_annotations_by_content(db, content_id=content.id, **kwargs), limit=2)
+
+    assert [annotation.annotation["index"] for page in pages for annotation in page] == list(range(5))
+
+
+def test_set_next_cursor_header(db: Session):
+    contents = add_contents(db, 2)
+    headers = {}
+    set_next_cursor_header(headers, contents, limit=3)
+    assert headers == {}
+    set_next_cursor_header(headers, contents, limit=2)
+    assert decode_cursor(headers[NEXT_CURSOR_HEADER]) == (contents[-1].created_at, contents[-1].id)
+
+
+def test_created_at_is_required(db: Session):
+    # a row without created_at would have no place in the (created_at, id) order
+    undated = insert(Content).values(
+        name="Undated", type=ContentType.IMAGE, hash="undated", format="jpg", size=1024, license="CC0",
+        from_user_id=1, created_at=None,
+    )
+    with pytest.raises(IntegrityError):
+        db.execute(undated)
+    db.rollback()
@@ -0,0 +1,119 @@
+# SPDX-License-Identifier: Apache-2.0
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from odr_core.config import settings
+from odr_core.crud.perceptual_hash import PerceptualHashIndex, search_perceptual_hash, content_hash_indexes
+from odr_core.enums import ContentType, PerceptualHashType
+from odr_core.models.base import Base
+from odr_core.models.content import Content
+from odr_core.perceptual_hash import hash_to_hex, to_signed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def add_content(db: Session, content_id: int, phash: str, dhash=None):
+    db.add(Content(id=content_id, type=ContentType.IMAGE, hash=f"hash_{content_id}", phash=phash, dhash=dhash))
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def reset_indexes():
+    yield
+    for index in content_hash_indexes.values():
+        index.reset()
+
+
+def test_content_keeps_hash_bits_in_sync(db: Session):
+    add_content(db, 1, "ffffffffffffffff", "0000000000000001")
+    content = db.get(Content, 1)
+    assert content.phash64 == -1
+    assert content.dhash64 == 1
+
+    content.phash = "tbd"
+    db.commit()
+    assert db.get(Content, 1).phash64 is None
+
+
+def test_search_within_radius(db: Session):
+    add_content(db, 1, "0000000000000000")
+    add_content(db, 2, "0000000000000007")
+    add_content(db, 3, "00000000000000ff")
+    add_content(db, 4, "")
+
+    hits = search_perceptual_hash(db, "0000000000000001", max_distance=2)
+    assert [(hit.content_id, hit.distance) for hit in hits] == [(1, 1), (2, 2)]
+
+    hits = search_perceptual_hash(db, "0000000000000000")
+    assert [hit.content_id for hit in hits] == [1, 2]
+
+
+def test_search_by_dhash(db: Session):
+    add_content(db, 1, "0000000000000000", hash_to_hex(to_signed(1 << 63)))
+    hits = search_perceptual_hash(db, "8000000000000001", PerceptualHashType.DHASH, 1)
+    assert [(hit.content_id, hit.distance) for hit in hits] == [(1, 1)]
+
+
+def test_search_rejects_invalid_hash(db: Session):
+    with pytest.raises(ValueError):
+        search_perceptual_hash(db, "tbd")
+
+
+def test_index_picks_up_new_contents_and_rebuilds(db: Session):
+    clock = FakeClock()
+    index = PerceptualHashIndex(Content.phash64, clock=clock, background=False)
+    add_content(db, 1, "0000000000000000")
+    assert [hit.content_id for hit in index.search(db, 0, 0)] == [1]
+
+    add_content(db, 2, "0000000000000000")
+    assert [hit.content_id for hit in index.search(db, 0, 0)] == [1, 2]
+
+    db.get(Content, 1).phash = "ffffffffffffffff"
+    db.commit()
+    # changed hashes stay in the tree until the next rebuild
+    assert [hit.content_id for hit in index.search(db, 0, 0)] == [1, 2]
+    clock.now = settings.PERCEPTUAL_HASH_INDEX_REBUILD_SECONDS
+    assert [hit.content_id for hit in index.search(db, 0, 0)] == [2]
+    assert index.size == 2
+
+
+def test_rebuild_runs_in_the_background(tmp_path):
+    # a file database, the rebuild thread opens a connection of its own
+    engine = create_engine(f"sqlite:///{tmp_path / 'hashes.db'}")
+    Base.metadata.create_all(bind=engine)
+    clock = FakeClock()
+    index = PerceptualHashIndex(Content.phash64, clock=clock)
+    with Session(bind=engine) as db:
+        add_content(db, 1, "0000000000000000")
+        assert [hit.content_id for hit in index.search(db, 0, 0)] == [1]
+
+        # hold the rebuild until the searches below are answered
+        release = threading.Event()
+        load = index._load
+
+        def held_load(db, after_content_id):
+            if threading.current_thread().name == "perceptual-hash-index":
+                release.wait(5)
+            return load(db, after_content_id)
+
+        index._load = held_load
+        db.get(Content, 1).phash = "ffffffffffffffff"
+        db.commit()
+        clock.now = settings.PERCEPTUAL_HASH_INDEX_REBUILD_SECONDS
+        # searches keep using the stale tree while it is rebuilt
+        assert [hit.content_id for hit in index.search(db, 0, 0)] == [1]
+        assert [hit.content_id for hit in index.search(db, 0, 0)] == [1]
+        release.set()
+        index.wait_for_rebuild(5)
+        assert index.search(db, 0, 0) == []
+        assert [hit.content_id for hit in index.search(db, -1, 0)] == [1]
+    engine.dispose()
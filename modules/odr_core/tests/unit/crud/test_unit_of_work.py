@@ -0,0 +1,98 @@
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from sqlalchemy import event
+
+from odr_core.crud.content import create_content, delete_content, get_content, get_content_sources, update_content
+from odr_core.crud.content_event import create_content_event
+from odr_core.crud.content_set import add_content_to_set, create_content_set
+from odr_core.crud.unit_of_work import in_unit_of_work, unit_of_work
+from odr_core.enums import ContentSourceType, ContentStatus, ContentType
+from odr_core.schemas.content import ContentCreate, ContentEventCreate, ContentSourceCreate, ContentUpdate
+from odr_core.schemas.content_set import ContentSetCreate
+
+
+@pytest.fixture
+def commits(db):
+    counter = []
+
+    def count(session):
+        counter.append(session)
+
+    event.listen(db, "after_commit", count)
+    yield counter
+    event.remove(db, "after_commit", count)
+
+
+def content_create(name, sources):
+    return ContentCreate(
+        name=name,
+        type=ContentType.IMAGE,
+        hash="tbd",
+        phash="tbd",
+        format="jpg",
+        size=1024,
+        license="CC0",
+        sources=[ContentSourceCreate(type=ContentSourceType.URL, value=value) for value in sources],
+    )
+
+
+def test_composed_calls_commit_once(db, commits):
+    with unit_of_work(db):
+        content = create_content(db, content_create("Composed", ["http://example.com/a.jpg"]), from_user_id=1)
+        create_content_event(db, ContentEventCreate(content_id=content.id, status=ContentStatus.AVAILABLE, set_by=1))
+        assert in_unit_of_work(db)
+    assert not in_unit_of_work(db)
+    assert len(commits) == 1
+
+
+def test_failed_unit_of_work_rolls_back_every_call(db, commits):
+    with pytest.raises(RuntimeError):
+        with unit_of_work(db):
+            content = create_content(db, content_create("Rolled back", ["http://example.com/b.jpg"]), from_user_id=1)
+            content_id = content.id
+            raise RuntimeError("fail after the writes")
+    assert commits == []
+    assert get_content(db, content_id) is None
+    assert get_content_sources(db, content_id) == []
+
+
+def test_composite_crud_runs_in_one_transaction(db, commits):
+    content = create_content(
+        db, content_create("Sources", ["http://example.com/1.jpg", "http://example.com/2.jpg"]), from_user_id=1
+    )
+    assert len(commits) == 1
+
+    first = get_content_sources(db, content.id)[0]
+    # updates the first source, deletes the second and adds a third
+    update = ContentUpdate(sources=[
+        ContentSourceCreate(id=first.id, type=ContentSourceType.URL, value="http://example.com/1b.jpg"),
+        ContentSourceCreate(type=ContentSourceType.URL, value="http://example.com/3.jpg"),
+    ])
+    updated = update_content(db, content.id, update)
+    assert len(commits) == 2
+    assert sorted(source.value for source in updated.sources) == ["http://example.com/1b.jpg", "http://example.com/3.jpg"]
+
+    assert delete_content(db, content.id)
+    assert len(commits) == 3
+
+
+def test_created_rows_need_no_refresh(db, assert_query_count):
+    with unit_of_work(db):
+        content_set = create_content_set(db, ContentSetCreate(name="Set", created_by_id=1))
+        # the primary key and the server default came back with the insert
+        with assert_query_count(0):
+            assert content_set.id is not None
+            assert content_set.created_at is not None
+
+
+def test_add_content_to_set_conflict_fails_unit_of_work(db):
+    content = create_content(db, content_create("In set", ["http://example.com/set.jpg"]), from_user_id=1)
+    content_set = create_content_set(db, ContentSetCreate(name="Set", created_by_id=1))
+    assert add_content_to_set(db, content_set.id, content.id)
+    # outside a unit of work the duplicate is reported
+    assert not add_content_to_set(db, content_set.id, content.id)
+
+    with pytest.raises(Exception):
+        with unit_of_work(db):
+            create_content_set(db, ContentSetCreate(name="Dropped", created_by_id=1))
+            add_content_to_set(db, content_set.id, content.id)
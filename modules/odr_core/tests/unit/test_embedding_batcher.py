@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: Apache-2.0
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import pytest
+
+from odr_core.embedding_batcher import EmbeddingBatcher
+from odr_core.embedding_server import EmbeddingKind
+from odr_core.metrics import Histogram
+
+
+class FakeModel:
+    def __init__(self):
+        self.batches = []
+        self._lock = Lock()
+
+    def __call__(self, kind, model_name, inputs):
+        with self._lock:
+            self.batches.append(list(inputs))
+        if "bad" in inputs:
+            raise ValueError("Invalid input")
+        return [[float(len(text))] for text in inputs]
+
+
+def test_histogram_snapshot_is_cumulative():
+    histogram = Histogram([1, 5, 10])
+    for value in (0.5, 3, 3, 20):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"1": 1, "5": 3, "10": 3, "+Inf": 4}
+    assert snapshot["count"] == 4
+    assert snapshot["sum"] == pytest.approx(26.5)
+
+
+def test_concurrent_requests_are_coalesced():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model, max_batch=32, max_wait_ms=100)
+    texts = ["x" * i for i in range(1, 9)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda text: batcher.submit(EmbeddingKind.QUERY, "model", [text]), texts))
+
+    assert results == [[[float(len(text))]] for text in texts]
+    assert len(model.batches) < len(texts)
+    stats = batcher.stats()
+    assert stats["batch_size"]["sum"] == len(texts)
+    assert stats["queue_wait_ms"]["count"] == len(texts)
+
+
+def test_batch_is_flushed_at_max_batch():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model, max_batch=2, max_wait_ms=10_000)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda text: batcher.submit(EmbeddingKind.QUERY, "model", [text]), ["a", "b", "c", "d"]))
+
+    assert results == [[[1.0]]] * 4
+    assert all(len(batch) <= 2 for batch in model.batches)
+
+
+def test_failed_input_only_fails_its_request():
+    model = FakeModel()
+    batcher = EmbeddingBatcher(model, max_batch=32, max_wait_ms=100)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        good = executor.submit(batcher.submit, EmbeddingKind.PASSAGE, "model", ["good"])
+        bad = executor.submit(batcher.submit, EmbeddingKind.PASSAGE, "model", ["bad"])
+        assert good.result() == [[4.0]]
+        with pytest.raises(ValueError):
+            bad.result()
@@ -0,0 +1,121 @@
+# SPDX-License-Identifier: Apache-2.0
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from odr_core.config import settings
+from odr_core.crud import embedding as embedding_crud
+from odr_core.crud.embedding import embed_inputs
+from odr_core.embedding_server import (
+    EmbeddingKind,
+    EmbeddingServer,
+    EmbeddingServerClient,
+    EmbeddingServerError,
+    EmbeddingServerUnavailable,
+    get_embedding_server_client,
+    wait_for_embedding_server,
+)
+
+
+class FakeEmbeddingServer(EmbeddingServer):
+    def __init__(self, socket_path, **kwargs):
+        super().__init__(socket_path, **kwargs)
+        self.batches = []
+
+    def embed(self, kind, model_name, inputs):
+        self.batches.append(len(inputs))
+        if b"bad" in inputs:
+            raise ValueError("Invalid image data")
+        return np.asarray([[float(len(data)), 1.0] for data in inputs], dtype=np.float32)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = FakeEmbeddingServer(str(tmp_path / "embedding.sock"), max_batch=64, max_wait_ms=50)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    unix_server = asyncio.run_coroutine_threadsafe(
+        asyncio.start_unix_server(server.handle_connection, path=server.socket_path), loop
+    ).result(5)
+    # embed_inputs sends to the server once a socket is configured
+    with patch.object(settings, "EMBEDDING_SERVER_SOCKET", server.socket_path):
+        yield server
+
+    async def shutdown():
+        unix_server.close()
+        for task in asyncio.all_tasks():
+            if task is not asyncio.current_task():
+                task.cancel()
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def test_client_round_trip(server):
+    assert embed_inputs(EmbeddingKind.PASSAGE, "model", ["a", "abc"]) == [[1.0, 1.0], [3.0, 1.0]]
+    assert embed_inputs(EmbeddingKind.IMAGE, "model", [b"12345"]) == [[5.0, 1.0]]
+    assert embed_inputs(EmbeddingKind.QUERY, "model", [], coalesce=True) == []
+
+
+def test_concurrent_requests_are_batched(server):
+    texts = ["x" * i for i in range(1, 17)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(
+            lambda text: embed_inputs(EmbeddingKind.QUERY, "model", [text], coalesce=True), texts
+        ))
+
+    assert results == [[[float(len(text)), 1.0]] for text in texts]
+    assert sum(server.batches) == len(texts)
+    assert len(server.batches) < len(texts)
+
+
+def test_bad_input_only_fails_its_own_request(server):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        good = executor.submit(embed_inputs, EmbeddingKind.IMAGE, "model", [b"good"])
+        bad = executor.submit(embed_inputs, EmbeddingKind.IMAGE, "model", [b"bad"])
+        assert good.result() == [[4.0, 1.0]]
+        with pytest.raises(EmbeddingServerError):
+            bad.result()
+
+    # the connection stays usable after an error response
+    assert embed_inputs(EmbeddingKind.IMAGE, "model", [b"ok"]) == [[2.0, 1.0]]
+
+
+def test_client_reconnects_after_a_dropped_connection(server):
+    client = EmbeddingServerClient(server.socket_path)
+    assert client.embed(EmbeddingKind.IMAGE, "model", [b"ab"]) == [[2.0, 1.0]]
+    # a connection the server dropped is replaced on the next request
+    client._local.sock.close()
+    assert client.embed(EmbeddingKind.IMAGE, "model", [b"abc"]) == [[3.0, 1.0]]
+
+
+def test_client_is_only_configured_with_a_socket():
+    with patch.object(settings, "EMBEDDING_SERVER_SOCKET", None):
+        assert get_embedding_server_client() is None
+    with patch.object(settings, "EMBEDDING_SERVER_SOCKET", "/tmp/odr-test.sock"):
+        client = get_embedding_server_client()
+        assert client.socket_path == "/tmp/odr-test.sock"
+        assert get_embedding_server_client() is client
+
+
+def test_wait_for_embedding_server(server, tmp_path):
+    assert wait_for_embedding_server(server.socket_path, 0)
+    assert not wait_for_embedding_server(str(tmp_path / "missing.sock"), 0.1, interval=0.05)
+
+
+def test_unreachable_server_falls_back_to_in_process(tmp_path):
+    socket_path = str(tmp_path / "missing.sock")
+    with pytest.raises(EmbeddingServerUnavailable):
+        EmbeddingServerClient(socket_path).embed(EmbeddingKind.IMAGE, "model", [b"ab"])
+
+    with patch.object(settings, "EMBEDDING_SERVER_SOCKET", socket_path), \
+            patch.object(embedding_crud, "embed_in_process", return_value=[[0.5, 0.5]]) as embed_in_process:
+        assert embed_inputs(EmbeddingKind.PASSAGE, "model", ["a"]) == [[0.5, 0.5]]
+    embed_in_process.assert_called_once_with(EmbeddingKind.PASSAGE, "model", ["a"], None)
@@ -0,0 +1,65 @@
+# SPDX-License-Identifier: Apache-2.0
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from odr_core import jsonl_loader
+from odr_core.enums import ContentSourceType
+from odr_core.jsonl_loader import CopyStream, LoadStats, item_source, staging_rows
+
+
+def hf_item(row, **kwargs):
+    return {
+        "id": f"dataset-{row}",
+        "type": "image",
+        "meta": {"hf-dataset-name": "omi/hdr", "hf-dataset-id": row, "hf-dataset-split": "train"},
+        "annotations": [{"annotation": {"text": "a line\twith, \"quotes\"\nand breaks"}}],
+        **kwargs,
+    }
+
+
+def test_item_source():
+    assert item_source(hf_item(3)) == (ContentSourceType.HUGGING_FACE, "omi/hdr/train/3")
+    assert item_source({"id": "upload-1", "meta": {}}) == (ContentSourceType.PATH, "upload-1")
+
+
+def test_staging_rows_skip_malformed_lines():
+    lines = [json.dumps(hf_item(0, image="aGVsbG8=")) + "\n", "\n", "{not json\n", json.dumps({"meta": None}) + "\n"]
+    stats = LoadStats()
+    rows = list(staging_rows(lines, stats))
+
+    assert (stats.lines, stats.malformed) == (3, 2)
+    assert [row[:3] for row in rows] == [["1", "HUGGING_FACE", "omi/hdr/train/0"]]
+    # the base64 image is not staged
+    assert "image" not in json.loads(rows[0][3])
+
+
+@pytest.mark.parametrize("size", [1, 7, 8192, -1])
+def test_copy_stream_round_trips_csv(size):
+    stats = LoadStats()
+    rows = list(staging_rows([json.dumps(hf_item(row)) for row in range(20)], stats))
+    stream = CopyStream(iter(rows))
+
+    chunks = []
+    while chunk := stream.read(size):
+        chunks.append(chunk)
+        assert size < 0 or len(chunk) <= size
+
+    assert list(csv.reader(io.StringIO("".join(chunks)))) == rows
+
+
+@pytest.mark.parametrize("statement,parameters", [
+    (jsonl_loader.INSERT_CONTENTS, {"from_user_id", "from_team_id"}),
+    (jsonl_loader.INSERT_ANNOTATIONS, {"from_user_id", "from_team_id"}),
+    (jsonl_loader.INSERT_EMBEDDINGS, {"from_user_id", "from_team_id", "content_dimension"}),
+    (jsonl_loader.SELECT_NEW_CONTENTS, set()),
+    (jsonl_loader.COUNT_CONFLICTS, set()),
+])
+def test_statements_only_bind_expected_parameters(statement, parameters):
+    # casts like ::contenttype must not be taken for bind parameters
+    compiled = text(statement).compile(dialect=postgresql.dialect())
+    assert set(compiled.params) == parameters
@@ -0,0 +1,135 @@
+# SPDX-License-Identifier: Apache-2.0
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+import pytest
+from fastembed import ImageEmbedding, TextEmbedding
+from odr_core.model_cache import ModelCache, fastembed_model_dirs, onnx_model_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_missing_returns_none_and_counts_miss():
+    cache = ModelCache(60)
+    assert cache["model"] is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_lazily_after_ttl():
+    clock = FakeClock()
+    cache = ModelCache(10, clock=clock)
+    cache["a"] = 1
+    cache["b"] = 2
+
+    clock.now = 5
+    assert cache["a"] == 1  # access extends a's expiry to 15
+
+    clock.now = 12
+    assert "b" not in cache
+    assert cache["a"] == 1
+    assert cache.stats()["expirations"] == 1
+
+
+def test_size_budget_evicts_least_recently_used():
+    sizes = {"a": 40, "b": 40, "c": 40}
+    cache = ModelCache(60, max_bytes=100, sizeof=lambda key, value: sizes[key])
+    cache["a"] = 1
+    cache["b"] = 2
+    cache["a"]
+    cache["c"] = 3
+
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    stats = cache.stats()
+    assert stats["size_bytes"] == 80
+    assert stats["evictions"] == 1
+
+
+def test_oversized_entry_is_kept_alone():
+    cache = ModelCache(60, max_bytes=10, sizeof=lambda key, value: 50)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert len(cache) == 1
+    assert cache["b"] == 2
+
+
+def test_get_or_load_loads_once_for_concurrent_callers():
+    cache = ModelCache(60)
+    started, release = Event(), Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "model"
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(cache.get_or_load, "a", loader)
+        started.wait(5)
+        others = [executor.submit(cache.get_or_load, "a", loader) for _ in range(3)]
+        release.set()
+        results = [first.result()] + [f.result() for f in others]
+
+    assert results == ["model"] * 4
+    assert len(calls) == 1
+    assert cache.stats()["loads"] == 1
+    assert cache.get_or_load("a", loader) == "model"
+    assert cache.stats()["hits"] == 1
+
+
+def test_get_or_load_failure_is_not_cached():
+    cache = ModelCache(60)
+
+    def broken():
+        raise RuntimeError("download failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("a", broken)
+    assert cache.get_or_load("a", lambda: "model") == "model"
+
+
+def test_get_or_load_keeps_model_that_cannot_be_sized():
+    def sizeof(key, value):
+        raise OSError("cache directory is gone")
+
+    cache = ModelCache(60, max_bytes=10, sizeof=sizeof)
+    assert cache.get_or_load("a", lambda: "model") == "model"
+    assert cache["a"] == "model"
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_onnx_model_size(tmp_path):
+    # directory names of fastembed 0.3.4 downloads, bge-small comes from a repackaged ONNX repo
+    model_dir = tmp_path / "models--Qdrant--clip-ViT-B-32-vision" / "snapshots" / "abc"
+    model_dir.mkdir(parents=True)
+    (model_dir / "model.onnx").write_bytes(b"0" * 128)
+    (model_dir / "config.json").write_bytes(b"{}")
+    bge_dir = tmp_path / "models--qdrant--bge-small-en-v1.5-onnx-q" / "snapshots" / "def"
+    bge_dir.mkdir(parents=True)
+    (bge_dir / "model_optimized.onnx").write_bytes(b"0" * 64)
+    minilm_dir = tmp_path / "fast-all-MiniLM-L6-v2"
+    minilm_dir.mkdir()
+    (minilm_dir / "model.onnx").write_bytes(b"0" * 32)
+
+    text_models = TextEmbedding.list_supported_models()
+    image_models = ImageEmbedding.list_supported_models()
+    assert onnx_model_size(str(tmp_path), "Qdrant/clip-ViT-B-32-vision", image_models) == 128
+    assert onnx_model_size(str(tmp_path), "BAAI/bge-small-en-v1.5", text_models) == 64
+    assert onnx_model_size(str(tmp_path), "sentence-transformers/all-MiniLM-L6-v2", text_models) == 32
+    assert onnx_model_size(str(tmp_path), "unknown/model", text_models) == 0
+    assert onnx_model_size(str(tmp_path / "missing"), "BAAI/bge-small-en-v1.5", text_models) == 0
+
+
+def test_fastembed_model_dirs():
+    text_models = TextEmbedding.list_supported_models()
+    assert fastembed_model_dirs("BAAI/bge-small-en-v1.5", text_models) == ["models--qdrant--bge-small-en-v1.5-onnx-q"]
+    assert fastembed_model_dirs("sentence-transformers/all-MiniLM-L6-v2", text_models) == [
+        "models--qdrant--all-MiniLM-L6-v2-onnx",
+        "fast-all-MiniLM-L6-v2",
+    ]
@@ -0,0 +1,77 @@
+# SPDX-License-Identifier: Apache-2.0
+import io
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from odr_core.perceptual_hash import (
+    BKTree,
+    dhash,
+    hamming_distance,
+    hash_to_hex,
+    parse_hash,
+    phash,
+    to_signed,
+    to_unsigned,
+)
+
+
+def block_image(width=256, height=192):
+    blocks = np.random.default_rng(3).integers(0, 256, size=(6, 8, 3), dtype=np.uint8)
+    return Image.fromarray(blocks).resize((width, height), Image.Resampling.NEAREST)
+
+
+@pytest.mark.parametrize("hash_function", [phash, dhash])
+def test_hashes_survive_resizing_and_recompression(hash_function):
+    image = block_image()
+    buffer = io.BytesIO()
+    image.resize((128, 96)).save(buffer, format="JPEG", quality=70)
+    smaller = Image.open(buffer)
+    assert hamming_distance(hash_function(image), hash_function(smaller)) <= 4
+    assert 0 <= hash_function(image) < 1 << 64
+
+
+@pytest.mark.parametrize("hash_function", [phash, dhash])
+def test_hashes_differ_for_different_images(hash_function):
+    image = block_image()
+    flipped = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    assert hamming_distance(hash_function(image), hash_function(flipped)) > 10
+
+
+@pytest.mark.parametrize("value", [0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1])
+def test_signed_round_trip(value):
+    signed = to_signed(value)
+    assert -(1 << 63) <= signed < 1 << 63
+    assert to_unsigned(signed) == value
+    assert parse_hash(hash_to_hex(signed)) == value
+
+
+@pytest.mark.parametrize("value", [None, "", "tbd", "abc", "zzzzzzzzzzzzzzzz"])
+def test_parse_hash_rejects_placeholders(value):
+    assert parse_hash(value) is None
+
+
+def test_bk_tree_matches_brute_force():
+    generator = random.Random(7)
+    hashes = [generator.getrandbits(64) for _ in range(500)]
+    # near copies of the first hashes, a few bits flipped
+    hashes += [value ^ (1 << generator.randrange(64)) ^ (1 << generator.randrange(64)) for value in hashes[:50]]
+    tree = BKTree((value, item_id) for item_id, value in enumerate(hashes))
+    assert tree.size == len(hashes)
+
+    for query in hashes[:50]:
+        expected = sorted(
+            (item_id, hamming_distance(query, value))
+            for item_id, value in enumerate(hashes)
+            if hamming_distance(query, value) <= 6
+        )
+        assert sorted(tree.search(query, 6)) == expected
+
+
+def test_bk_tree_keeps_identical_hashes():
+    tree = BKTree([(5, 1), (5, 2), (7, 3)])
+    assert tree.search(5, 0) == [(1, 0), (2, 0)]
+    assert tree.search(5, 1) == [(1, 0), (2, 0), (3, 1)]
+    assert BKTree().search(5, 64) == []
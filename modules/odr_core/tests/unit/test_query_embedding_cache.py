@@ -0,0 +1,72 @@
+# SPDX-License-Identifier: Apache-2.0
+from odr_core.query_embedding_cache import QueryEmbeddingCache, normalize_query
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 0.5, 0.25]
+
+
+def test_normalize_query():
+    assert normalize_query("  red   square\n") == "red square"
+    assert normalize_query("ﬁsh") == "fish"
+    assert normalize_query("Red") != normalize_query("red")
+
+
+def test_repeated_queries_skip_the_model():
+    model = FakeModel()
+    cache = QueryEmbeddingCache(max_entries=10, ttl=60)
+    assert cache.get_or_compute(1, "model", 3, "red square", model) == [10.0, 0.5, 0.25]
+    assert cache.get_or_compute(1, "model", 3, " red  square ", model) == [10.0, 0.5, 0.25]
+    assert model.calls == ["red square"]
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_queries_are_cached_per_engine():
+    model = FakeModel()
+    cache = QueryEmbeddingCache(max_entries=10, ttl=60)
+    cache.get_or_compute(1, "model", 3, "query", model)
+    cache.get_or_compute(2, "model", 3, "query", model)
+    assert len(model.calls) == 2
+
+
+def test_memory_tier_is_bounded():
+    model = FakeModel()
+    cache = QueryEmbeddingCache(max_entries=2, ttl=60)
+    for text in ("a", "b", "c"):
+        cache.get_or_compute(1, "model", 3, text, model)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_disk_tier_is_shared_across_caches(tmp_path):
+    model = FakeModel()
+    first = QueryEmbeddingCache(max_entries=10, ttl=60, disk_dir=str(tmp_path), disk_slots=64)
+    first.get_or_compute(1, "model", 3, "red square", model)
+
+    # a fresh cache, as in another worker or after a restart
+    second = QueryEmbeddingCache(max_entries=10, ttl=60, disk_dir=str(tmp_path), disk_slots=64)
+    assert second.get_or_compute(1, "model", 3, "red square", model) == [10.0, 0.5, 0.25]
+    assert model.calls == ["red square"]
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_rejects_corrupted_slot(tmp_path):
+    model = FakeModel()
+    first = QueryEmbeddingCache(max_entries=10, ttl=60, disk_dir=str(tmp_path), disk_slots=1)
+    first.get_or_compute(1, "model", 3, "query", model)
+    store = first._store(1, 3)
+    store.vectors[0] = [9.0, 9.0, 9.0]
+
+    second = QueryEmbeddingCache(max_entries=10, ttl=60, disk_dir=str(tmp_path), disk_slots=1)
+    assert second.get_or_compute(1, "model", 3, "query", model) == [5.0, 0.5, 0.25]
+    assert len(model.calls) == 2
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+from sqlalchemy import create_engine
+
+from odr_core.config import settings
+from odr_core.database import InstrumentedQueuePool
+from odr_core.read_replicas import (
+    ReplicaRouter,
+    parse_last_write,
+    pinned_to_primary,
+    record_write,
+    request_writes,
+    reset_request_writes,
+    track_request_writes,
+)
+
+
+@pytest.fixture
+def replica_engines(tmp_path):
+    engines = [
+        create_engine(f"sqlite:///{tmp_path / f'replica_{i}.db'}", poolclass=InstrumentedQueuePool, pool_size=2)
+        for i in range(2)
+    ]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def test_router_round_robin():
+    router = ReplicaRouter(["a", "b", "c"])
+    assert [router.choose() for _ in range(4)] == ["a", "b", "c", "a"]
+
+
+def test_router_without_replicas():
+    assert ReplicaRouter([], "least_connections").choose() is None
+
+
+def test_router_unknown_strategy():
+    with pytest.raises(ValueError, match="Unknown read routing"):
+        ReplicaRouter(["a"], "random")
+
+
+def test_router_least_connections(replica_engines):
+    busy, idle = replica_engines
+    router = ReplicaRouter(replica_engines, "least_connections")
+    connection = busy.connect()
+    try:
+        assert [router.choose() for _ in range(3)] == [idle, idle, idle]
+    finally:
+        connection.close()
+    # ties go to the replicas in turn
+    assert {router.choose() for _ in range(2)} == {busy, idle}
+
+
+def test_parse_last_write():
+    assert parse_last_write("1700000000.5") == 1700000000.5
+    assert parse_last_write("not a time") is None
+    assert parse_last_write(None) is None
+
+
+def test_record_write_pins_reads_to_primary():
+    token = track_request_writes()
+    try:
+        assert not pinned_to_primary(5.0, clock=lambda: 100.0)
+        record_write(clock=lambda: 100.0)
+        assert request_writes().wrote
+        assert pinned_to_primary(5.0, clock=lambda: 104.0)
+        assert not pinned_to_primary(5.0, clock=lambda: 105.0)
+        assert not pinned_to_primary(0, clock=lambda: 100.0)
+    finally:
+        reset_request_writes(token)
+    assert request_writes() is None
+
+
+def test_last_write_of_client_pins_reads_to_primary():
+    token = track_request_writes(last_write=100.0)
+    try:
+        assert pinned_to_primary(5.0, clock=lambda: 102.0)
+        assert not request_writes().wrote
+    finally:
+        reset_request_writes(token)
+
+
+def test_commit_records_write(db):
+    token = track_request_writes()
+    try:
+        db.commit()
+        assert request_writes().wrote
+    finally:
+        reset_request_writes(token)
+
+
+def test_read_replica_urls():
+    config = settings.model_copy(update={"POSTGRES_READ_REPLICA_URLS": " postgresql://a/odr, ,postgresql://b/odr"})
+    assert config.get_read_replica_urls() == ["postgresql://a/odr", "postgresql://b/odr"]
+    assert settings.model_copy(update={"POSTGRES_READ_REPLICA_URLS": None}).get_read_replica_urls() == []
@@ -0,0 +1,39 @@
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock
+
+import pytest
+
+from odr_core.benchmarks.vector_search import run_searches, search
+from odr_core.enums import DistanceMetric, VectorStorage
+
+
+def executed_sql(db) -> str:
+    return str(db.execute.call_args.args[0])
+
+
+def test_search_orders_by_engine_dimension():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = [(3,), (1,)]
+    assert search(db, "content_embeddings", 1, "[0,1,2]", 2, DistanceMetric.L2, 3) == [3, 1]
+    sql = executed_sql(db)
+    assert "ORDER BY (embedding::vector(3)) <-> CAST(:vector AS vector) LIMIT :k" in sql
+
+
+@pytest.mark.parametrize("storage, coarse", [
+    (VectorStorage.HALF, "(embedding::halfvec(3)) <=> CAST(:vector AS halfvec(3))"),
+    (VectorStorage.BINARY, "(binary_quantize(embedding)::bit(3)) <~> binary_quantize(CAST(:vector AS vector))::bit(3)"),
+])
+def test_search_reranks_quantized_candidates(storage, coarse):
+    db = MagicMock()
+    search(db, "content_embeddings", 1, "[0,1,2]", 2, DistanceMetric.COSINE, 3, storage, candidates=8)
+    sql = executed_sql(db)
+    assert f"ORDER BY {coarse} LIMIT :candidates" in sql
+    assert sql.endswith("ORDER BY embedding <=> CAST(:vector AS vector) LIMIT :k")
+
+
+def test_exact_run_disables_index_scans():
+    db = MagicMock()
+    run_searches(db, "content_embeddings", 1, ["[0,1,2]"], 2, DistanceMetric.L2, 3, exact=True)
+    statements = [str(call.args[0]) for call in db.execute.call_args_list]
+    assert statements[0] == "SET LOCAL enable_indexscan = off"
+    assert "(embedding::vector(3))" in statements[1]
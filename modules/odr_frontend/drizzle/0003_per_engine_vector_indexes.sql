@@ -0,0 +1,4 @@
+DROP INDEX IF EXISTS "embedding_hnsw_idx";--> statement-breakpoint
+DROP INDEX IF EXISTS "content_embedding_hnsw_idx";--> statement-breakpoint
+CREATE INDEX "ix_annotation_embeddings_embedding_engine_id" ON "annotation_embeddings" USING btree ("embedding_engine_id" int4_ops);--> statement-breakpoint
+CREATE INDEX "ix_content_embeddings_embedding_engine_id" ON "content_embeddings" USING btree ("embedding_engine_id" int4_ops);
@@ -0,0 +1,32 @@
+ALTER TABLE "embedding_engines" ADD COLUMN "dimension" integer;--> statement-breakpoint
+UPDATE "embedding_engines" SET "dimension" = COALESCE(
+	(SELECT vector_dims("embedding") FROM "content_embeddings" WHERE "embedding_engine_id" = "embedding_engines"."id" LIMIT 1),
+	(SELECT vector_dims("embedding") FROM "annotation_embeddings" WHERE "embedding_engine_id" = "embedding_engines"."id" LIMIT 1)
+);--> statement-breakpoint
+-- ANN indexes on the bare column need its dimension, rebuild them over a cast to the old one
+DO $$
+DECLARE
+	names text[];
+	definitions text[];
+BEGIN
+	SELECT
+		coalesce(array_agg(indexname), '{}'),
+		coalesce(array_agg(regexp_replace(
+			indexdef,
+			'USING (hnsw|ivfflat) \(embedding ',
+			'USING \1 (((embedding)::vector(' || CASE tablename WHEN 'content_embeddings' THEN 512 ELSE 384 END || ')) '
+		)), '{}')
+	INTO names, definitions
+	FROM pg_indexes
+	WHERE schemaname = current_schema()
+		AND tablename IN ('content_embeddings', 'annotation_embeddings')
+		AND indexdef ~ 'USING (hnsw|ivfflat) \(embedding ';
+	FOR i IN 1 .. coalesce(array_length(names, 1), 0) LOOP
+		EXECUTE format('DROP INDEX %I', names[i]);
+	END LOOP;
+	ALTER TABLE "content_embeddings" ALTER COLUMN "embedding" SET DATA TYPE vector;
+	ALTER TABLE "annotation_embeddings" ALTER COLUMN "embedding" SET DATA TYPE vector;
+	FOR i IN 1 .. coalesce(array_length(definitions, 1), 0) LOOP
+		EXECUTE definitions[i];
+	END LOOP;
+END $$;
@@ -0,0 +1,16 @@
+CREATE TABLE "content_clusters" (
+	"id" serial PRIMARY KEY NOT NULL,
+	"content_id" integer NOT NULL,
+	"embedding_engine_id" integer NOT NULL,
+	"cluster_id" integer NOT NULL,
+	"matched_content_id" integer,
+	"distance" double precision,
+	"created_at" timestamp with time zone DEFAULT now(),
+	CONSTRAINT "uq_content_cluster_engine" UNIQUE("content_id","embedding_engine_id")
+);
+--> statement-breakpoint
+ALTER TABLE "content_clusters" ADD CONSTRAINT "content_clusters_content_id_fkey" FOREIGN KEY ("content_id") REFERENCES "public"."contents"("id") ON DELETE no action ON UPDATE no action;--> statement-breakpoint
+ALTER TABLE "content_clusters" ADD CONSTRAINT "content_clusters_embedding_engine_id_fkey" FOREIGN KEY ("embedding_engine_id") REFERENCES "public"."embedding_engines"("id") ON DELETE no action ON UPDATE no action;--> statement-breakpoint
+ALTER TABLE "content_clusters" ADD CONSTRAINT "content_clusters_matched_content_id_fkey" FOREIGN KEY ("matched_content_id") REFERENCES "public"."contents"("id") ON DELETE no action ON UPDATE no action;--> statement-breakpoint
+CREATE INDEX "ix_content_clusters_id" ON "content_clusters" USING btree ("id" int4_ops);--> statement-breakpoint
+CREATE INDEX "ix_content_clusters_engine_cluster" ON "content_clusters" USING btree ("embedding_engine_id" int4_ops,"cluster_id" int4_ops);
@@ -0,0 +1,4 @@
+ALTER TABLE "contents" ADD COLUMN "dhash" varchar;--> statement-breakpoint
+ALTER TABLE "contents" ADD COLUMN "phash64" bigint;--> statement-breakpoint
+ALTER TABLE "contents" ADD COLUMN "dhash64" bigint;--> statement-breakpoint
+UPDATE "contents" SET "phash64" = ('x' || "phash")::bit(64)::bigint WHERE "phash" ~* '^[0-9a-f]{16}$';
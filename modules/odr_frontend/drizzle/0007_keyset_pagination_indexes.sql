@@ -0,0 +1,20 @@
+UPDATE "contents" SET "created_at" = now() WHERE "created_at" IS NULL;--> statement-breakpoint
+ALTER TABLE "contents" ALTER COLUMN "created_at" SET NOT NULL;--> statement-breakpoint
+UPDATE "annotations" SET "created_at" = now() WHERE "created_at" IS NULL;--> statement-breakpoint
+ALTER TABLE "annotations" ALTER COLUMN "created_at" SET NOT NULL;--> statement-breakpoint
+UPDATE "content_embeddings" SET "created_at" = now() WHERE "created_at" IS NULL;--> statement-breakpoint
+ALTER TABLE "content_embeddings" ALTER COLUMN "created_at" SET NOT NULL;--> statement-breakpoint
+UPDATE "annotation_embeddings" SET "created_at" = now() WHERE "created_at" IS NULL;--> statement-breakpoint
+ALTER TABLE "annotation_embeddings" ALTER COLUMN "created_at" SET NOT NULL;--> statement-breakpoint
+UPDATE "content_sets" SET "created_at" = now() WHERE "created_at" IS NULL;--> statement-breakpoint
+ALTER TABLE "content_sets" ALTER COLUMN "created_at" SET NOT NULL;--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_contents_created_at_id" ON "contents" USING btree ("created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_contents_from_user_id_created_at_id" ON "contents" USING btree ("from_user_id" int4_ops,"created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_contents_from_team_id_created_at_id" ON "contents" USING btree ("from_team_id" int4_ops,"created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_annotations_created_at_id" ON "annotations" USING btree ("created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_annotations_content_id_created_at_id" ON "annotations" USING btree ("content_id" int4_ops,"created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_annotations_from_user_id_created_at_id" ON "annotations" USING btree ("from_user_id" int4_ops,"created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_annotations_from_team_id_created_at_id" ON "annotations" USING btree ("from_team_id" int4_ops,"created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_content_embeddings_created_at_id" ON "content_embeddings" USING btree ("created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_annotation_embeddings_created_at_id" ON "annotation_embeddings" USING btree ("created_at" timestamptz_ops,"id" int4_ops);--> statement-breakpoint
+CREATE INDEX IF NOT EXISTS "ix_content_sets_created_at_id" ON "content_sets" USING btree ("created_at" timestamptz_ops,"id" int4_ops);
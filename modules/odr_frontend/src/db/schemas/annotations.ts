@@ -11,13 +11,12 @@ import {
 	index,
 	foreignKey,
 	unique,
-	vector,
 	primaryKey
 } from 'drizzle-orm/pg-core';
 import { teams } from './teams';
 import { users } from './users';
 import { contents } from './contents';
-import { embeddingEngines } from './embeddings';
+import { anyVector, embeddingEngines } from './embeddings';
 
 export const annotationSources = pgTable(
 	'annotation_sources',
@@ -56,11 +55,36 @@ export const annotations = pgTable(
 		overallRating: doublePrecision('overall_rating'),
 		fromUserId: integer('from_user_id'),
 		fromTeamId: integer('from_team_id'),
-		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow(),
+		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' })
+			.defaultNow()
+			.notNull(),
 		updatedAt: timestamp('updated_at', { withTimezone: true, mode: 'string' })
 	},
 	(table) => [
 		index('ix_annotations_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
+		index('ix_annotations_created_at_id').using(
+			'btree',
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_annotations_content_id_created_at_id').using(
+			'btree',
+			table.contentId.asc().nullsLast().op('int4_ops'),
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_annotations_from_user_id_created_at_id').using(
+			'btree',
+			table.fromUserId.asc().nullsLast().op('int4_ops'),
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_annotations_from_team_id_created_at_id').using(
+			'btree',
+			table.fromTeamId.asc().nullsLast().op('int4_ops'),
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
 		foreignKey({
 			columns: [table.contentId],
 			foreignColumns: [contents.id],
@@ -87,12 +111,22 @@ export const annotationEmbeddings = pgTable(
 		embeddingEngineId: integer('embedding_engine_id'),
 		fromUserId: integer('from_user_id'),
 		fromTeamId: integer('from_team_id'),
-		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow(),
-		embedding: vector('embedding', { dimensions: 384 })
+		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' })
+			.defaultNow()
+			.notNull(),
+		embedding: anyVector('embedding')
 	},
 	(table) => [
 		index('ix_annotation_embeddings_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
-		index('embedding_hnsw_idx').using('hnsw', table.embedding.op('vector_cosine_ops')),
+		index('ix_annotation_embeddings_embedding_engine_id').using(
+			'btree',
+			table.embeddingEngineId.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_annotation_embeddings_created_at_id').using(
+			'btree',
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
 		foreignKey({
 			columns: [table.annotationId],
 			foreignColumns: [annotations.id],
@@ -10,7 +10,8 @@ import {
 	foreignKey,
 	unique,
 	primaryKey,
-	text
+	text,
+	bigint
 } from 'drizzle-orm/pg-core';
 import { contentstatus, contenttype, contentsourcetype, reportstatus } from './enums';
 import { teams } from './teams';
@@ -24,6 +25,10 @@ export const contents = pgTable(
 		type: contenttype(),
 		hash: varchar(),
 		phash: varchar(),
+		dhash: varchar(),
+		// perceptual hashes as signed 64 bit integers for Hamming distance search
+		phash64: bigint('phash64', { mode: 'bigint' }),
+		dhash64: bigint('dhash64', { mode: 'bigint' }),
 		width: integer(),
 		height: integer(),
 		format: varchar(),
@@ -35,7 +40,9 @@ export const contents = pgTable(
 		meta: json(),
 		fromUserId: integer('from_user_id'),
 		fromTeamId: integer('from_team_id'),
-		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow(),
+		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' })
+			.defaultNow()
+			.notNull(),
 		updatedAt: timestamp('updated_at', { withTimezone: true, mode: 'string' }),
 		url: text().array()
 	},
@@ -43,6 +50,23 @@ export const contents = pgTable(
 		index('ix_contents_hash').using('btree', table.hash.asc().nullsLast().op('text_ops')),
 		index('ix_contents_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
 		index('ix_contents_phash').using('btree', table.phash.asc().nullsLast().op('text_ops')),
+		index('ix_contents_created_at_id').using(
+			'btree',
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_contents_from_user_id_created_at_id').using(
+			'btree',
+			table.fromUserId.asc().nullsLast().op('int4_ops'),
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_contents_from_team_id_created_at_id').using(
+			'btree',
+			table.fromTeamId.asc().nullsLast().op('int4_ops'),
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
 		foreignKey({
 			columns: [table.fromTeamId],
 			foreignColumns: [teams.id],
@@ -105,13 +129,20 @@ export const contentSets = pgTable(
 		name: varchar().notNull(),
 		description: varchar(),
 		createdById: integer('created_by_id').notNull(),
-		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow(),
+		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' })
+			.defaultNow()
+			.notNull(),
 		updatedAt: timestamp('updated_at', { withTimezone: true, mode: 'string' })
 			.defaultNow()
 			.notNull()
 	},
 	(table) => [
 		index('ix_content_sets_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
+		index('ix_content_sets_created_at_id').using(
+			'btree',
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
 		foreignKey({
 			columns: [table.createdById],
 			foreignColumns: [users.id],
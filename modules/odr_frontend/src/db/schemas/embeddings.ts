@@ -8,7 +8,8 @@ import {
 	index,
 	unique,
 	integer,
-	vector,
+	doublePrecision,
+	customType,
 	foreignKey
 } from 'drizzle-orm/pg-core';
 import { embeddingenginetype } from './enums';
@@ -16,6 +17,19 @@ import { teams } from './teams';
 import { users } from './users';
 import { contents } from './contents'; // used in contentEmbeddings below
 
+// pgvector column without a fixed dimension, every engine stores vectors of its own length
+export const anyVector = customType<{ data: number[]; driverData: string }>({
+	dataType() {
+		return 'vector';
+	},
+	toDriver(value) {
+		return JSON.stringify(value);
+	},
+	fromDriver(value) {
+		return JSON.parse(value);
+	}
+});
+
 export const embeddingEngines = pgTable(
 	'embedding_engines',
 	{
@@ -26,7 +40,8 @@ export const embeddingEngines = pgTable(
 		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow(),
 		updatedAt: timestamp('updated_at', { withTimezone: true, mode: 'string' }).notNull(),
 		type: embeddingenginetype(),
-		supported: boolean()
+		supported: boolean(),
+		dimension: integer()
 	},
 	(table) => [
 		index('ix_embedding_engines_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
@@ -43,12 +58,22 @@ export const contentEmbeddings = pgTable(
 		embeddingEngineId: integer('embedding_engine_id'),
 		fromUserId: integer('from_user_id'),
 		fromTeamId: integer('from_team_id'),
-		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow(),
-		embedding: vector('embedding', { dimensions: 512 })
+		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' })
+			.defaultNow()
+			.notNull(),
+		embedding: anyVector('embedding')
 	},
 	(table) => [
 		index('ix_content_embeddings_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
-		index('content_embedding_hnsw_idx').using('hnsw', table.embedding.op('vector_cosine_ops')),
+		index('ix_content_embeddings_embedding_engine_id').using(
+			'btree',
+			table.embeddingEngineId.asc().nullsLast().op('int4_ops')
+		),
+		index('ix_content_embeddings_created_at_id').using(
+			'btree',
+			table.createdAt.asc().nullsLast().op('timestamptz_ops'),
+			table.id.asc().nullsLast().op('int4_ops')
+		),
 		foreignKey({
 			columns: [table.contentId],
 			foreignColumns: [contents.id],
@@ -72,3 +97,40 @@ export const contentEmbeddings = pgTable(
 		unique('ic_content_embedding_engine').on(table.contentId, table.embeddingEngineId)
 	]
 );
+
+export const contentClusters = pgTable(
+	'content_clusters',
+	{
+		id: serial().primaryKey().notNull(),
+		contentId: integer('content_id').notNull(),
+		embeddingEngineId: integer('embedding_engine_id').notNull(),
+		clusterId: integer('cluster_id').notNull(),
+		matchedContentId: integer('matched_content_id'),
+		distance: doublePrecision(),
+		createdAt: timestamp('created_at', { withTimezone: true, mode: 'string' }).defaultNow()
+	},
+	(table) => [
+		index('ix_content_clusters_id').using('btree', table.id.asc().nullsLast().op('int4_ops')),
+		index('ix_content_clusters_engine_cluster').using(
+			'btree',
+			table.embeddingEngineId.asc().nullsLast().op('int4_ops'),
+			table.clusterId.asc().nullsLast().op('int4_ops')
+		),
+		foreignKey({
+			columns: [table.contentId],
+			foreignColumns: [contents.id],
+			name: 'content_clusters_content_id_fkey'
+		}),
+		foreignKey({
+			columns: [table.embeddingEngineId],
+			foreignColumns: [embeddingEngines.id],
+			name: 'content_clusters_embedding_engine_id_fkey'
+		}),
+		foreignKey({
+			columns: [table.matchedContentId],
+			foreignColumns: [contents.id],
+			name: 'content_clusters_matched_content_id_fkey'
+		}),
+		unique('uq_content_cluster_engine').on(table.contentId, table.embeddingEngineId)
+	]
+);
@@ -32,7 +32,7 @@ export {
 } from './contents';
 
 // Tables from embeddings.ts
-export { embeddingEngines, contentEmbeddings } from './embeddings';
+export { embeddingEngines, contentEmbeddings, contentClusters } from './embeddings';
 
 // Tables from misc.ts
 export { featureToggles, verificationToken } from './misc';
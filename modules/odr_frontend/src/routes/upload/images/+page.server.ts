@@ -3,6 +3,7 @@ import { type RequestEvent } from '@sveltejs/kit';
 import type { PageServerLoad } from './$types';
 
 import { S3Client } from "@aws-sdk/client-s3";
+import { createHash } from 'crypto';
 import { db } from '../../../db';
 import { contents } from '../../../db/schemas/contents';
 
@@ -26,6 +27,13 @@ const API_BASE_URL = process.env.API_SERVICE_URL ?? 'http://odr-api:31100/api/v1
 const s3Client: S3Client | null = setupS3Client();
 setupLocalDirectories()
 
+// the image API answers 409 for files whose SHA-256 is already stored
+class DuplicateContentError extends Error {
+	constructor(public contentId: number) {
+		super(`Content already exists: ${contentId}`);
+	}
+}
+
 async function makeImageApiCall(endpoint: string, file: Blob, filename: string) {
 	const formData = new FormData();
     formData.append('file', file, filename);
@@ -36,12 +44,19 @@ async function makeImageApiCall(endpoint: string, file: Blob, filename: string)
             body: formData,
         });
 
+        if (response.status === 409) {
+            const { detail } = await response.json();
+            throw new DuplicateContentError(detail.content_id);
+        }
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
         return await response.json();
     } catch (error) {
+        if (error instanceof DuplicateContentError) {
+            throw error;
+        }
         console.error(`Error calling ${endpoint}:`, error);
         throw new Error(`API error (${endpoint}): ${error instanceof Error ? error.message : String(error)}`);
     }
@@ -55,7 +70,10 @@ export const actions = {
 		const { uniqueFileName, fileExtension } = handleFileUpload(file, timestamp, userId);
 
 		try {
-			// Clean metadata
+			// same digest the API checks for duplicates, taken before metadata is removed
+			const contentHash = createHash('sha256').update(Buffer.from(await file.arrayBuffer())).digest('hex');
+
+			// Clean metadata, duplicates are rejected here before any processing
 			const cleanedData = await makeImageApiCall('/image/clean-metadata', file, uniqueFileName);
 			const cleaned_image_base64 = cleanedData.cleaned_image
 
@@ -73,6 +91,7 @@ export const actions = {
 			// Calculate HDR stats and metadata
 			const statsData = await makeImageApiCall('/image/hdr-stats', cleanedBlob, uniqueFileName);
 			const metadataData = await makeImageApiCall('/image/metadata', cleanedBlob, uniqueFileName);
+			const hashData = await makeImageApiCall('/image/hashes', cleanedBlob, uniqueFileName);
 
 			// Create JPG preview
 			const jpgData = await makeImageApiCall('/image/jpg-preview', cleanedBlob, uniqueFileName);
@@ -103,8 +122,11 @@ export const actions = {
 			const newContent = await db.insert(contents).values({
 				name: uniqueFileName,
 				type: 'IMAGE',
-				hash: "", // Needs calculated elsewhere
-				phash: "", // Needs calculated elsewhere
+				hash: contentHash,
+				phash: hashData.phash,
+				dhash: hashData.dhash,
+				phash64: BigInt.asIntN(64, BigInt(`0x${hashData.phash}`)),
+				dhash64: BigInt.asIntN(64, BigInt(`0x${hashData.dhash}`)),
 				width: metadataData.width || 0,
 				height: metadataData.height || 0,
 				url: [],
@@ -124,6 +146,9 @@ export const actions = {
 
 			return { success: true, uniqueFileName };
 		} catch (error) {
+			if (error instanceof DuplicateContentError) {
+				return { success: false, duplicate: true, contentId: error.contentId, error: 'This image was already uploaded' };
+			}
 			console.error('Error uploading file:', error);
 			return { success: false, error: 'Failed to upload file' };
 		}